@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import shutil
+import threading
+import traceback
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+import orchestrator
+from tools.spellEngine import SpellEngine
+from tools.orchestratorTools import local_clone_path
+
+# Esecuzione di molte analisi nello stesso processo (jobServer, batchRunner):
+#   - un SpellEngine già caldo per ogni insieme di lingue, condiviso da tutte le analisi deterministiche
+#   - una cartella di lavoro per analisi, rimossa al termine; le analisi deterministiche incrementali
+#     dello stesso repository condividono il clone in temp_path e girano una alla volta
+#   - orchestrator.analyze con le eccezioni convertite nel payload di errore per il webhook
+
+DEFAULT_LANGUAGES = ["it_IT", "en_US"]
+
+
+def configure_region():
+    """AWS_REGION (default eu-north-1) anche come AWS_DEFAULT_REGION, per boto3 e Bedrock."""
+    region = os.getenv("AWS_REGION", "eu-north-1")
+    os.environ["AWS_DEFAULT_REGION"] = region
+    os.environ["AWS_REGION"] = region
+
+
+def split_list(value, default: List[str] = ()) -> List[str]:
+    """Voci (lingue, parole ammesse) da una lista o da una stringa separata da virgole; default se vuoto."""
+    if not value:
+        return list(default)
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+class AnalysisRunner:
+    """Risorse condivise tra le analisi di un processo. Thread-safe: ogni analisi gira in un thread."""
+
+    def __init__(self, temp_path: str):
+        self.temp_path = temp_path
+        self._engines: Dict[Tuple[str, ...], SpellEngine] = {}
+        self._engines_lock = threading.Lock()
+        # Lock dei clone condivisi e analisi che li usano: rimossi quando nessuna li usa
+        self._path_locks: Dict[str, threading.Lock] = {}
+        self._path_users: Dict[str, int] = {}
+        self._paths_lock = threading.Lock()
+
+    # ── Dizionari ──────────────────────────────────────────────────────────
+
+    def engine_for(self, languages: List[str]) -> SpellEngine:
+        """Un SpellEngine (pool di processi con dizionari caricati) per ogni insieme di lingue, riusato tra le analisi."""
+        key = tuple(sorted(languages))
+        with self._engines_lock:
+            if key not in self._engines:
+                self._engines[key] = SpellEngine(list(key))
+            return self._engines[key]
+
+    def warm(self, languages: List[str]) -> float:
+        """
+        Avvia (fork) i worker dell'engine e carica dizionari e indici; restituisce i secondi impiegati.
+        Va chiamato prima di avviare i thread delle analisi.
+        """
+        start = time.time()
+        self.engine_for(languages).warm()
+        return time.time() - start
+
+    def close(self):
+        with self._engines_lock:
+            engines, self._engines = list(self._engines.values()), {}
+        for engine in engines:
+            engine.close()
+
+    # ── Analisi ────────────────────────────────────────────────────────────
+
+    def workspace_path(self, name: str, mode: str, incremental: bool) -> str:
+        """
+        Cartella di lavoro dell'analisi. Con incremental (solo deterministico: la modalità agent lo ignora)
+        è temp_path, il cui clone è condiviso tra le analisi dello stesso repository.
+        Altrimenti temp_path/name: due analisi non condividono mai la cartella.
+        """
+        return self.temp_path if incremental and mode == "deterministic" else os.path.join(self.temp_path, name)
+
+    @contextmanager
+    def workspace(self, name: str, repo_url: str, mode: str, incremental: bool):
+        """workspace_path per la durata del blocco: rimossa all'uscita, o condivisa una analisi alla volta."""
+        temp_path = self.workspace_path(name, mode, incremental)
+        if temp_path != self.temp_path:
+            try:
+                yield temp_path
+            finally:
+                shutil.rmtree(temp_path, ignore_errors=True)
+            return
+
+        path = str(local_clone_path(repo_url, self.temp_path))
+        with self._paths_lock:
+            lock = self._path_locks.setdefault(path, threading.Lock())
+            self._path_users[path] = self._path_users.get(path, 0) + 1
+        try:
+            with lock:
+                yield temp_path
+        finally:
+            with self._paths_lock:
+                self._path_users[path] -= 1
+                if not self._path_users[path]:
+                    del self._path_users[path], self._path_locks[path]
+
+    def analyze(self, name: str, job: Dict[str, Any], report_progress: bool = True) -> Dict[str, Any]:
+        """
+        Esegue il job {analysis_id, repo_url, permitted_words, languages, mode, incremental} nella sua
+        cartella di lavoro. Restituisce il payload del webhook, con "error" se l'analisi è fallita.
+        """
+        start = time.time()
+        try:
+            with self.workspace(name, job["repo_url"], job["mode"], job["incremental"]) as temp_path:
+                engine = self.engine_for(job["languages"]) if job["mode"] == "deterministic" else None
+                return orchestrator.analyze(job["repo_url"], temp_path, job["permitted_words"], job["languages"],
+                                            job["mode"], job["analysis_id"], job["incremental"] or None, engine,
+                                            report_progress=report_progress)
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            return orchestrator.failure_payload(job["analysis_id"], e, time.time() - start)
@@ -0,0 +1,255 @@
+"""
+Analisi di molti repository in un solo processo (es. scansione notturna dei repository di documentazione).
+
+    python3 batchRunner.py <manifest> [--report batch.ndjson] [--temp-path DIR] [--concurrency 4]
+                           [--clone-concurrency 2] [--mode deterministic|agent] [--languages it_IT,en_US]
+                           [--permitted-words w1,w2] [--no-webhook]
+
+Il manifest ha una voce per riga: un URL, oppure un oggetto JSON
+    {"repo_url": "...", "analysis_id": "...", "permitted_words": "a,b" | ["a", "b"],
+     "languages": "en_US" | ["en_US"], "mode": "deterministic", "incremental": false}
+(anche un file .json con una lista di voci). Righe vuote e che iniziano con '#' sono ignorate.
+Solo le voci con analysis_id (l'id di un'analisi creata nell'API) vanno al webhook; le altre
+ricevono un id univoco del batch e finiscono solo nel report.
+
+I repository girano su --concurrency thread; i clone sono limitati a --clone-concurrency alla volta e
+usano la cache dei mirror (CLONE_STRATEGY=mirror, salvo diversa impostazione). Dizionari enchant,
+worker dello SpellEngine (uno per insieme di lingue), indici delle parole e verdict cache sono caricati
+una volta e condivisi da tutti i repository. Ogni risultato va al webhook appena pronto; il report NDJSON
+ha una riga per repository, scritta al termine di ognuno, e una riga finale con i totali del batch.
+Il processo termina con codice 1 se almeno un repository è fallito.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from dotenv import load_dotenv
+import orchestrator
+from analysisRunner import AnalysisRunner, DEFAULT_LANGUAGES, configure_region, split_list
+from tools.orchestratorTools import limit_clones, local_clone_path
+from tools import webhookDelivery
+
+
+def load_manifest(path: str, languages: List[str], permitted_words: str, mode: str) -> List[Dict[str, Any]]:
+    """
+    Voci del manifest con i default applicati (lingue, parole ammesse, modalità). Una voce senza
+    analysis_id riceve un id univoco del batch (batch-<data>-<pid>-<n>) e webhook=False.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    if path.endswith(".json"):
+        raw = json.loads(text)
+    else:
+        raw = []
+        for number, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                try:
+                    raw.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{number}: invalid JSON: {e}") from None
+            else:
+                raw.append(line)
+
+    run_id = f"batch-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+    entries = []
+    for index, item in enumerate(raw):
+        if isinstance(item, str):
+            item = {"repo_url": item}
+        if not isinstance(item, dict) or not item.get("repo_url"):
+            raise ValueError(f"{path}: entry {index + 1} has no repo_url")
+        analysis_id = item.get("analysis_id") or item.get("analysisId")
+        entries.append({
+            "index": index,
+            "repo_url": item["repo_url"],
+            "analysis_id": str(analysis_id or f"{run_id}-{index + 1}"),
+            # Senza un'analisi nell'API il webhook e i risultati parziali non avrebbero destinatario
+            "webhook": bool(analysis_id),
+            "permitted_words": ",".join(split_list(item.get("permitted_words"), split_list(permitted_words))),
+            "languages": split_list(item.get("languages"), languages),
+            "mode": (item.get("mode") or mode).lower(),
+            "incremental": bool(item.get("incremental", False)),
+        })
+    return entries
+
+
+class BatchRunner:
+    """Esegue le voci del manifest in parallelo, con risorse condivise e un report NDJSON."""
+
+    def __init__(self, temp_path: str, report_path: str, concurrency: int, clone_concurrency: int,
+                 webhook: bool = True):
+        self.report_path = report_path
+        self.concurrency = concurrency
+        self.clone_concurrency = clone_concurrency
+        self.webhook = webhook
+        self.runner = AnalysisRunner(temp_path)
+        self._report_lock = threading.Lock()
+        self._report = None
+
+    # ── Risorse condivise ──────────────────────────────────────────────────
+
+    def warm(self, entries: List[Dict[str, Any]]):
+        """
+        Un SpellEngine per ogni insieme di lingue delle voci deterministiche, avviato subito: i worker
+        vengono creati (fork) prima dei thread del batch e restano caldi per tutti i repository.
+        """
+        for languages in sorted({tuple(sorted(e["languages"])) for e in entries if e["mode"] == "deterministic"}):
+            elapsed = self.runner.warm(list(languages))
+            print(f"[Batch] Dictionaries for {', '.join(languages)} warmed in {elapsed:.2f}s", file=sys.stderr)
+
+    def close(self):
+        self.runner.close()
+
+    # ── Esecuzione ─────────────────────────────────────────────────────────
+
+    def run(self, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        start = time.time()
+        limit_clones(self.clone_concurrency)
+        self.warm(entries)
+        os.makedirs(os.path.dirname(os.path.abspath(self.report_path)), exist_ok=True)
+        try:
+            with open(self.report_path, "w", encoding="utf-8") as self._report:
+                with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as pool:
+                    rows = list(pool.map(self._run_entry, entries))
+                totals = aggregate(rows, time.time() - start)
+                self._write(totals)
+        finally:
+            limit_clones(None)
+        return totals
+
+    def _run_entry(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        print(f"[Batch] {entry['analysis_id']} started ({entry['repo_url']})", file=sys.stderr)
+        start = time.time()
+        # Cartella propria, o clone condiviso dalle voci incrementali dello stesso repository (una alla volta)
+        name = f"batch-{os.getpid()}-{entry['index'] + 1}"
+        send = self.webhook and entry["webhook"]
+        payload = self.runner.analyze(name, entry, report_progress=send)
+
+        # Il risultato parte subito, senza attendere gli altri repository
+        webhook_status = "skipped"
+        if send:
+            response = orchestrator.send_webhook(payload)
+            webhook_status = response.status_code if response is not None else "spooled"
+
+        temp_path = self.runner.workspace_path(name, entry["mode"], entry["incremental"])
+        clone_path = str(local_clone_path(entry["repo_url"], temp_path))
+        row = report_row(entry, payload, time.time() - start, webhook_status, clone_path)
+        self._write(row)
+        print(f"[Batch] {entry['analysis_id']} {row['status']} in {row['seconds']:.2f}s "
+              f"({row.get('total_errors', 0)} errors)", file=sys.stderr)
+        return row
+
+    def _write(self, row: Dict[str, Any]):
+        line = json.dumps(row, default=str)
+        with self._report_lock:
+            self._report.write(line + "\n")
+            self._report.flush()
+
+
+# ── Report ─────────────────────────────────────────────────────────────────
+
+def report_row(entry: Dict[str, Any], payload: Dict[str, Any], seconds: float, webhook_status,
+               clone_path: str) -> Dict[str, Any]:
+    """
+    Riga NDJSON di un repository: esito e conteggi, senza l'elenco delle parole (già inviato al webhook).
+    I path dei file peggiori sono relativi al repository (il clone temporaneo è già stato rimosso).
+    """
+    row = {
+        "type": "repository",
+        "analysis_id": entry["analysis_id"],
+        "repo_url": entry["repo_url"],
+        "mode": entry["mode"],
+        "languages": entry["languages"],
+        "status": "failed" if "error" in payload else "completed",
+        "seconds": round(seconds, 2),
+        "webhook": webhook_status,
+    }
+    if "error" in payload:
+        row["error"] = payload["error"]
+        return row
+    spelling_analysis = payload.get("spelling_analysis") or []
+    summary = payload.get("summary") or {}
+    row["total_files"] = summary.get("total_files", 0)
+    row["files_with_errors"] = sum(1 for item in spelling_analysis if item["misspelled_words"])
+    row["total_errors"] = summary.get("total_errors", 0)
+    if isinstance(payload.get("report"), dict):
+        row["quality_score"] = payload["report"].get("qualityScore")
+    worst = sorted(spelling_analysis, key=lambda item: len(item["misspelled_words"]), reverse=True)
+    row["worst_files"] = [{"file_path": os.path.relpath(item["file_path"], clone_path), "errors": len(item["misspelled_words"])}
+                          for item in worst[:5] if item["misspelled_words"]]
+    return row
+
+
+def aggregate(rows: List[Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+    """Riga finale del report: totali del batch."""
+    completed = [row for row in rows if row["status"] == "completed"]
+    return {
+        "type": "batch",
+        "repositories": len(rows),
+        "completed": len(completed),
+        "failed": len(rows) - len(completed),
+        "total_files": sum(row["total_files"] for row in completed),
+        "files_with_errors": sum(row["files_with_errors"] for row in completed),
+        "total_errors": sum(row["total_errors"] for row in completed),
+        "webhook_spooled": sum(1 for row in rows if row["webhook"] == "spooled"),
+        "seconds": round(seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("manifest")
+    parser.add_argument("--report", help="NDJSON report path (default: batch-<timestamp>.ndjson)")
+    parser.add_argument("--temp-path", default=os.getenv("TEMP_PATH", "temp"))
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "4")),
+                        help="Repositories analyzed at the same time")
+    parser.add_argument("--clone-concurrency", type=int, default=int(os.getenv("BATCH_CLONE_CONCURRENCY", "2")),
+                        help="Clones/fetches running at the same time")
+    parser.add_argument("--mode", default=os.getenv("BATCH_MODE", "deterministic"), choices=("deterministic", "agent"))
+    parser.add_argument("--languages", default=",".join(DEFAULT_LANGUAGES), help="Default languages of the entries")
+    parser.add_argument("--permitted-words", default="", help="Default permitted words of the entries")
+    parser.add_argument("--no-webhook", action="store_true", help="Only write the report")
+    args = parser.parse_args()
+
+    load_dotenv()
+    configure_region()
+    # Lo stesso repository viene scansionato ogni notte: i mirror in cache riducono il clone a un fetch
+    os.environ.setdefault("CLONE_STRATEGY", "mirror")
+
+    try:
+        entries = load_manifest(args.manifest, args.languages.split(","), args.permitted_words, args.mode)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    if any(entry["mode"] != "deterministic" for entry in entries) and not os.getenv("AGENT_MODEL_ID"):
+        print("ERROR: AGENT_MODEL_ID not found in .env (required by agent-mode entries)", file=sys.stderr)
+        sys.exit(1)
+
+    report_path = args.report or f"batch-{time.strftime('%Y%m%d-%H%M%S')}.ndjson"
+    print(f"[Batch] {len(entries)} repositories, concurrency {args.concurrency}, "
+          f"clone concurrency {args.clone_concurrency}, report {report_path}", file=sys.stderr)
+
+    if not args.no_webhook:
+        webhookDelivery.replay_spool()
+
+    runner = BatchRunner(args.temp_path, report_path, max(1, args.concurrency), args.clone_concurrency,
+                         webhook=not args.no_webhook)
+    try:
+        totals = runner.run(entries)
+    finally:
+        runner.close()
+
+    print(f"[Batch] {totals['completed']}/{totals['repositories']} completed, {totals['total_errors']} errors "
+          f"in {totals['total_files']} files, {totals['seconds']:.2f}s", file=sys.stderr)
+    sys.exit(1 if totals["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Test di carico del percorso agent reale (orchestrator Agent -> SpellAgent -> tool) con il modello
+simulato di tools/mockModel.py al posto di Bedrock.
+
+    python benchmarks/bench_agent_loop.py [--analyses 200] [--concurrency 50] [--files 20]
+                                          [--ttft-ms 400] [--tokens-per-s 80]
+
+Ogni analisi clona il corpus sintetico (benchmarks/corpus.py) nella propria cartella ed esegue
+orchestrator.analyze in modalità agent. Dalla telemetria di ogni analisi si ricava l'overhead del
+loop agent: tempo dell'orchestrator Agent meno tempo simulato del modello e tempo dei tool.
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import statistics
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import generate_corpus
+
+# Tool eseguiti dentro il loop: il resto del tempo dell'Agent è modello o overhead
+TOOL_SPANS = ("clone", "find_docs_files", "analyze_spelling_batch", "analyze_spelling")
+
+
+def breakdown(payload: Dict[str, Any]) -> Dict[str, float]:
+    """Secondi di modello, tool e overhead del loop di una singola analisi."""
+    telemetry = payload["execution_metrics"]["telemetry"]
+    spans = telemetry["spans"]
+    latency = telemetry["histograms"].get("model.latency_ms", {})
+    model = (latency.get("mean_ms") or 0) * latency.get("count", 0) / 1000
+    tools = sum(spans.get(name, {}).get("total_seconds", 0) for name in TOOL_SPANS)
+    agent = spans["orchestrator_agent"]["total_seconds"]
+    return {
+        "total": spans["analysis"]["total_seconds"],
+        "model": model,
+        "tools": tools,
+        "overhead": max(0.0, agent - model - tools),
+        "model_calls": telemetry["counters"].get("model.calls", 0),
+    }
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--analyses", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size-kb", type=float, default=8)
+    parser.add_argument("--ttft-ms", type=float, default=400)
+    parser.add_argument("--tokens-per-s", type=float, default=80)
+    args = parser.parse_args()
+
+    os.environ["AGENT_MODEL_ID"] = "mock"
+    os.environ["MOCK_MODEL_TTFT_MS"] = str(args.ttft_ms)
+    os.environ["MOCK_MODEL_TOKENS_PER_S"] = str(args.tokens_per_s)
+    # Niente avanzamento verso NEST_WEBHOOK_URL: i retry verso un'API assente finirebbero nei tempi misurati
+    os.environ["PROGRESS_ENABLED"] = "false"
+    import orchestrator
+    from tools import agentPool
+
+    root = tempfile.mkdtemp(prefix="bench-agent-")
+    try:
+        manifest = generate_corpus(os.path.join(root, "repo"), args.files, args.size_kb)
+
+        def run(i: int) -> Dict[str, Any]:
+            temp_path = os.path.join(root, f"run{i}")
+            try:
+                return orchestrator.analyze(manifest["root"], temp_path, "", ["en_US"], "agent", f"bench-{i}")
+            finally:
+                shutil.rmtree(temp_path, ignore_errors=True)
+
+        # Il callback handler di default di strands stampa ogni token su stdout
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                payloads = list(pool.map(run, range(args.analyses)))
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    failed = [p for p in payloads if "spelling_analysis" not in p]
+    rows = [breakdown(p) for p in payloads if "spelling_analysis" in p]
+    totals = [row["total"] for row in rows]
+    mean = {key: statistics.mean(row[key] for row in rows) for key in ("total", "model", "tools", "overhead", "model_calls")}
+
+    print(f"{len(rows)} analyses ok, {len(failed)} failed, concurrency {args.concurrency}, "
+          f"{elapsed:.2f}s wall, {len(rows) / elapsed:.2f} analyses/s")
+    print(f"latency   p50 {percentile(totals, 0.5):.3f}s  p95 {percentile(totals, 0.95):.3f}s  max {max(totals):.3f}s")
+    print(f"per analysis (mean): model {mean['model']:.3f}s  tools {mean['tools']:.3f}s  "
+          f"agent-loop overhead {mean['overhead']:.3f}s over {mean['model_calls']:.1f} model calls "
+          f"({mean['overhead'] / max(mean['model_calls'], 1) * 1000:.1f} ms per turn)")
+    for name, stats in agentPool.pool_stats().items():
+        print(f"agent pool {name}: {stats['created']} built, {stats['reused']} reused, {stats['overflow']} overflow, "
+              f"peak {stats['peak_in_use']}/{stats['max_size']}, utilization {stats['utilization']:.0%}, "
+              f"saved {stats['saved_seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
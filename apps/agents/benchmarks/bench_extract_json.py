@@ -0,0 +1,112 @@
+"""
+Micro-benchmark di extract_json: versione storica di orchestrator.py (regex + scansione delle
+graffe da ogni '{' + json.loads su ogni candidato) contro tools.jsonScanner su risposte sintetiche
+del modello con un grande array spelling_analysis.
+
+    python benchmarks/bench_extract_json.py [--size-mb 4] [--legacy-mb 1]
+
+Su ogni dimensione misurata con entrambe si verifica anche che l'oggetto estratto coincida.
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.jsonScanner import extract_json
+
+WORDS = ("the documentation describes how the analysis pipeline clones a repository "
+         "and checks every markdown file for spelling errors using hunspell dictionaries").split()
+
+
+def generate_response(size_bytes: int, seed: int = 42, braces_in_strings: bool = False) -> str:
+    """Risposta stile Bedrock: <thinking> con graffe, testo libero e il JSON finale in un blocco ```json."""
+    rng = random.Random(seed)
+    entries, total = [], 0
+    while total < size_bytes:
+        words = [rng.choice(WORDS) + "x" * rng.randint(1, 3) for _ in range(rng.randint(1, 15))]
+        if braces_in_strings and rng.random() < 0.1:
+            words.append("{" + rng.choice(WORDS))
+        entry = {"file_path": f"/tmp/repo/docs/{rng.choice(WORDS)}_{len(entries)}.md", "misspelled_words": words}
+        entries.append(entry)
+        total += len(json.dumps(entry, indent=2)) + 4
+
+    result = {
+        "analysisId": "bench",
+        "status": "completed",
+        "spelling_analysis": entries,
+        "summary": {"total_files": len(entries), "total_errors": sum(len(e["misspelled_words"]) for e in entries)},
+        "report": {"qualityScore": 80, "securityScore": 100, "performanceScore": 100,
+                   "summary": "Found errors in {many} files", "criticalIssues": 0},
+    }
+    thinking = "<thinking>I will aggregate the tool output {as a dict} and return {\"draft\": true}.</thinking>\n"
+    return f"{thinking}Here is the analysis:\n```json\n{json.dumps(result, indent=2)}\n```\nLet me know {{if}} needed."
+
+
+def legacy_extract_json(text: str) -> dict:
+    """Implementazione originale di orchestrator.extract_json, per confronto."""
+    candidates = []
+    for match in re.finditer(r'```(?:json)?\s*(.*?)\s*```', text, re.DOTALL):
+        candidates.append(match.group(1).strip())
+    text_clean = re.sub(r'<(response|thinking)>.*?</\1>', '', text, flags=re.DOTALL).strip()
+    text_clean = re.sub(r'```(?:json)?.*?```', '', text_clean, flags=re.DOTALL).strip()
+    if text_clean:
+        candidates.append(text_clean)
+    candidates.append(text)
+
+    all_json_objects = []
+    for candidate in candidates:
+        for match in re.finditer(r'\{', candidate):
+            start = match.start()
+            depth = 0
+            for i, ch in enumerate(candidate[start:], start):
+                if ch == '{':
+                    depth += 1
+                elif ch == '}':
+                    depth -= 1
+                    if depth == 0:
+                        all_json_objects.append(candidate[start:i+1])
+                        break
+
+    for obj in sorted(all_json_objects, key=len, reverse=True):
+        try:
+            return json.loads(obj)
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("Nessun JSON valido trovato")
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=4.0)
+    parser.add_argument("--legacy-mb", type=float, default=1.0)
+    args = parser.parse_args()
+
+    for size_mb in sorted({args.legacy_mb / 4, args.legacy_mb / 2, args.legacy_mb, args.size_mb}):
+        text = generate_response(int(size_mb * 1_048_576))
+        new, new_time = timed(extract_json, text)
+        line = f"{len(text) / 1_048_576:6.2f} MB  jsonScanner: {new_time:7.3f}s ({len(text) / 1_048_576 / new_time:7.1f} MB/s)"
+        if size_mb <= args.legacy_mb:
+            old, old_time = timed(legacy_extract_json, text)
+            assert old == new, "results differ"
+            line += f"  legacy: {old_time:7.3f}s  speedup: {old_time / new_time:6.1f}x"
+        print(line)
+
+    # Graffe dentro le stringhe: la versione storica sbaglia il conteggio e sceglie un altro oggetto
+    text = generate_response(64 * 1024, braces_in_strings=True)
+    expected = json.loads(re.search(r'```json\n(.*)\n```', text, re.DOTALL).group(1))
+    print(f"braces inside strings  jsonScanner correct: {extract_json(text) == expected}  "
+          f"legacy correct: {legacy_extract_json(text) == expected}")
+
+
+if __name__ == "__main__":
+    main()
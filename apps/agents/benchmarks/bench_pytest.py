@@ -0,0 +1,84 @@
+"""
+Gli stessi casi di bench_suite.py come benchmark pytest-benchmark, per confrontare le run salvate:
+
+    pip install pytest-benchmark
+    pytest benchmarks/bench_pytest.py --benchmark-autosave
+    pytest benchmarks/bench_pytest.py --benchmark-compare --benchmark-compare-fail=mean:15%
+
+Il file non segue il pattern test_*.py: viene eseguito solo se indicato esplicitamente.
+Il throughput (MB/s, parole/s) compare in extra_info di ogni benchmark.
+"""
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import generate_corpus
+from bench_extract_json import generate_response
+from bench_suite import load_documents, bench_end_to_end, LANGUAGES
+from tools.tokenizer import find_ignored_positions
+from tools.spellAgentTools import extract_words, check_words, analyze_spelling, find_docs_files
+from tools.jsonScanner import extract_json
+
+
+@pytest.fixture(scope="session")
+def manifest(tmp_path_factory):
+    files = int(os.getenv("BENCH_FILES", "100"))
+    size_kb = float(os.getenv("BENCH_SIZE_KB", "16"))
+    return generate_corpus(str(tmp_path_factory.mktemp("corpus") / "repo"), files, size_kb)
+
+
+@pytest.fixture(scope="session")
+def documents(manifest):
+    return load_documents(manifest)
+
+
+def throughput(benchmark, size_bytes: int = None, words: int = None):
+    mean = benchmark.stats.stats.mean
+    if size_bytes:
+        benchmark.extra_info["mb_per_s"] = round(size_bytes / 1_048_576 / mean, 2)
+    if words:
+        benchmark.extra_info["words_per_s"] = round(words / mean)
+
+
+def test_extract_words(benchmark, documents):
+    positions = [find_ignored_positions(content, ext) for _, ext, content in documents]
+    words = benchmark(lambda: sum(len(extract_words(c, p, set())) for (_, _, c), p in zip(documents, positions)))
+    throughput(benchmark, sum(len(c.encode()) for _, _, c in documents), words)
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["uncached", "cached"])
+def test_check_words(benchmark, documents, monkeypatch, cached):
+    monkeypatch.setenv("SPELL_CACHE", "true" if cached else "false")
+    words = sorted({w for _, ext, c in documents for w in extract_words(c, find_ignored_positions(c, ext), set())})
+    check_words(words, LANGUAGES, set())
+    benchmark(check_words, words, LANGUAGES, set())
+    throughput(benchmark, words=len(words))
+
+
+def test_analyze_spelling(benchmark, documents):
+    benchmark(lambda: [analyze_spelling(path, [], LANGUAGES) for path, _, _ in documents])
+    throughput(benchmark, sum(len(c.encode()) for _, _, c in documents))
+
+
+def test_find_docs_files(benchmark, manifest):
+    found = benchmark(find_docs_files, manifest["root"])
+    assert found["files_found"] == len(manifest["files"])
+
+
+def test_extract_json(benchmark):
+    text = generate_response(2 * 1_048_576)
+    benchmark(extract_json, text)
+    throughput(benchmark, len(text.encode()))
+
+
+def test_end_to_end(benchmark, manifest):
+    result = benchmark.pedantic(bench_end_to_end, args=(manifest, False), rounds=1, iterations=1)
+    assert "error" not in result
+    throughput(benchmark, manifest["total_bytes"])
@@ -0,0 +1,294 @@
+"""
+Benchmark end-to-end e per funzione sul corpus sintetico di benchmarks/corpus.py, senza rete.
+
+    python benchmarks/bench_suite.py [--files 200] [--size-kb 16] [--repeat 3] [--json out.json]
+                                     [--baseline old.json --tolerance 0.15] [--skip-e2e] [--skip-startup]
+
+Casi: extract_words, check_words (verdict cache disattivata e calda), analyze_spelling,
+find_docs_files, extract_json e una run end-to-end di orchestrator.py --deterministic
+(oppure orchestrator_mock.py con --mock) con il webhook ricevuto da un server locale.
+startup_*: tempo di import (python -X importtime) dei percorsi cli, deterministic e agent, con i
+moduli più lenti e se strands/boto3 sono stati caricati.
+Per ogni caso si riporta il tempo migliore su --repeat ripetizioni e il throughput (MB/s, parole/s).
+Con --baseline il comando termina con codice 1 se un throughput scende oltre --tolerance.
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List
+
+AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AGENTS_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate_corpus
+from bench_extract_json import generate_response
+from tools.tokenizer import find_ignored_positions
+from tools.spellAgentTools import extract_words, check_words, analyze_spelling, find_docs_files
+from tools.jsonScanner import extract_json
+
+LANGUAGES = ["en_US"]
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> tuple:
+    """(risultato, tempo migliore) su repeat esecuzioni."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def load_documents(manifest: Dict[str, Any]) -> List[tuple]:
+    """(path, estensione, contenuto) di ogni documento del corpus."""
+    documents = []
+    for rel in manifest["files"]:
+        path = os.path.join(manifest["root"], rel)
+        with open(path, "r", encoding="utf-8") as f:
+            documents.append((path, os.path.splitext(path)[1], f.read()))
+    return documents
+
+
+# ── Casi ───────────────────────────────────────────────────────────────────
+
+def bench_extract_words(documents, repeat) -> Dict[str, Any]:
+    positions = [find_ignored_positions(content, ext) for _, ext, content in documents]
+
+    def run():
+        return sum(len(extract_words(content, pos, set())) for (_, _, content), pos in zip(documents, positions))
+
+    words, seconds = best_of(run, repeat)
+    return {"seconds": seconds, "bytes": sum(len(c.encode()) for _, _, c in documents), "words": words}
+
+
+def bench_check_words(documents, repeat, cached: bool) -> Dict[str, Any]:
+    words = sorted({w for _, ext, content in documents for w in extract_words(content, find_ignored_positions(content, ext), set())})
+    previous = os.environ.get("SPELL_CACHE")
+    os.environ["SPELL_CACHE"] = "true" if cached else "false"
+    try:
+        if cached:
+            check_words(words, LANGUAGES, set())  # riempie la cache
+        _, seconds = best_of(lambda: check_words(words, LANGUAGES, set()), repeat)
+    finally:
+        if previous is None:
+            os.environ.pop("SPELL_CACHE", None)
+        else:
+            os.environ["SPELL_CACHE"] = previous
+    return {"seconds": seconds, "words": len(words)}
+
+
+def bench_analyze_spelling(documents, repeat, manifest) -> Dict[str, Any]:
+    def run():
+        return {path: analyze_spelling(path, [], LANGUAGES) for path, _, _ in documents}
+
+    found, seconds = best_of(run, repeat)
+    injected = {os.path.join(manifest["root"], rel): set(typos) for rel, typos in manifest["files"].items()}
+    detected = sum(len(injected[path] & set(words)) for path, words in found.items())
+    total = sum(len(typos) for typos in injected.values())
+    return {
+        "seconds": seconds,
+        "bytes": sum(len(c.encode()) for _, _, c in documents),
+        "files": len(documents),
+        "typo_recall": round(detected / total, 4) if total else None,
+    }
+
+
+def bench_find_docs_files(manifest, repeat) -> Dict[str, Any]:
+    found, seconds = best_of(lambda: find_docs_files(manifest["root"]), repeat)
+    return {"seconds": seconds, "files": found["files_found"]}
+
+
+def bench_extract_json(repeat, size_mb: float) -> Dict[str, Any]:
+    text = generate_response(int(size_mb * 1_048_576))
+    _, seconds = best_of(lambda: extract_json(text), repeat)
+    return {"seconds": seconds, "bytes": len(text.encode())}
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    payloads: List[Dict[str, Any]] = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        self.payloads.append(json.loads(body))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def bench_end_to_end(manifest, mock: bool) -> Dict[str, Any]:
+    """Un processo orchestrator completo (clone locale, analisi, webhook) come nel container."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _WebhookHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _WebhookHandler.payloads = []
+    temp_path = tempfile.mkdtemp(prefix="bench-e2e-")
+    env = {
+        **os.environ,
+        "NEST_WEBHOOK_URL": f"http://127.0.0.1:{server.server_port}/analysis/webhook",
+        "ANALYSIS_ID": "bench",
+        "PIPELINE_MODEL_SUMMARY": "false",
+        "MOCK_ANALYSIS_DELAY": "0",
+    }
+    script = "orchestrator_mock.py" if mock else "orchestrator.py"
+    args = [] if mock else ["--deterministic"]
+    try:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(AGENTS_DIR, script), *args, manifest["root"], temp_path, "", ",".join(LANGUAGES)],
+                       env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        seconds = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        shutil.rmtree(temp_path, ignore_errors=True)
+
+    if not _WebhookHandler.payloads:
+        raise RuntimeError("no webhook received")
+    payload = _WebhookHandler.payloads[-1]
+    result = {"seconds": seconds, "bytes": manifest["total_bytes"], "files": len(manifest["files"])}
+    if "error" in payload:
+        result["error"] = payload["error"]
+    elif not mock:
+        result["errors_reported"] = payload["summary"]["total_errors"]
+    return result
+
+
+# Import misurati in un processo nuovo per ogni percorso di avvio
+STARTUP_PATHS = {
+    "cli": "import orchestrator",
+    "deterministic": "import orchestrator, spellPipeline",
+    "agent": "import orchestrator, spellPipeline, spellAgent; from strands import Agent",
+}
+_HEAVY_MODULES = ("strands", "boto3")
+
+
+def bench_startup(statement: str, repeat: int) -> Dict[str, Any]:
+    """Tempo di import di statement da python -X importtime (microsecondi per modulo su stderr)."""
+    best = None
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=AGENTS_DIR,
+                                   capture_output=True, text=True, check=True)
+        modules, total = [], 0
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if not cumulative.strip().isdigit():
+                continue  # intestazione
+            modules.append((int(cumulative), name.strip()))
+            # I moduli importati direttamente da statement non sono indentati
+            if name[1:2] != " ":
+                total += int(cumulative)
+        if best is None or total < best[0]:
+            best = (total, modules)
+
+    total, modules = best
+    loaded = {name for _, name in modules}
+    return {
+        "seconds": total / 1e6,
+        "modules": len(modules),
+        "slowest": [f"{name} {us / 1000:.1f}ms" for us, name in sorted(modules, reverse=True)[:5]],
+        "heavy_loaded": [name for name in _HEAVY_MODULES if name in loaded],
+    }
+
+
+# ── Report ─────────────────────────────────────────────────────────────────
+
+def with_throughput(result: Dict[str, Any]) -> Dict[str, Any]:
+    seconds = result["seconds"]
+    if "bytes" in result:
+        result["mb_per_s"] = round(result["bytes"] / 1_048_576 / seconds, 2)
+    if "words" in result:
+        result["words_per_s"] = round(result["words"] / seconds)
+    if "files" in result:
+        result["files_per_s"] = round(result["files"] / seconds, 1)
+    result["seconds"] = round(seconds, 4)
+    return result
+
+
+def regressions(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Throughput scesi oltre la tolleranza rispetto alla baseline."""
+    found = []
+    for name, result in results.items():
+        for metric in ("mb_per_s", "words_per_s", "files_per_s"):
+            old = baseline.get(name, {}).get(metric)
+            new = result.get(metric)
+            if old and new is not None and new < old * (1 - tolerance):
+                found.append(f"{name}.{metric}: {old} -> {new} ({(new / old - 1) * 100:+.1f}%)")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Corpus directory (default: a temporary one, removed at the end)")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--size-kb", type=float, default=16)
+    parser.add_argument("--typo-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json-mb", type=float, default=2.0, help="Size of the synthetic model response for extract_json")
+    parser.add_argument("--skip-e2e", action="store_true")
+    parser.add_argument("--skip-startup", action="store_true", help="Skip the import-time cases")
+    parser.add_argument("--mock", action="store_true", help="Run the end-to-end case with orchestrator_mock.py")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Previous --json output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    root = args.corpus or tempfile.mkdtemp(prefix="bench-corpus-")
+    try:
+        manifest = generate_corpus(os.path.join(root, "repo"), args.files, args.size_kb, args.typo_rate, seed=args.seed)
+        documents = load_documents(manifest)
+        print(f"corpus: {len(documents)} files, {manifest['total_bytes'] / 1_048_576:.2f} MB, "
+              f"{manifest['total_typos']} typos", file=sys.stderr)
+
+        results = {
+            "extract_words": bench_extract_words(documents, args.repeat),
+            "check_words_uncached": bench_check_words(documents, args.repeat, cached=False),
+            "check_words_cached": bench_check_words(documents, args.repeat, cached=True),
+            "analyze_spelling": bench_analyze_spelling(documents, args.repeat, manifest),
+            "find_docs_files": bench_find_docs_files(manifest, args.repeat),
+            "extract_json": bench_extract_json(args.repeat, args.json_mb),
+        }
+        if not args.skip_e2e:
+            results["end_to_end_mock" if args.mock else "end_to_end"] = bench_end_to_end(manifest, args.mock)
+        if not args.skip_startup:
+            for name, statement in STARTUP_PATHS.items():
+                results[f"startup_{name}"] = bench_startup(statement, args.repeat)
+    finally:
+        if not args.corpus:
+            shutil.rmtree(root, ignore_errors=True)
+
+    results = {name: with_throughput(result) for name, result in results.items()}
+    for name, result in results.items():
+        rates = "  ".join(f"{key}={result[key]}" for key in ("mb_per_s", "words_per_s", "files_per_s", "typo_recall") if key in result)
+        if "heavy_loaded" in result:
+            rates = f"modules={result['modules']}  heavy={','.join(result['heavy_loaded']) or '-'}"
+        print(f"{name:22s} {result['seconds']:9.4f}s  {rates}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"[Regression] {line}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Micro-benchmark del tokenizer: extract_words storico (O(parole x intervalli ignorati))
+contro tokenizer.tokenize su un file Markdown sintetico.
+
+    python benchmarks/bench_tokenizer.py [--size-mb 5] [--legacy-kb 256]
+
+Il vecchio algoritmo è quadratico: viene misurato su un prefisso di --legacy-kb KB
+e su quel prefisso si verifica anche che i due risultati coincidano.
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.tokenizer import find_ignored_positions, tokenize
+
+WORDS = ("the documentation describes how the analysis pipeline clones a repository "
+         "and checks every markdown file for spelling errors using hunspell dictionaries").split()
+
+
+def generate_markdown(size_bytes: int, seed: int = 42) -> str:
+    """Markdown con alta densità di code span, link, immagini e blocchi di codice."""
+    rng = random.Random(seed)
+    parts, total = [], 0
+    while total < size_bytes:
+        r = rng.random()
+        if r < 0.05:
+            chunk = "\n```python\nfor item in items:\n    print(item)\n```\n"
+        elif r < 0.25:
+            chunk = f" `{rng.choice(WORDS)}_{rng.randint(0, 99)}` "
+        elif r < 0.35:
+            chunk = f" [{rng.choice(WORDS)}](https://example.com/{rng.choice(WORDS)}) "
+        elif r < 0.38:
+            chunk = f" ![alt](img/{rng.randint(0, 999)}.png) "
+        else:
+            chunk = " ".join(rng.choice(WORDS) + ("x" if rng.random() < 0.02 else "") for _ in range(12)) + ".\n"
+        parts.append(chunk)
+        total += len(chunk)
+    return "".join(parts)
+
+
+def legacy_extract_words(content, positions_to_ignore, permitted):
+    """Implementazione originale di extract_words + clean_word, per confronto."""
+    words = []
+    for match in re.finditer(r'\b\w+\b', content):
+        word = match.group(0)
+        pos = match.start()
+        if any(s <= pos < e for s, e in positions_to_ignore) or word.lower() in permitted:
+            continue
+        word = re.sub(r'^_+|_+$', '', word)
+        word = re.sub(r'^\*+|\*+$', '', word)
+        word = re.sub(r'^`+|`+$', '', word)
+        cleaned = word.lower()
+        if cleaned and cleaned not in permitted and not cleaned.isdigit():
+            words.append(cleaned)
+    return words
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=5.0)
+    parser.add_argument("--legacy-kb", type=int, default=256)
+    args = parser.parse_args()
+
+    content = generate_markdown(int(args.size_mb * 1_048_576))
+    prefix = content[:args.legacy_kb * 1024]
+    permitted = {"hunspell"}
+
+    positions, t_pos = timed(find_ignored_positions, prefix, ".md")
+    legacy, t_legacy = timed(legacy_extract_words, prefix, positions, permitted)
+    new, t_new_prefix = timed(tokenize, prefix, positions, permitted)
+    assert Counter(legacy) == new, "tokenize output differs from legacy extract_words"
+
+    positions_full, t_pos_full = timed(find_ignored_positions, content, ".md")
+    words_full, t_new_full = timed(tokenize, content, positions_full, permitted)
+
+    mb_prefix = len(prefix.encode()) / 1_048_576
+    mb_full = len(content.encode()) / 1_048_576
+    print(f"prefix {mb_prefix:.2f} MB, {len(positions)} ignored ranges, {len(legacy)} words (outputs identical)")
+    print(f"  legacy extract_words : {t_legacy:8.3f}s  {mb_prefix / t_legacy:8.2f} MB/s")
+    print(f"  tokenize             : {t_new_prefix:8.3f}s  {mb_prefix / t_new_prefix:8.2f} MB/s")
+    print(f"  speedup              : {t_legacy / t_new_prefix:8.1f}x")
+    print(f"full   {mb_full:.2f} MB, {len(positions_full)} ignored ranges, {sum(words_full.values())} words, {len(words_full)} distinct")
+    print(f"  find_ignored_positions: {t_pos_full:8.3f}s")
+    print(f"  tokenize              : {t_new_full:8.3f}s  {mb_full / t_new_full:8.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
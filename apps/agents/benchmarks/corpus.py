@@ -0,0 +1,196 @@
+"""
+Generatore di repository di documentazione sintetici per i benchmark (offline e riproducibili).
+
+    python benchmarks/corpus.py /tmp/corpus --files 200 --size-kb 16 [--typo-rate 0.01] [--seed 42]
+
+Crea un repository git locale con file .md/.tex/.typ/.txt di dimensione configurabile, con
+densità realistica di blocchi di codice, formule e link, e typo iniettati in posizioni note.
+Il manifest (corpus.json, fuori dal repository) elenca i typo per file, per misurare la recall.
+"""
+import os
+import sys
+import json
+import random
+import argparse
+from typing import Dict, List, Any
+
+# Lessico inglese comune (tutte parole presenti nei dizionari en_US)
+VOCABULARY = """
+the of and to in is for on with as by this that from are be at or an it was can which not all have
+project document documentation system analysis result report user service server client request
+response data file files directory repository branch commit change changes review team meeting
+design architecture component module interface function method class object value values type
+types error errors warning message messages configuration environment variable variables version
+release build test tests testing quality process requirement requirements specification
+implementation development developer developers application database query queries table index
+network security performance memory storage cache time date number list section chapter figure
+example examples description overview summary introduction conclusion reference references
+support update install installation command commands option options parameter parameters
+output input source target path resource resources access control state status event events
+schedule plan planning estimate budget risk risks issue issues task tasks goal goals scope
+""".split()
+
+# Parole latine/tecniche che restano fuori dal controllo (dentro codice, formule o URL)
+CODE_LINES = [
+    "for item in items:\n    print(item)",
+    "const result = await fetch(url);\nconsole.log(result.status);",
+    "def handler(event, ctx):\n    return {\"statusCode\": 200}",
+    "SELECT id, name FROM users WHERE active = 1;",
+]
+MATH = [r"\sum_{i=1}^{n} x_i^2", r"\frac{a+b}{c}", r"\alpha \cdot \beta", r"e^{i\pi} + 1 = 0"]
+EXTENSIONS = (".md", ".tex", ".typ", ".txt")
+
+
+def make_typo(word: str, rng: random.Random) -> str:
+    """Errore di battitura plausibile: scambio, omissione o raddoppio di una lettera, più un suffisso raro."""
+    if len(word) < 4:
+        return word + "zq"
+    i = rng.randrange(1, len(word) - 1)
+    op = rng.randrange(3)
+    if op == 0:
+        typo = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    elif op == 1:
+        typo = word[:i] + word[i + 1:]
+    else:
+        typo = word[:i] + word[i] * 2 + word[i:]
+    # Il suffisso garantisce che il typo non sia a sua volta una parola valida
+    return typo + "q"
+
+
+def sentence(rng: random.Random, typo_rate: float, typos: List[str]) -> str:
+    words = []
+    for _ in range(rng.randint(6, 16)):
+        word = rng.choice(VOCABULARY)
+        if rng.random() < typo_rate:
+            word = make_typo(word, rng)
+            typos.append(word)
+        words.append(word)
+    return " ".join(words).capitalize() + "."
+
+
+def markdown_block(rng, typo_rate, typos, density) -> str:
+    r = rng.random()
+    if r < density["fence"]:
+        return f"```python\n{rng.choice(CODE_LINES)}\n```"
+    if r < density["fence"] + density["link"]:
+        word = rng.choice(VOCABULARY)
+        return f"{sentence(rng, typo_rate, typos)} See [{word}](https://example.com/{word}) and `{word}_{rng.randint(0, 99)}`."
+    if r < density["fence"] + density["link"] + 0.05:
+        return f"## {sentence(rng, typo_rate, typos)}"
+    return " ".join(sentence(rng, typo_rate, typos) for _ in range(rng.randint(2, 5)))
+
+
+def latex_block(rng, typo_rate, typos, density) -> str:
+    r = rng.random()
+    if r < density["math"]:
+        return f"\\begin{{equation}}\n{rng.choice(MATH)}\n\\end{{equation}}"
+    if r < density["math"] * 2:
+        return f"{sentence(rng, typo_rate, typos)} Given ${rng.choice(MATH)}$ we obtain \\textbf{{{rng.choice(VOCABULARY)}}}."
+    if r < density["math"] * 2 + density["link"]:
+        return f"\\section{{{rng.choice(VOCABULARY)}}}\n{sentence(rng, typo_rate, typos)} \\cite{{ref{rng.randint(0, 99)}}}"
+    return " ".join(sentence(rng, typo_rate, typos) for _ in range(rng.randint(2, 5)))
+
+
+def typst_block(rng, typo_rate, typos, density) -> str:
+    r = rng.random()
+    if r < density["math"]:
+        return f"$ {rng.choice(MATH)} $"
+    if r < density["math"] + density["link"]:
+        return f"#set text(size: 11pt)\n{sentence(rng, typo_rate, typos)}"
+    return " ".join(sentence(rng, typo_rate, typos) for _ in range(rng.randint(2, 5)))
+
+
+def text_block(rng, typo_rate, typos, density) -> str:
+    return " ".join(sentence(rng, typo_rate, typos) for _ in range(rng.randint(2, 5)))
+
+
+BLOCKS = {".md": markdown_block, ".tex": latex_block, ".typ": typst_block, ".txt": text_block}
+
+
+def generate_document(ext: str, size_bytes: int, rng: random.Random, typo_rate: float,
+                      density: Dict[str, float]) -> tuple:
+    """Restituisce (contenuto, typo iniettati) per un documento di circa size_bytes byte."""
+    typos: List[str] = []
+    blocks, total = [], 0
+    while total < size_bytes:
+        block = BLOCKS[ext](rng, typo_rate, typos, density)
+        blocks.append(block)
+        total += len(block) + 2
+    return "\n\n".join(blocks) + "\n", typos
+
+
+def generate_corpus(root: str, files: int = 100, size_kb: float = 16, typo_rate: float = 0.01,
+                    mix: Dict[str, float] = None, fence_density: float = 0.08, math_density: float = 0.1,
+                    link_density: float = 0.15, seed: int = 42, commit: bool = True) -> Dict[str, Any]:
+    """
+    Crea (o ricrea) un repository di documentazione in root.
+
+    Args:
+        root: Cartella del repository
+        files: Numero di documenti
+        size_kb: Dimensione media di un documento (KB); le dimensioni variano tra 0.25x e 4x
+        typo_rate: Probabilità che una parola del testo sia un typo
+        mix: Quota di ogni estensione (default: 50% .md, 20% .tex, 15% .typ, 15% .txt)
+        fence_density, math_density, link_density: Probabilità per blocco di codice, formule e link
+        seed: Seed del generatore
+        commit: Se True inizializza il repository git e crea un commit
+
+    Returns:
+        Manifest con file, byte totali e typo iniettati per file (salvato anche in root + ".json")
+    """
+    mix = mix or {".md": 0.5, ".tex": 0.2, ".typ": 0.15, ".txt": 0.15}
+    density = {"fence": fence_density, "math": math_density, "link": link_density}
+    rng = random.Random(seed)
+    exts, weights = zip(*mix.items())
+
+    manifest = {"root": os.path.abspath(root), "seed": seed, "files": {}, "total_bytes": 0, "total_typos": 0}
+    for i in range(files):
+        ext = rng.choices(exts, weights)[0]
+        size = int(size_kb * 1024 * rng.choice((0.25, 0.5, 1, 1, 1, 2, 4)))
+        rel = os.path.join(f"section{i % 10}", f"chapter{i // 10}", f"doc{i}{ext}")
+        content, typos = generate_document(ext, size, rng, typo_rate, density)
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        manifest["files"][rel] = sorted(set(typos))
+        manifest["total_bytes"] += len(content.encode())
+        manifest["total_typos"] += len(typos)
+
+    # Rumore che find_docs_files deve saltare
+    os.makedirs(os.path.join(root, "node_modules", "pkg"), exist_ok=True)
+    with open(os.path.join(root, "node_modules", "pkg", "README.md"), "w", encoding="utf-8") as f:
+        f.write("Skipped dependency readme with typoz.\n")
+
+    if commit:
+        from git import Repo
+        repo = Repo.init(root)
+        with repo.config_writer() as config:
+            config.set_value("user", "name", "corpus")
+            config.set_value("user", "email", "corpus@example.com")
+        repo.git.add("--all", "--", ".", ":!node_modules")
+        repo.index.commit(f"Synthetic corpus ({files} files, seed {seed})")
+
+    with open(os.path.abspath(root).rstrip(os.sep) + ".json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root")
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--size-kb", type=float, default=16)
+    parser.add_argument("--typo-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-git", action="store_true", help="Only write the files, without git init/commit")
+    args = parser.parse_args()
+
+    manifest = generate_corpus(args.root, args.files, args.size_kb, args.typo_rate, seed=args.seed,
+                               commit=not args.no_git)
+    print(f"{len(manifest['files'])} files, {manifest['total_bytes'] / 1_048_576:.2f} MB, "
+          f"{manifest['total_typos']} typos injected -> {manifest['root']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,20 @@
 #!/bin/bash
 # Entrypoint script that chooses between real and mock orchestrator
 
-if [ "$USE_MOCK_ANALYSIS" = "true" ]; then
+if [ "$1" = "serve" ]; then
+    # Servizio sempre attivo (jobServer): le analisi arrivano via HTTP invece che come argomenti
+    echo "DEBUG: Starting job server" >&2
+    exec python agents/jobServer.py
+elif [ "$1" = "worker" ]; then
+    # Consumer della coda Redis (queueWorker): scalabile con più repliche
+    echo "DEBUG: Starting queue worker" >&2
+    exec python agents/queueWorker.py
+elif [ "$1" = "batch" ]; then
+    # Analisi di tutti i repository di un manifest (batchRunner), es. da un cron notturno
+    echo "DEBUG: Starting batch runner" >&2
+    shift
+    exec python agents/batchRunner.py "$@"
+elif [ "$USE_MOCK_ANALYSIS" = "true" ]; then
     echo "DEBUG: Using MOCK orchestrator (no AWS required)" >&2
     exec python agents/orchestrator_mock.py "$@"
 else
@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import time
+import uuid
+import signal
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Tuple
+from dotenv import load_dotenv
+import orchestrator
+from analysisRunner import AnalysisRunner, DEFAULT_LANGUAGES, configure_region, split_list
+from tools import webhookDelivery
+
+# Servizio di analisi sempre attivo: invece di un processo per analisi (entrypoint.sh -> orchestrator.py)
+# le richieste arrivano via HTTP e girano nello stesso processo, con import, dizionari enchant e
+# worker dello SpellEngine già caldi. Al termine il risultato va al solito /analysis/webhook.
+#
+#   POST /jobs        {"analysis_id", "repo_url", "permitted_words", "languages", "mode", "incremental"}
+#   GET  /jobs/<id>   stato del job
+#   GET  /health      job in coda / in esecuzione
+#
+# I job conclusi restano consultabili (e deduplicati per analysis_id) per JOB_HISTORY_TTL_S secondi,
+# al massimo JOB_HISTORY_SIZE: oltre vengono dimenticati, dal più vecchio.
+# Con JOB_BACKEND=redis i job non girano qui ma vengono accodati per i queueWorker.
+
+MAX_BODY_BYTES = 1 << 20
+JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", "1000"))
+JOB_HISTORY_TTL_S = float(os.getenv("JOB_HISTORY_TTL_S", "86400"))
+STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class JobServer:
+    """Coda di analisi asincrona: al massimo `concurrency` job alla volta, gli altri attendono sul semaforo."""
+
+    def __init__(self, concurrency: int = None, temp_path: str = None, mode: str = None):
+        """
+        Args:
+            concurrency: Job eseguiti in parallelo (default: JOB_CONCURRENCY o 2)
+            temp_path: Cartella dei clone (default: TEMP_PATH o temp/)
+            mode: Modalità di default dei job (default: ANALYSIS_MODE o "agent")
+        """
+        self.concurrency = concurrency or int(os.getenv("JOB_CONCURRENCY", "2"))
+        self.temp_path = temp_path or os.getenv("TEMP_PATH", "temp")
+        self.mode = (mode or os.getenv("ANALYSIS_MODE", "agent")).lower()
+        self.backend = os.getenv("JOB_BACKEND", "local").lower()
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.tasks = set()
+        self._by_analysis: Dict[str, str] = {}
+        # Job conclusi, dal più vecchio: job_id -> istante di conclusione
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self.runner = AnalysisRunner(self.temp_path)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job")
+
+    # ── Risorse condivise ──────────────────────────────────────────────────
+
+    def warm(self, languages: List[str]):
+        elapsed = self.runner.warm(languages)
+        print(f"[JobServer] Dictionaries for {', '.join(languages)} warmed in {elapsed:.2f}s", file=sys.stderr)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.runner.close()
+
+    # ── Job ────────────────────────────────────────────────────────────────
+
+    def _finish(self, job: Dict[str, Any]):
+        """Registra il job concluso e dimentica quelli oltre JOB_HISTORY_SIZE o più vecchi di JOB_HISTORY_TTL_S."""
+        now = time.time()
+        self._finished[job["job_id"]] = now
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= JOB_HISTORY_SIZE and now - finished_at <= JOB_HISTORY_TTL_S:
+                break
+            del self._finished[job_id]
+            evicted = self.jobs.pop(job_id, None)
+            if evicted is not None and self._by_analysis.get(evicted["analysis_id"]) == job_id:
+                del self._by_analysis[evicted["analysis_id"]]
+
+    def submit(self, request: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Valida la richiesta e mette in coda il job. Un analysis_id già in coda o in corso non viene duplicato."""
+        repo_url = request.get("repo_url")
+        if not repo_url:
+            return 400, {"error": "repo_url is required"}
+
+        analysis_id = request.get("analysis_id") or request.get("analysisId") or str(uuid.uuid4())
+        existing = self.jobs.get(self._by_analysis.get(analysis_id))
+        if existing and existing["status"] in ("queued", "running", "completed", "enqueued"):
+            return 200, existing
+
+        languages = split_list(request.get("languages"), DEFAULT_LANGUAGES)
+        permitted = request.get("permitted_words") or ""
+        if isinstance(permitted, list):
+            permitted = ",".join(permitted)
+
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "analysis_id": analysis_id,
+            "repo_url": repo_url,
+            "permitted_words": permitted,
+            "languages": languages,
+            "mode": (request.get("mode") or self.mode).lower(),
+            "incremental": bool(request.get("incremental", False)),
+            "status": "queued",
+            "submitted_at": time.time(),
+        }
+        self.jobs[job["job_id"]] = job
+        self._by_analysis[analysis_id] = job["job_id"]
+
+        if self.backend == "redis":
+            import queueWorker
+            queued = queueWorker.enqueue_analysis(queueWorker.connect(), analysis_id, repo_url, permitted, languages)
+            job["status"] = "enqueued" if queued else "duplicate"
+            # Il job prosegue nei queueWorker: qui è già concluso
+            self._finish(job)
+            return 202, job
+
+        task = asyncio.get_running_loop().create_task(self._run(job))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return 202, job
+
+    async def _run(self, job: Dict[str, Any]):
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            print(f"[JobServer] Job {job['job_id']} started (analysis {job['analysis_id']}, {job['repo_url']})", file=sys.stderr)
+
+            # Cartella propria, o clone condiviso una analisi alla volta (incremental, vedi analysisRunner)
+            payload = await loop.run_in_executor(self._executor, self._analyze, job)
+
+            job["finished_at"] = time.time()
+            job["status"] = "failed" if "error" in payload else "completed"
+            self._finish(job)
+            # La sessione HTTP è condivisa tra i job; se l'API non risponde il payload va nello spool
+            response = await loop.run_in_executor(self._executor, orchestrator.send_webhook, payload)
+            job["webhook_status"] = response.status_code if response is not None else None
+            if response is not None and webhookDelivery.get_client().pending():
+                # L'API è tornata raggiungibile: si reinviano i risultati rimasti nello spool
+                await loop.run_in_executor(self._executor, webhookDelivery.replay_spool)
+
+            print(f"[JobServer] Job {job['job_id']} {job['status']} in "
+                  f"{job['finished_at'] - job['started_at']:.2f}s", file=sys.stderr)
+
+    def _analyze(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        payload = self.runner.analyze(job["job_id"], job)
+        if "error" in payload:
+            job["error"] = payload["error"]
+        return payload
+
+    def health(self) -> Dict[str, Any]:
+        statuses = [job["status"] for job in self.jobs.values()]
+        return {
+            "status": "ok",
+            "concurrency": self.concurrency,
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "completed": statuses.count("completed"),
+            "failed": statuses.count("failed"),
+        }
+
+    # ── HTTP ───────────────────────────────────────────────────────────────
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """HTTP/1.1 minimale (una richiesta per connessione), sufficiente per le chiamate dell'API NestJs."""
+        try:
+            status, body = await self._dispatch(reader)
+        except Exception as e:
+            status, body = 500, {"error": str(e)}
+        data = json.dumps(body, default=str).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _dispatch(self, reader: asyncio.StreamReader) -> Tuple[int, Dict[str, Any]]:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) < 2:
+            return 400, {"error": "Malformed request"}
+        method, path = request_line[0].upper(), request_line[1].split("?")[0].rstrip("/")
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_BYTES:
+            return 413, {"error": "Request body too large"}
+        raw = await reader.readexactly(length) if length else b""
+
+        if path == "/health" and method == "GET":
+            return 200, self.health()
+        if path == "/jobs" and method == "POST":
+            try:
+                request = json.loads(raw or b"{}")
+            except json.JSONDecodeError as e:
+                return 400, {"error": f"Invalid JSON: {e}"}
+            if not isinstance(request, dict):
+                return 400, {"error": "Expected a JSON object"}
+            return self.submit(request)
+        if path.startswith("/jobs/") and method == "GET":
+            job = self.jobs.get(path[len("/jobs/"):])
+            return (200, job) if job else (404, {"error": "Job not found"})
+        if path in ("/health", "/jobs") or path.startswith("/jobs/"):
+            return 405, {"error": f"Method {method} not allowed"}
+        return 404, {"error": f"Unknown path {path}"}
+
+
+async def serve(host: str, port: int, server: JobServer):
+    http = await asyncio.start_server(server.handle, host, port)
+    print(f"[JobServer] Listening on {host}:{port} (concurrency {server.concurrency}, mode {server.mode})", file=sys.stderr)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with http:
+        await stop.wait()
+    # Smette di accettare richieste ma lascia finire i job già accettati
+    print(f"[JobServer] Shutting down, waiting for {len(server.tasks)} job(s)", file=sys.stderr)
+    if server.tasks:
+        await asyncio.gather(*server.tasks, return_exceptions=True)
+
+
+def main():
+    load_dotenv()
+    configure_region()
+
+    host = os.getenv("JOB_SERVER_HOST", "0.0.0.0")
+    port = int(os.getenv("JOB_SERVER_PORT", "8000"))
+
+    async def run():
+        server = JobServer()
+        if server.mode != "deterministic" and not os.getenv("AGENT_MODEL_ID"):
+            print("[Warning] AGENT_MODEL_ID not set: only deterministic jobs will succeed", file=sys.stderr)
+        await asyncio.get_running_loop().run_in_executor(None, webhookDelivery.replay_spool)
+        warm_languages = [lang for lang in os.getenv("JOB_WARM_LANGUAGES", ",".join(DEFAULT_LANGUAGES)).split(",") if lang]
+        if warm_languages:
+            await asyncio.get_running_loop().run_in_executor(None, server.warm, warm_languages)
+        try:
+            await serve(host, port, server)
+        finally:
+            server.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
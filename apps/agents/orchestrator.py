@@ -4,56 +4,230 @@ import json
 import time
 from datetime import datetime
 from dotenv import load_dotenv
-from strands import Agent
-from tools.orchestratorTools import *
-import requests
-import re
+from tools.resultsSink import capture_results
+from tools.projectDictionary import use_permitted_words
+from tools.jsonScanner import extract_json
+from tools.progressStream import start_progress
+from tools import telemetry
 
-def extract_json(text: str) -> dict:
+# Moduli pesanti (strands/boto3, enchant, GitPython, requests) importati nelle funzioni che li usano:
+# il controllo degli argomenti e la modalità deterministica non caricano l'SDK degli agenti.
+
+def merge_agent_output(inner_text: str, spelling_analysis: list) -> dict:
+    """
+    Unisce il report scritto dal modello con i risultati raccolti dai tool.
+    Se il JSON del modello non è leggibile ma i tool hanno prodotto risultati, il report viene
+    calcolato in Python invece di perdere l'analisi.
     """
-    Estrae il JSON più completo dal testo del modello.
-    Gestisce: blocchi ```json, tag <response>, testo misto.
-    Strategia: raccoglie tutti i candidati JSON e sceglie il più lungo.
+    try:
+        final_output = extract_json(inner_text)
+    except ValueError as e:
+        print(f"[Warning] {e}", file=sys.stderr)
+        if not spelling_analysis:
+            return {
+                "error": "Failed to parse agent output as JSON",
+                "raw_output": inner_text
+            }
+        final_output = {"status": "completed"}
+
+    if spelling_analysis:
+        from spellPipeline import build_summary, build_report
+        summary = build_summary(spelling_analysis)
+        report = build_report(spelling_analysis, summary)
+        report.update(final_output.get("report") or {})
+        final_output.update({"spelling_analysis": spelling_analysis, "summary": summary, "report": report})
+    return final_output
+
+
+ORCHESTRATOR_SYSTEM_PROMPT = """You are a Senior Software Architect. 
+                        Your goal is to perform a spelling analysis on a git repository.
+
+                        EXECUTION STEPS:
+                        1. Clone the repository using clone_repo_tool.
+                        2. Scan all documents in the cloned path and check spelling errors using analyze_spelling_tool.
+                        3. Write a short report from the summary returned by the tool.
+
+                        OUTPUT RULES:
+                        - Return ONLY a valid JSON object. NO markdown, NO ```json, NO <thinking>, NO text outside JSON.
+                        - DO NOT list files or misspelled words: the per-file results are collected
+                          automatically from the tools and added to your answer.
+                        - USE ONLY REAL DATA from the analysis.
+
+                        JSON STRUCTURE (follow exactly):
+                        {
+                        "analysisId": "the analysis id given in the task",
+                        "status": "completed",
+                        "report": {
+                            "qualityScore": number,
+                            "securityScore": 100,
+                            "performanceScore": 100,
+                            "summary": "string describing the findings",
+                            "criticalIssues": number
+                        }
+                        }"""
+
+
+def build_orchestrator_agent():
+    """Orchestrator Agent senza dati dell'analisi nel system prompt, così il pool può riusarlo."""
+    from strands import Agent
+    from tools.lazyTools import agent_tools
+    from tools.orchestratorTools import clone_repo_tool, analyze_spelling_tool
+    from tools.mockModel import resolve_model
+    return Agent(
+        model=resolve_model(),
+        tools=agent_tools(clone_repo_tool, analyze_spelling_tool),
+        system_prompt=ORCHESTRATOR_SYSTEM_PROMPT,
+    )
+
+
+def run_agent_analysis(repo_url: str, temp_path: str, permitted_words: str, languages: list,
+                       analysis_id: str = None, progress=None) -> tuple:
+    """Analisi guidata dall'orchestrator Agent. Restituisce (output del modello, tempi delle fasi)."""
+    import strands  # noqa: F401 - il primo import non va contato nel tempo di costruzione del pool
+    from tools.agentPool import get_pool, pool_stats
+    from tools.spellAgentTools import add_suggestions, SUGGESTIONS_ENABLED
+    from spellPipeline import parse_permitted_words
+
+    analysis_id = analysis_id or os.getenv("ANALYSIS_ID", "unknown")
+
+    # 1. Initialization of the Orchestrator with Tools (riusato dal pool se già costruito)
+    init_start = time.time()
+    with get_pool("orchestrator", build_orchestrator_agent).acquire() as orchestrator:
+        init_time = time.time() - init_start
+        print(f"[Timer] Orchestrator initialized in {init_time:.2f}s", file=sys.stderr)
+
+        # 2. Autonomous Execution
+        exec_start = time.time()
+        print(f"Orchestrator starting task for: {repo_url}...", file=sys.stderr)
+
+        # Le parole ammesse non passano dal prompt: i tool le trovano dal path (vedi projectDictionary)
+        task_description = f"""Analyze the repository {repo_url} saving it in {temp_path}. 
+        Use languages: {languages}.
+        Analysis id: "{analysis_id}".
+        Return ONLY a valid JSON object, no other text."""
+
+        # I tool registrano i risultati per file nel sink: non passano dalla risposta del modello
+        on_record = (lambda entry: progress.add([entry])) if progress is not None else None
+        with capture_results(temp_path, on_record) as sink, use_permitted_words(temp_path, parse_permitted_words(permitted_words)), \
+                telemetry.span("orchestrator_agent"):
+            response = orchestrator(task_description)
+
+    exec_time = time.time() - exec_start
+    print(f"[Timer] Task execution completed in {exec_time:.2f}s", file=sys.stderr)
+    
+    # Suggerimenti di correzione sulle parole errate raccolte dai tool (fase opzionale, con budget)
+    entries = sink.entries()
+    suggestions = add_suggestions(entries, languages) if SUGGESTIONS_ENABLED else None
+
+    # Extract inner text from the response
+    parse_start = time.time()
+    raw_message = response.message
+    inner_text = raw_message["content"][0]["text"]
+
+    final_output = merge_agent_output(inner_text, entries)
+    
+    parse_time = time.time() - parse_start
+    print(f"[Timer] Response parsed in {parse_time:.2f}s", file=sys.stderr)
+
+    timings = {
+        "initialization_time_seconds": round(init_time, 2),
+        "execution_time_seconds": round(exec_time, 2),
+        "parsing_time_seconds": round(parse_time, 2),
+    }
+    if suggestions is not None:
+        timings["suggestions"] = suggestions
+    # Stato dei pool del processo (riusi, utilizzo, tempo di costruzione risparmiato)
+    timings["agent_pools"] = pool_stats()
+    return final_output, timings
+
+
+def run_deterministic_analysis(repo_url: str, temp_path: str, permitted_words: str, languages: list,
+                               incremental: bool = None, analysis_id: str = None, engine=None, progress=None) -> tuple:
+    """Pipeline Python senza tool-use: il modello viene usato al massimo una volta per report.summary."""
+    from spellPipeline import run_pipeline, parse_permitted_words
+    exec_start = time.time()
+    print(f"Deterministic pipeline starting for: {repo_url}...", file=sys.stderr)
+
+    final_output = {
+        "analysisId": analysis_id or os.getenv("ANALYSIS_ID", "unknown"),
+        **run_pipeline(repo_url, temp_path, parse_permitted_words(permitted_words), languages,
+                       incremental=incremental, engine=engine, progress=progress),
+    }
+
+    exec_time = time.time() - exec_start
+    print(f"[Timer] Pipeline completed in {exec_time:.2f}s", file=sys.stderr)
+
+    timings = {
+        "initialization_time_seconds": 0.0,
+        "execution_time_seconds": round(exec_time, 2),
+        "parsing_time_seconds": 0.0,
+    }
+    return final_output, timings
+
+
+def send_webhook(payload: dict, timeout: int = None):
     """
-    candidates = []
-
-    # Estract (```json ... ```)
-    for match in re.finditer(r'```(?:json)?\s*(.*?)\s*```', text, re.DOTALL):
-        candidates.append(match.group(1).strip())
-
-    # Remove(<response>, <thinking>)
-    text_clean = re.sub(r'<(response|thinking)>.*?</\1>', '', text, flags=re.DOTALL).strip()
-    # Remove markdown blocks (```json ... ```)
-    text_clean = re.sub(r'```(?:json)?.*?```', '', text_clean, flags=re.DOTALL).strip()
-    if text_clean:
-        candidates.append(text_clean)
-
-    # fall back:  consider the entire text as a candidate
-    candidates.append(text)
-
-    # For each candidate, try to extract JSON objects by looking for balanced braces {}
-    all_json_objects = []
-    for candidate in candidates:
-        for match in re.finditer(r'\{', candidate):
-            start = match.start()
-            depth = 0
-            for i, ch in enumerate(candidate[start:], start):
-                if ch == '{':
-                    depth += 1
-                elif ch == '}':
-                    depth -= 1
-                    if depth == 0:
-                        all_json_objects.append(candidate[start:i+1])
-                        break
-
-    # 5. Try all the found JSON objects and return the first one that parses successfully (preferably the longest)
-    for obj in sorted(all_json_objects, key=len, reverse=True):
+    Invia il risultato (o l'errore) all'endpoint /analysis/webhook di NestJs (vedi webhookDelivery:
+    sessione condivisa, gzip, retry). Restituisce None se il payload è finito nello spool.
+    """
+    from tools import webhookDelivery
+    return webhookDelivery.deliver(payload, timeout)
+
+
+def analyze(repo_url: str, temp_path: str, permitted_words: str, languages: list, mode: str,
+            analysis_id: str, incremental: bool = None, engine=None, report_progress: bool = True) -> dict:
+    """
+    Esegue un'analisi completa e restituisce il payload per il webhook (con execution_metrics).
+    Usata sia dal processo singolo (main) sia da analysisRunner, che passa il proprio SpellEngine già caldo.
+    report_progress=False non invia risultati parziali (analisi senza un documento Analysis nell'API).
+    """
+    start_time = time.time()
+    # Se il chiamante ha già un recorder attivo (main) la telemetria viene esportata da lui, dopo il webhook
+    owned = telemetry.active() is None
+    with telemetry.collect("analysis", **{"analysis.id": analysis_id, "analysis.mode": mode}) as recorder:
+        # Risultati parziali verso l'API mentre i file vengono controllati; inviati anche se l'analisi fallisce
+        progress = start_progress(analysis_id) if report_progress else None
         try:
-            return json.loads(obj)
-        except json.JSONDecodeError:
-            continue
+            if mode == "deterministic":
+                final_output, timings = run_deterministic_analysis(repo_url, temp_path, permitted_words, languages,
+                                                                   incremental, analysis_id, engine, progress)
+            else:
+                final_output, timings = run_agent_analysis(repo_url, temp_path, permitted_words, languages,
+                                                           analysis_id, progress)
+        finally:
+            if progress is not None:
+                progress.close()
+        if progress is not None:
+            timings["progress_updates"] = progress.sent
+
+    total_time = time.time() - start_time
+    if recorder is not None:
+        timings["telemetry"] = recorder.summary()
+        if owned:
+            telemetry.export(recorder)
+    return {
+        "analysis_id": analysis_id,
+        **final_output,
+        "execution_metrics": {
+            "total_time_seconds": round(total_time, 2),
+            "mode": mode,
+            **timings,
+            "started_at": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start_time)),
+            "completed_at": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(time.time()))
+        }
+    }
 
-    raise ValueError(f"Nessun JSON valido trovato. Testo (primi 500 char):\n{text[:500]}")
+
+def failure_payload(analysis_id: str, error: Exception, elapsed: float) -> dict:
+    return {
+        'analysis_id': analysis_id,
+        'summary': None,
+        'error': str(error),
+        'execution_metrics': {
+            'failed_at': datetime.now().isoformat(),
+            'total_time_seconds': elapsed
+        }
+    }
 
 
 def main():
@@ -65,129 +239,54 @@ def main():
     region = os.getenv("AWS_REGION", "eu-north-1")
     os.environ["AWS_DEFAULT_REGION"] = region
     os.environ["AWS_REGION"] = region
-    
-    if not os.getenv("AGENT_MODEL_ID"):
+
+    # I flag (--deterministic) possono comparire in qualsiasi posizione, gli argomenti posizionali restano invariati
+    flags = {arg for arg in sys.argv[1:] if arg.startswith("--")}
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+
+    # deterministic: clone + find_docs_files + analyze_spelling in Python (--deterministic o ANALYSIS_MODE=deterministic)
+    mode = "deterministic" if "--deterministic" in flags else os.getenv("ANALYSIS_MODE", "agent").lower()
+
+    if mode != "deterministic" and not os.getenv("AGENT_MODEL_ID"):
         print("ERROR: AGENT_MODEL_ID not found in .env", file=sys.stderr)
         sys.exit(1)
 
-    if len(sys.argv) < 3:
-        print("Usage: python3 orchestrator.py <repo_url> <temp_path> [permitted_words] [languages]", file=sys.stderr)
+    if len(args) < 2:
+        print("Usage: python3 orchestrator.py [--deterministic [--incremental]] <repo_url> <temp_path> [permitted_words] [languages]", file=sys.stderr)
         sys.exit(1)
     
-    repo_url = sys.argv[1]
-    temp_path = sys.argv[2]
-    permitted_words = sys.argv[3] if len(sys.argv) > 3 else ""
-    languages = sys.argv[4].split(",") if len(sys.argv) > 4 else ["it_IT", "en_US"]
+    repo_url = args[0]
+    temp_path = args[1]
+    permitted_words = args[2] if len(args) > 2 else ""
+    languages = args[3].split(",") if len(args) > 3 else ["it_IT", "en_US"]
 
     print(f"[Timer] Process started at {time.strftime('%Y-%m-%d %H:%M:%S')}", file=sys.stderr)
     print(f"Repository: {repo_url}", file=sys.stderr)
+    print(f"Mode: {mode}", file=sys.stderr)
     print(f"Permitted words: {permitted_words}", file=sys.stderr)
     print(f"Languages: {', '.join(languages)}", file=sys.stderr)
     print("-" * 50, file=sys.stderr)
 
     try:
-        # 1. Initialization of the Orchestrator with Tools
-        init_start = time.time()
-        
-        analysis_id = os.getenv("ANALYSIS_ID", "unknown")
-        
-        orchestrator = Agent(
-            model=os.getenv("AGENT_MODEL_ID"),
-            tools=[clone_repo_tool, analyze_spelling_tool],
-            system_prompt=f"""You are a Senior Software Architect. 
-                            Your goal is to perform a spelling analysis on a git repository.
-
-                            EXECUTION STEPS:
-                            1. Clone the repository using clone_repo_tool.
-                            2. Scan all documents in the cloned path and check spelling errors using analyze_spelling_tool.
-                            3. Aggregate all findings.
-
-                            OUTPUT RULES:
-                            - Return ONLY a valid JSON object. NO markdown, NO ```json, NO <thinking>, NO text outside JSON.
-                            - The field "spelling_analysis" MUST be a TOP-LEVEL key of the root JSON object.
-                            - DO NOT nest "spelling_analysis" inside "report" or any other field.
-                            - USE ONLY REAL DATA from the analysis.
-
-                            JSON STRUCTURE (follow exactly):
-                            {{
-                            "analysisId": "{analysis_id}",
-                            "status": "completed",
-                            "spelling_analysis": [
-                                {{
-                                "file_path": "string",
-                                "misspelled_words": ["word1", "word2"]
-                                }}
-                            ],
-                            "summary": {{
-                                "total_files": number,
-                                "total_errors": number
-                            }},
-                            "report": {{
-                                "qualityScore": number,
-                                "securityScore": 100,
-                                "performanceScore": 100,
-                                "summary": "string describing the findings",
-                                "criticalIssues": number
-                            }}
-                            }}"""
-        )
-        init_time = time.time() - init_start
-        print(f"[Timer] Orchestrator initialized in {init_time:.2f}s", file=sys.stderr)
-
-        # 2. Autonomous Execution
-        exec_start = time.time()
-        print(f"Orchestrator starting task for: {repo_url}...", file=sys.stderr)
-
-        task_description = f"""Analyze the repository {repo_url} saving it in {temp_path}. 
-        Use permitted words: {permitted_words} and languages: {languages}.
-        Return ONLY a valid JSON object, no other text."""
-        
-        response = orchestrator(task_description)
-        
-        exec_time = time.time() - exec_start
-        print(f"[Timer] Task execution completed in {exec_time:.2f}s", file=sys.stderr)
-        
-        # Extract inner text from the response
-        parse_start = time.time()
-        raw_message = response.message
-        inner_text = raw_message["content"][0]["text"]
-
-        try:
-            final_output = extract_json(inner_text)
-        except ValueError as e:
-            print(f"[Warning] {e}", file=sys.stderr)
-            final_output = {
-                "error": "Failed to parse agent output as JSON",
-                "raw_output": inner_text
-            }
-        
-        parse_time = time.time() - parse_start
-        print(f"[Timer] Response parsed in {parse_time:.2f}s", file=sys.stderr)
-
-        # Add timing information to the output
-        total_time = time.time() - start_time
+        # --incremental: ricontrolla solo i file cambiati dall'ultimo commit analizzato (anche INCREMENTAL_ANALYSIS=true)
+        incremental = True if "--incremental" in flags else None
         analysis_id = os.getenv('ANALYSIS_ID', 'unknown_id')
-        final_output_with_timing = {
-            "analysis_id": analysis_id,
-            **final_output,
-            "execution_metrics": {
-                "total_time_seconds": round(total_time, 2),
-                "initialization_time_seconds": round(init_time, 2),
-                "execution_time_seconds": round(exec_time, 2),
-                "parsing_time_seconds": round(parse_time, 2),
-                "started_at": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start_time)),
-                "completed_at": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(time.time()))
-            }
-        }
+        # Un unico recorder per analisi e webhook: il file OTLP include anche l'invio del risultato
+        with telemetry.collect("analysis", **{"analysis.id": analysis_id, "analysis.mode": mode}) as recorder:
+            final_output_with_timing = analyze(repo_url, temp_path, permitted_words, languages, mode, analysis_id, incremental)
 
-        # sostituita la stampa con una comunicazione ad un endpoint di NestJs
-        print("[Timer]: Sending results to NestJs: ", file = sys.stderr)
-        nest_url = 'http://host.docker.internal:3000/analysis/webhook';
+            # sostituita la stampa con una comunicazione ad un endpoint di NestJs
+            print("[Timer]: Sending results to NestJs: ", file = sys.stderr)
 
-        try:
-            response = requests.post(nest_url, json = final_output_with_timing, timeout = 30)
-        except Exception as e:
-            print(f'[CRITICAL]: Unable to communicate with NestJs Application. Error: {e}', file = sys.stderr)
+            # Senza risposta il risultato resta nello spool
+            delivered = send_webhook(final_output_with_timing) is not None
+        telemetry.export(recorder)
+
+        if delivered:
+            # L'API risponde: si reinviano i risultati rimasti nello spool da esecuzioni precedenti.
+            # Non all'avvio: con l'API giù ritarderebbe ogni analisi di due timeout per file
+            from tools import webhookDelivery
+            webhookDelivery.replay_spool()
 
     except Exception as e:
         elapsed = time.time() - start_time
@@ -199,21 +298,8 @@ def main():
         # Try to send failure webhook
         analysis_id = os.getenv('ANALYSIS_ID')
         if analysis_id:
-            try:
-                nest_url = 'http://host.docker.internal:3000/analysis/webhook'
-                error_payload = {
-                    'analysis_id': analysis_id,
-                    'summary': None,
-                    'error': str(e),
-                    'execution_metrics': {
-                        'failed_at': datetime.now().isoformat(),
-                        'total_time_seconds': elapsed
-                    }
-                }
-                requests.post(nest_url, json=error_payload, timeout=5)
+            if send_webhook(failure_payload(analysis_id, e, elapsed), timeout=5) is not None:
                 print(f"[Info] Failure webhook sent for analysis {analysis_id}", file=sys.stderr)
-            except Exception as webhook_error:
-                print(f"[Warning] Failed to send failure webhook: {webhook_error}", file=sys.stderr)
 
         sys.exit(1)
     finally:
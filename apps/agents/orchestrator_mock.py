@@ -21,8 +21,8 @@ def main():
     print(f"[Mock Timer] Starting fake analysis for: {repo_url}", file=sys.stderr)
     print(f"[Mock Timer] Analysis ID: {analysis_id}", file=sys.stderr)
 
-    # 2. Simula il tempo di esecuzione (es. clone e analisi spelling)
-    time.sleep(2) 
+    # 2. Simula il tempo di esecuzione (es. clone e analisi spelling); 0 nei benchmark
+    time.sleep(float(os.getenv('MOCK_ANALYSIS_DELAY', '2')))
 
     # 3. Costruzione del finto risultato (stessa struttura del prompt di sistema)
     mock_results = {
@@ -57,7 +57,7 @@ def main():
     }
 
     # 5. Invio al Webhook
-    nest_url = 'http://host.docker.internal:3000/analysis/webhook'
+    nest_url = os.getenv('NEST_WEBHOOK_URL', 'http://host.docker.internal:3000/analysis/webhook')
     print(f"[Mock Timer]: Sending mock results to NestJs: {nest_url}", file=sys.stderr)
 
     try:
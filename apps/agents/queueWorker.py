@@ -0,0 +1,343 @@
+import os
+import sys
+import json
+import time
+import fcntl
+import shutil
+import socket
+import traceback
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+from dotenv import load_dotenv
+import redis
+from git import Repo
+import orchestrator
+from analysisRunner import DEFAULT_LANGUAGES
+from spellPipeline import build_summary, build_report, summarize_with_model, parse_permitted_words
+from tools.projectDictionary import load_project_dictionary
+from tools.spellAgentTools import find_docs_files, add_suggestions, SUGGESTIONS_ENABLED
+from tools.spellEngine import check_files
+from tools.orchestratorTools import checkout_repo, local_clone_path
+from tools.incrementalStore import head_commit
+from tools import webhookDelivery
+
+# Coda di analisi su Redis Streams, per distribuire lo spell-checking su più repliche/nodi.
+#
+#   analysis:jobs   un messaggio per analisi: un worker lo prende, clona il repository e
+#                   pubblica un task per ogni documento su analysis:tasks
+#   analysis:tasks  un messaggio per file: qualunque worker lo controlla e salva il risultato
+#                   in analysis:<id>:results; chi salva l'ultimo file aggrega e invia il webhook
+#
+# Un messaggio letto ma non confermato (XACK) torna disponibile dopo QUEUE_VISIBILITY_TIMEOUT
+# secondi (XAUTOCLAIM), fino a QUEUE_MAX_ATTEMPTS tentativi. Un messaggio confermato viene anche
+# cancellato (XDEL): gli stream contengono solo il lavoro non ancora concluso. ANALYSIS_ID rende tutto idempotente:
+# la stessa analisi non viene accodata due volte e un file già controllato non viene riscritto.
+
+STREAM_JOBS = "analysis:jobs"
+STREAM_TASKS = "analysis:tasks"
+GROUP = "agents"
+
+
+def connect() -> redis.Redis:
+    url = os.getenv("REDIS_URL") or f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', '6379')}/0"
+    return redis.Redis.from_url(url, decode_responses=True)
+
+
+def key(analysis_id: str, name: str) -> str:
+    return f"analysis:{analysis_id}:{name}"
+
+
+def enqueue_analysis(r: redis.Redis, analysis_id: str, repo_url: str, permitted_words: str = "",
+                     languages: List[str] = None) -> bool:
+    """
+    Accoda un'analisi. Restituisce False (senza accodare) se lo stesso analysis_id è già stato accodato.
+    """
+    languages = languages or DEFAULT_LANGUAGES
+    job = {"analysis_id": analysis_id, "repo_url": repo_url,
+           "permitted_words": permitted_words, "languages": ",".join(languages)}
+    if not r.set(key(analysis_id, "job"), json.dumps(job), nx=True, ex=result_ttl()):
+        return False
+    r.xadd(STREAM_JOBS, job)
+    return True
+
+
+def result_ttl() -> int:
+    return int(os.getenv("QUEUE_RESULT_TTL", str(24 * 3600)))
+
+
+class QueueWorker:
+    """Consumer di entrambi gli stream: coordina le analisi e controlla i singoli file."""
+
+    def __init__(self, r: redis.Redis, name: str = None, temp_path: str = None):
+        """
+        Args:
+            r: Connessione Redis (decode_responses=True)
+            name: Nome del consumer nei gruppi (default: hostname-pid)
+            temp_path: Cartella dei clone (default: TEMP_PATH o temp/)
+        """
+        self.r = r
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.temp_path = temp_path or os.getenv("TEMP_PATH", "temp")
+        self.visibility_timeout = int(os.getenv("QUEUE_VISIBILITY_TIMEOUT", "300"))
+        self.max_attempts = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+        self._local_clones: Dict[str, Path] = {}
+        self.ensure_groups()
+
+    def ensure_groups(self):
+        for stream in (STREAM_JOBS, STREAM_TASKS):
+            try:
+                self.r.xgroup_create(stream, GROUP, id="0", mkstream=True)
+            except redis.ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    # ── Loop ───────────────────────────────────────────────────────────────
+
+    def run_once(self, block_ms: int = 5000) -> bool:
+        """
+        Gestisce al più un messaggio: prima quelli scaduti (visibility timeout), poi i task per file
+        (così le analisi già avviate finiscono prima), infine le nuove analisi.
+        Restituisce True se ha lavorato.
+        """
+        handlers = {STREAM_TASKS: self.handle_task, STREAM_JOBS: self.handle_job}
+        for stream, handler in handlers.items():
+            _, claimed, *_ = self.r.xautoclaim(stream, GROUP, self.name, self.visibility_timeout * 1000,
+                                               start_id="0-0", count=1)
+            if claimed:
+                msg_id, fields = claimed[0]
+                handler(msg_id, fields)
+                return True
+
+        for stream, handler in handlers.items():
+            messages = self.r.xreadgroup(GROUP, self.name, {stream: ">"}, count=1)
+            if messages:
+                msg_id, fields = messages[0][1][0]
+                handler(msg_id, fields)
+                return True
+
+        # Niente da fare: attesa bloccante su entrambi gli stream
+        messages = self.r.xreadgroup(GROUP, self.name, {STREAM_TASKS: ">", STREAM_JOBS: ">"}, count=1, block=block_ms)
+        if messages:
+            stream, entries = messages[0]
+            msg_id, fields = entries[0]
+            handlers[stream](msg_id, fields)
+            return True
+        self.cleanup_clones()
+        return False
+
+    def run(self, stop=lambda: False):
+        print(f"[Queue] Worker {self.name} started", file=sys.stderr)
+        while not stop():
+            try:
+                self.run_once()
+            except redis.ConnectionError as e:
+                print(f"[Warning] Redis unavailable: {e}", file=sys.stderr)
+                time.sleep(2)
+            except Exception as e:
+                # Il messaggio non è confermato: torna disponibile dopo il visibility timeout
+                print(f"[Warning] Queue message failed, retried after the visibility timeout: {e}", file=sys.stderr)
+                traceback.print_exc(file=sys.stderr)
+
+    def _done(self, stream: str, msg_id: str, pipe=None):
+        """XACK + XDEL del messaggio, nella pipeline indicata o in una propria."""
+        target = self.r.pipeline(transaction=True) if pipe is None else pipe
+        target.xack(stream, GROUP, msg_id)
+        target.xdel(stream, msg_id)
+        if pipe is None:
+            target.execute()
+
+    def _attempt(self, analysis_id: str, field: str) -> int:
+        attempts_key = key(analysis_id, "attempts")
+        attempt = self.r.hincrby(attempts_key, field, 1)
+        self.r.expire(attempts_key, result_ttl())
+        return attempt
+
+    # ── Analisi (coordinatore) ─────────────────────────────────────────────
+
+    def handle_job(self, msg_id: str, fields: Dict[str, str]):
+        analysis_id = fields["analysis_id"]
+        meta_key = key(analysis_id, "meta")
+        if self.r.hget(meta_key, "status") in ("dispatched", "completed", "failed"):
+            # Riconsegna di un job già smistato (es. worker morto dopo l'XADD dei task)
+            self._done(STREAM_JOBS, msg_id)
+            return
+
+        attempt = self._attempt(analysis_id, "__job__")
+        try:
+            clone_root = os.path.join(self.temp_path, "queue", analysis_id)
+            shutil.rmtree(clone_root, ignore_errors=True)
+            clone_path = checkout_repo(fields["repo_url"], clone_root)["path"]
+            found = find_docs_files(clone_path)
+            if "error" in found:
+                raise RuntimeError(found["error"])
+        except Exception as e:
+            print(f"[Warning] Analysis {analysis_id} attempt {attempt} failed: {e}", file=sys.stderr)
+            shutil.rmtree(clone_root, ignore_errors=True)
+            if attempt >= self.max_attempts:
+                self._fail(analysis_id, e)
+                self._done(STREAM_JOBS, msg_id)
+            # Altrimenti il messaggio resta pendente e verrà ripreso dopo il visibility timeout
+            return
+
+        files = sorted(os.path.relpath(path, clone_path).replace(os.sep, "/") for path in found["file_paths"])
+        self._local_clones[analysis_id] = Path(clone_root)
+
+        pipe = self.r.pipeline(transaction=True)
+        pipe.hset(meta_key, mapping={
+            "status": "dispatched",
+            "repo_url": fields["repo_url"],
+            "commit": head_commit(clone_path),
+            "clone_path": clone_path,
+            "permitted_words": fields.get("permitted_words", ""),
+            "languages": fields.get("languages") or ",".join(DEFAULT_LANGUAGES),
+            "files": json.dumps(files),
+            "total": len(files),
+            "started_at": time.time(),
+        })
+        pipe.expire(meta_key, result_ttl())
+        for rel in files:
+            pipe.xadd(STREAM_TASKS, {"analysis_id": analysis_id, "file": rel})
+        self._done(STREAM_JOBS, msg_id, pipe)
+        pipe.execute()
+        print(f"[Queue] Analysis {analysis_id}: {len(files)} file tasks dispatched", file=sys.stderr)
+
+        if not files:
+            self.maybe_finalize(analysis_id)
+
+    # ── File (spell-check) ─────────────────────────────────────────────────
+
+    def handle_task(self, msg_id: str, fields: Dict[str, str]):
+        analysis_id, rel = fields["analysis_id"], fields["file"]
+        results_key = key(analysis_id, "results")
+        meta = self.r.hgetall(key(analysis_id, "meta"))
+        if not meta or self.r.hexists(results_key, rel):
+            # Analisi scaduta o file già controllato da un'altra consegna
+            self._done(STREAM_TASKS, msg_id)
+            return
+
+        attempt = self._attempt(analysis_id, rel)
+        if attempt > self.max_attempts:
+            entry = {"file_path": meta["clone_path"] + "/" + rel, "misspelled_words": [],
+                     "error": f"Gave up after {self.max_attempts} attempts"}
+        else:
+            # Eccezioni qui (clone non disponibile, Redis) lasciano il task pendente per un nuovo tentativo
+            clone_path = self.local_clone(analysis_id, meta)
+            permitted = load_project_dictionary(str(clone_path), tuple(parse_permitted_words(meta.get("permitted_words", ""))))
+            entry = check_files([str(clone_path / rel)], permitted, meta["languages"].split(","))[0]
+            entry["file_path"] = meta["clone_path"] + "/" + rel
+
+        pipe = self.r.pipeline(transaction=True)
+        pipe.hsetnx(results_key, rel, json.dumps(entry))
+        pipe.expire(results_key, result_ttl())
+        self._done(STREAM_TASKS, msg_id, pipe)
+        pipe.execute()
+        self.maybe_finalize(analysis_id)
+
+    def local_clone(self, analysis_id: str, meta: Dict[str, str]) -> Path:
+        """
+        Clone dell'analisi su questo nodo. Con TEMP_PATH condiviso (stesso volume) è quello del
+        coordinatore; su un altro nodo viene creato una volta sola, al commit registrato nel job.
+        """
+        if (Path(meta["clone_path"]) / ".git").exists():
+            return Path(meta["clone_path"])
+
+        clone_root = Path(self.temp_path) / "queue" / analysis_id
+        clone_path = local_clone_path(meta["repo_url"], str(clone_root))
+        if (clone_path / ".git").exists():
+            return clone_path
+
+        clone_root.mkdir(parents=True, exist_ok=True)
+        with open(clone_root / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not (clone_path / ".git").exists():
+                checkout_repo(meta["repo_url"], str(clone_root))
+                repo = Repo(clone_path)
+                if repo.head.commit.hexsha != meta["commit"]:
+                    repo.git.fetch("--depth", "1", "origin", meta["commit"])
+                    repo.git.checkout(meta["commit"])
+        self._local_clones[analysis_id] = clone_root
+        return clone_path
+
+    def cleanup_clones(self):
+        """Rimuove i clone locali delle analisi ormai concluse."""
+        for analysis_id, clone_root in list(self._local_clones.items()):
+            if self.r.hget(key(analysis_id, "meta"), "status") in (None, "completed", "failed"):
+                shutil.rmtree(clone_root, ignore_errors=True)
+                del self._local_clones[analysis_id]
+
+    # ── Aggregazione ───────────────────────────────────────────────────────
+
+    def maybe_finalize(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Se tutti i file hanno un risultato, un solo worker (SET NX) costruisce il payload e invia il webhook."""
+        meta = self.r.hgetall(key(analysis_id, "meta"))
+        if not meta or self.r.hlen(key(analysis_id, "results")) < int(meta["total"]):
+            return None
+        if not self.r.set(key(analysis_id, "finalized"), self.name, nx=True, ex=result_ttl()):
+            return None
+
+        results = self.r.hgetall(key(analysis_id, "results"))
+        spelling_analysis = [json.loads(results[rel]) for rel in json.loads(meta["files"])]
+        if SUGGESTIONS_ENABLED:
+            add_suggestions(spelling_analysis, meta["languages"].split(","))
+        summary = build_summary(spelling_analysis)
+
+        text = None
+        if os.getenv("AGENT_MODEL_ID") and os.getenv("PIPELINE_MODEL_SUMMARY", "true").lower() != "false":
+            try:
+                text = summarize_with_model(spelling_analysis, summary)
+            except Exception as e:
+                print(f"[Warning] Model summary failed, using default text: {e}", file=sys.stderr)
+
+        started_at = float(meta["started_at"])
+        payload = {
+            "analysis_id": analysis_id,
+            "analysisId": analysis_id,
+            "status": "completed",
+            "spelling_analysis": spelling_analysis,
+            "summary": summary,
+            "report": build_report(spelling_analysis, summary, text),
+            "execution_metrics": {
+                "total_time_seconds": round(time.time() - started_at, 2),
+                "mode": "queue",
+                "started_at": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started_at)),
+                "completed_at": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(time.time())),
+            },
+        }
+        self._deliver(analysis_id, payload, "completed")
+        print(f"[Queue] Analysis {analysis_id} completed: {summary['total_files']} files, "
+              f"{summary['total_errors']} errors", file=sys.stderr)
+        return payload
+
+    def _fail(self, analysis_id: str, error: Exception):
+        started = self.r.hget(key(analysis_id, "meta"), "started_at")
+        elapsed = time.time() - float(started) if started else 0.0
+        self._deliver(analysis_id, orchestrator.failure_payload(analysis_id, error, elapsed), "failed")
+
+    def _deliver(self, analysis_id: str, payload: Dict[str, Any], status: str):
+        self.r.hset(key(analysis_id, "meta"), "status", status)
+        self.r.expire(key(analysis_id, "meta"), result_ttl())
+        self.r.set(key(analysis_id, "payload"), json.dumps(payload), ex=result_ttl())
+        # In caso di errore il payload resta nello spool (oltre che in Redis) e viene reinviato all'avvio
+        orchestrator.send_webhook(payload)
+        self.cleanup_clones()
+
+
+def main():
+    load_dotenv()
+    args = sys.argv[1:]
+
+    if args and args[0] == "enqueue":
+        if len(args) < 3:
+            print("Usage: python3 queueWorker.py enqueue <analysis_id> <repo_url> [permitted_words] [languages]", file=sys.stderr)
+            sys.exit(1)
+        languages = args[4].split(",") if len(args) > 4 else None
+        queued = enqueue_analysis(connect(), args[1], args[2], args[3] if len(args) > 3 else "", languages)
+        print(f"[Queue] Analysis {args[1]} {'enqueued' if queued else 'already enqueued, skipped'}", file=sys.stderr)
+        return
+
+    webhookDelivery.replay_spool()
+    QueueWorker(connect()).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 from tools.spellAgentTools import *
-from strands import Agent, tool
+from strands import Agent
+from tools.lazyTools import agent_tools
 from typing import Dict, Any
 import os
 import json
+from tools import telemetry
+from tools.mockModel import resolve_model
+from tools.agentPool import get_pool, reset_agent
 
 # Definisci i tools direttamente con il decoratore @tool
 
@@ -19,7 +23,11 @@ class SpellAgent:
         """
         inference_profile_id = os.getenv("AGENT_MODEL_ID") 
         # Create the agent with the tools
-        self.agent = Agent(tools=[find_docs_files,  analyze_spelling], model=os.getenv("AGENT_MODEL_ID"))
+        self.agent = Agent(tools=agent_tools(find_docs_files, analyze_spelling, analyze_spelling_batch), model=resolve_model())
+
+    def reset(self):
+        """Dimentica la conversazione precedente: l'oggetto può servire un altro job (vedi agentPool)."""
+        reset_agent(self.agent)
     
     def check_spelling(self, directory: str, permitted: set = None, languages: list = None) -> Dict[str, Any]:
         """
@@ -45,9 +53,10 @@ class SpellAgent:
         prompt = f"""You are a spell-checking agent. Your task is to check spelling in all document files in the directory: {directory}
 
                 Please follow these steps:
-                1. Find all document files in the directory using find_docs_files
-                2. For each file, analyze spelling errors using analyze_spelling with languages={languages_str} and permitted={permitted_str}
-                3. Return the results in a structured JSON format
+                1. Check all document files at once using analyze_spelling_batch with directory="{directory}", languages={languages_str} and permitted={permitted_str}
+                2. Only if you need to re-check single files, use find_docs_files and analyze_spelling
+                3. Reply with ONE short sentence: files checked and files with errors.
+                   DO NOT repeat file paths or misspelled words: the tool results are collected automatically.
 
                 Use the available tools to complete this task."""
 
@@ -55,7 +64,8 @@ class SpellAgent:
             print(f"Invoking Strands Agent for spell checking...", file=os.sys.stderr) # Log to stderr
             
            
-            response = self.agent(prompt)
+            with telemetry.span("spell_agent"):
+                response = self.agent(prompt)
             
             final_message = response.message
 
@@ -86,4 +96,9 @@ class SpellAgent:
                 "message": f"Error during spell checking: {str(e)}",
                 "tool_executions": [],
                 "iterations": 0
-            }
\ No newline at end of file
+            }
+
+
+def acquire_spell_agent():
+    """SpellAgent del pool del processo, per un blocco with: model client e tool restano tra i job."""
+    return get_pool("spell_agent", SpellAgent, SpellAgent.reset).acquire()
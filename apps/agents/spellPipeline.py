@@ -0,0 +1,217 @@
+import os
+import sys
+import time
+import contextvars
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any
+from tools.spellAgentTools import find_docs_files, find_dictionary_files, add_suggestions, SUGGESTIONS_ENABLED
+from tools.spellEngine import SpellEngine
+from tools.orchestratorTools import checkout_repo
+from tools.verdictCache import dictionary_fingerprint
+from tools.projectDictionary import load_project_dictionary
+from tools import incrementalStore
+
+
+# Pipeline deterministica: stessi tool dello SpellAgent, ma il loop sui file
+# gira in Python invece che attraverso i turni di tool-use del modello.
+
+# Con SPELL_PREWARM (default) lo SpellEngine avvia i worker e carica dizionari e indici
+# mentre il clone scarica il repository, invece che dopo
+PREWARM = os.getenv("SPELL_PREWARM", "true").lower() != "false"
+
+
+def parse_permitted_words(permitted_words: str) -> List[str]:
+    """Converte la stringa comma-separated di argv in una lista di parole."""
+    return [w.strip() for w in permitted_words.split(",") if w.strip()]
+
+
+def build_summary(spelling_analysis: List[Dict[str, Any]]) -> Dict[str, int]:
+    return {
+        "total_files": len(spelling_analysis),
+        "total_errors": sum(len(item["misspelled_words"]) for item in spelling_analysis),
+    }
+
+
+def build_report(spelling_analysis: List[Dict[str, Any]], summary: Dict[str, int], text: str = None) -> Dict[str, Any]:
+    """
+    Costruisce l'oggetto "report" senza modello.
+    Lo score segue la stessa regola di AnalysisTransformerService: -2 punti per ogni file con errori.
+    """
+    files_with_errors = sum(1 for item in spelling_analysis if item["misspelled_words"])
+    if text is None:
+        text = (f"Checked {summary['total_files']} document files: "
+                f"{summary['total_errors']} misspelled words found in {files_with_errors} files.")
+    return {
+        "qualityScore": max(0, 100 - files_with_errors * 2),
+        "securityScore": 100,
+        "performanceScore": 100,
+        "summary": text,
+        "criticalIssues": 0,
+    }
+
+
+def _build_summary_agent():
+    from strands import Agent
+    from tools.mockModel import resolve_model
+    return Agent(
+        model=resolve_model(),
+        tools=[],
+        callback_handler=None,
+        system_prompt="You write short, factual summaries of spell-check results. Reply with plain text only.",
+    )
+
+
+def summarize_with_model(spelling_analysis: List[Dict[str, Any]], summary: Dict[str, int]) -> str:
+    """
+    Unica chiamata al modello della pipeline: scrive la prosa di report.summary.
+    Al modello arrivano solo i conteggi e i file peggiori, non l'elenco completo delle parole.
+    """
+    from tools.agentPool import get_pool
+
+    worst = sorted(spelling_analysis, key=lambda item: len(item["misspelled_words"]), reverse=True)[:10]
+    details = "\n".join(
+        f"- {item['file_path']}: {len(item['misspelled_words'])} errors (e.g. {', '.join(item['misspelled_words'][:5])})"
+        for item in worst if item["misspelled_words"]
+    )
+    with get_pool("summary", _build_summary_agent).acquire() as agent:
+        response = agent(
+            f"Summarize in 2-3 sentences this spelling analysis of a documentation repository.\n"
+            f"Files checked: {summary['total_files']}. Total misspelled words: {summary['total_errors']}.\n"
+            f"Files with the most errors:\n{details or '- none'}"
+        )
+    return response.message["content"][0]["text"].strip()
+
+
+def _timed_checkout(repo_url: str, temp_path: str, incremental: bool) -> tuple:
+    started = time.time()
+    return checkout_repo(repo_url, temp_path, reuse=incremental), time.time() - started
+
+
+def run_pipeline(repo_url: str, temp_path: str, permitted: List[str], languages: List[str],
+                 use_model: bool = None, workers: int = None, incremental: bool = None,
+                 engine: SpellEngine = None, prewarm: bool = None, progress=None) -> Dict[str, Any]:
+    """
+    Clone -> find_docs_files -> analyze_spelling su ogni file -> report JSON.
+
+    Args:
+        repo_url: URL del repository da analizzare
+        temp_path: Cartella in cui clonare il repository
+        permitted: Parole da ignorare, oltre a .spelling.txt del repository e ai glossari
+        languages: Codici lingua per i dizionari enchant
+        use_model: Se True usa il modello una sola volta per report.summary.
+                   Default: True se AGENT_MODEL_ID è impostato e PIPELINE_MODEL_SUMMARY != "false"
+        workers: Processi per lo spell-checking (default: SPELL_WORKERS o il numero di CPU)
+        incremental: Riusa il clone e i risultati dell'ultima analisi, ricontrollando solo i file
+                     aggiunti o modificati (default: INCREMENTAL_ANALYSIS=true)
+        engine: SpellEngine già avviato da riusare (es. jobServer); non viene chiuso a fine analisi
+        prewarm: Senza engine, avvia lo SpellEngine in parallelo al clone (default: SPELL_PREWARM)
+        progress: ProgressReporter che riceve le voci per file man mano che vengono controllate
+
+    Returns:
+        Dizionario con spelling_analysis, summary, report e i tempi delle fasi
+    """
+    if use_model is None:
+        use_model = bool(os.getenv("AGENT_MODEL_ID")) and os.getenv("PIPELINE_MODEL_SUMMARY", "true").lower() != "false"
+
+    if incremental is None:
+        incremental = os.getenv("INCREMENTAL_ANALYSIS", "false").lower() == "true"
+
+    if prewarm is None:
+        prewarm = PREWARM
+
+    timings = {}
+
+    # Lo SpellEngine avviato qui (prewarm o dopo il clone) si chiude anche se clone, ricerca dei file,
+    # dizionario di progetto o piano incrementale falliscono
+    with ExitStack() as stack:
+        warmed = None
+        if engine is None and prewarm:
+            # Il clone (I/O e processi git) gira in un thread; il thread principale avvia i worker,
+            # così i dizionari enchant del percorso a un solo worker restano nel thread che li usa
+            warmed = stack.enter_context(SpellEngine(languages, workers))
+            warmed.start()
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                cloning = pool.submit(contextvars.copy_context().run, _timed_checkout, repo_url, temp_path, incremental)
+                warm_start = time.time()
+                warmed.warm()
+                timings["prewarm_seconds"] = round(time.time() - warm_start, 2)
+                clone_stats, clone_seconds = cloning.result()
+        else:
+            clone_stats, clone_seconds = _timed_checkout(repo_url, temp_path, incremental)
+        clone_path = clone_stats["path"]
+        timings["clone_time_seconds"] = round(clone_seconds, 2)
+        timings["clone"] = clone_stats
+
+        stage_start = time.time()
+        found = find_docs_files(str(clone_path))
+        if "error" in found:
+            raise RuntimeError(found["error"])
+        file_paths = found["file_paths"]
+        sizes = dict(zip(file_paths, found["file_sizes"]))
+        timings["discovery"] = {"files": len(file_paths), "total_bytes": found["total_bytes"], **found.get("skipped", {})}
+        permitted = load_project_dictionary(str(clone_path), tuple(permitted))
+        timings["project_dictionary"] = {"words": len(permitted.words), "prefixes": len(permitted.prefixes),
+                                         "patterns": len(permitted.patterns)}
+
+        to_check, reused = file_paths, {}
+        if incremental:
+            store = incrementalStore.IncrementalStore()
+            key = incrementalStore.config_key(
+                languages, permitted.entries(),
+                dictionary_fingerprint([f for lang in languages for f in find_dictionary_files(lang)]),
+            )
+            head = incrementalStore.head_commit(str(clone_path))
+            blobs = incrementalStore.blob_hashes(str(clone_path))
+            state = store.load(repo_url, key)
+            to_check, reused = incrementalStore.plan_incremental(str(clone_path), file_paths, state, blobs, head)
+            timings["incremental"] = {
+                "base_commit": state["last_commit"] if state else None,
+                "head_commit": head,
+                "checked_files": len(to_check),
+                "reused_files": len(reused),
+            }
+
+        on_result = None
+        if progress is not None:
+            progress.expect(len(file_paths))
+            # I file non cambiati (incrementale) sono già pronti: partono subito
+            progress.add([reused[path] for path in file_paths if path in reused])
+            on_result = progress.add
+
+        if engine is None:
+            engine = warmed or stack.enter_context(SpellEngine(languages, workers))
+            checked = {entry["file_path"]: entry for entry in engine.check_files(to_check, permitted, languages, sizes, on_result)}
+            timings["verdict_cache"] = engine.cache_stats
+        else:
+            # Engine condiviso: le statistiche sono cumulative, si riporta la differenza
+            # (approssimata se altri job usano l'engine nello stesso momento)
+            before = dict(engine.cache_stats)
+            checked = {entry["file_path"]: entry for entry in engine.check_files(to_check, permitted, languages, sizes, on_result)}
+            timings["verdict_cache"] = {key: value - before.get(key, 0) for key, value in engine.cache_stats.items()}
+    spelling_analysis = [checked.get(path) or reused[path] for path in file_paths]
+
+    if incremental:
+        store.save(repo_url, key, head, incrementalStore.build_state_files(str(clone_path), spelling_analysis, blobs))
+    if SUGGESTIONS_ENABLED:
+        timings["suggestions"] = add_suggestions(spelling_analysis, languages)
+    summary = build_summary(spelling_analysis)
+    timings["check_time_seconds"] = round(time.time() - stage_start, 2)
+    print(f"[Pipeline] {summary['total_files']} files checked, {summary['total_errors']} errors", file=sys.stderr)
+
+    text = None
+    if use_model:
+        stage_start = time.time()
+        try:
+            text = summarize_with_model(spelling_analysis, summary)
+        except Exception as e:
+            print(f"[Warning] Model summary failed, using default text: {e}", file=sys.stderr)
+        timings["summary_time_seconds"] = round(time.time() - stage_start, 2)
+
+    return {
+        "status": "completed",
+        "spelling_analysis": spelling_analysis,
+        "summary": summary,
+        "report": build_report(spelling_analysis, summary, text),
+        "pipeline_metrics": timings,
+    }
@@ -0,0 +1,20 @@
+import os
+import sys
+
+# I moduli degli agent si importano come nei processi (cwd = apps/agents)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_git_repo(path, files):
+    """Repository git locale con i file indicati ({path relativo: contenuto}) in un solo commit."""
+    import subprocess
+    for rel, content in files.items():
+        target = os.path.join(path, rel)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(content)
+    git = ["git", "-C", str(path), "-c", "user.name=test", "-c", "user.email=test@example.com"]
+    subprocess.run(git + ["init", "-q"], check=True)
+    subprocess.run(git + ["add", "-A"], check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "fixture"], check=True)
+    return str(path)
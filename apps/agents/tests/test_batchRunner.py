@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+pytest.importorskip("enchant", exc_type=ImportError)
+
+from conftest import make_git_repo
+
+import orchestrator
+from batchRunner import BatchRunner, load_manifest
+
+
+def test_manifest_defaults_and_generated_ids(tmp_path):
+    manifest = tmp_path / "repos.ndjson"
+    manifest.write_text("# comment\nhttps://example.com/a\n\n"
+                        '{"repo_url": "https://example.com/b", "analysis_id": "b-1", "permitted_words": ["x", "y"]}\n')
+    first, second = load_manifest(str(manifest), ["en_US"], "k8s*", "deterministic")
+
+    assert first["languages"] == ["en_US"] and first["permitted_words"] == "k8s*"
+    # Senza analysis_id: id univoco del batch, niente webhook
+    assert first["analysis_id"].startswith("batch-") and not first["webhook"]
+    assert second["analysis_id"] == "b-1" and second["webhook"] and second["permitted_words"] == "x,y"
+
+
+def test_invalid_manifest_line_is_reported(tmp_path):
+    manifest = tmp_path / "repos.ndjson"
+    manifest.write_text('{"repo_url": \n')
+    with pytest.raises(ValueError, match="repos.ndjson:1"):
+        load_manifest(str(manifest), ["en_US"], "", "deterministic")
+
+
+def test_batch_report_and_webhooks(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROGRESS_ENABLED", "false")
+    delivered = []
+    monkeypatch.setattr(orchestrator, "send_webhook", lambda payload, timeout=None: delivered.append(payload))
+    alpha = make_git_repo(tmp_path / "alpha", {"README.md": "A documnet with a tyypo.\n"})
+    beta = make_git_repo(tmp_path / "beta", {"docs/guide.md": "Everything is fine.\n"})
+    manifest = tmp_path / "repos.ndjson"
+    manifest.write_text("\n".join([
+        alpha,
+        json.dumps({"repo_url": beta, "analysis_id": "beta-1"}),
+        json.dumps({"repo_url": str(tmp_path / "missing"), "analysis_id": "missing-1"}),
+    ]))
+    entries = load_manifest(str(manifest), ["en_US"], "", "deterministic")
+
+    report = tmp_path / "report.ndjson"
+    runner = BatchRunner(str(tmp_path / "work"), str(report), concurrency=2, clone_concurrency=1)
+    try:
+        totals = runner.run(entries)
+    finally:
+        runner.close()
+
+    rows = [json.loads(line) for line in report.read_text().splitlines()]
+    assert rows[-1] == totals and totals["type"] == "batch"
+    assert (totals["repositories"], totals["completed"], totals["failed"]) == (3, 2, 1)
+    by_repo = {row["repo_url"]: row for row in rows[:-1]}
+    assert by_repo[alpha]["webhook"] == "skipped"
+    assert by_repo[alpha]["worst_files"][0]["file_path"] == "README.md"
+    assert by_repo[beta]["status"] == "completed" and by_repo[beta]["total_files"] == 1
+    # Solo le voci con un'analisi nell'API vanno al webhook, anche quelle fallite
+    assert sorted(p["analysis_id"] for p in delivered) == ["beta-1", "missing-1"]
+    assert list((tmp_path / "work").iterdir()) == []
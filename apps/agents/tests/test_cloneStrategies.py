@@ -0,0 +1,126 @@
+import os
+import subprocess
+
+import pytest
+
+from conftest import make_git_repo
+from tools.cloneStrategies import clone_repository, mirror_path, update_repository
+from tools.fileDiscovery import discover_files
+
+FILES = {
+    ".gitignore": "build/\n",
+    ".spelling.json": '{"exclude": ["drafts/"]}',
+    ".spelling.txt": "kubernetes\n",
+    "README.md": "readme",
+    "docs/.gitignore": "private.md\n",
+    "docs/guide.md": "guide",
+    "drafts/d.md": "draft",
+    "src/main.py": "print()",
+}
+# Checkout sparse: documenti e configurazione di progetto, niente sorgenti
+SPARSE_TREE = [".gitignore", ".spelling.json", ".spelling.txt", "README.md", "docs/.gitignore", "docs/guide.md", "drafts/d.md"]
+
+
+@pytest.fixture
+def origin(tmp_path):
+    path = make_git_repo(tmp_path / "origin", FILES)
+    # file:// per un vero clone di rete (--depth e --filter sono ignorati sui path locali)
+    subprocess.run(["git", "-C", path, "config", "uploadpack.allowFilter", "true"], check=True)
+    return "file://" + path
+
+
+def commit(origin, files):
+    """Nuovo commit sul repository di origine ({path relativo: contenuto})."""
+    path = origin[len("file://"):]
+    for rel, content in files.items():
+        target = os.path.join(path, rel)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(content)
+    git = ["git", "-C", path, "-c", "user.name=test", "-c", "user.email=test@example.com"]
+    subprocess.run(git + ["add", "-A"], check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "update"], check=True)
+
+
+def git(clone, *args):
+    return subprocess.run(["git", "-C", str(clone), *args], check=True, capture_output=True, text=True).stdout
+
+
+def tree(root):
+    found = []
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d != ".git"]
+        found += [os.path.relpath(os.path.join(directory, name), root) for name in files]
+    return sorted(found)
+
+
+@pytest.mark.parametrize("strategy", ["partial", "mirror"])
+def test_sparse_checkout_keeps_project_configuration(tmp_path, origin, monkeypatch, strategy):
+    monkeypatch.setenv("TEMP_PATH", str(tmp_path / "temp"))
+    clone = tmp_path / "clone"
+    clone_repository(origin, clone, strategy)
+    assert tree(clone) == SPARSE_TREE
+
+    for source in ("walk", "index"):
+        result = discover_files(str(clone), source=source)
+        assert result["source"] == source
+        assert [os.path.relpath(path, clone) for path, _ in result["files"]] == ["README.md", "docs/guide.md"]
+
+
+@pytest.mark.parametrize("strategy, commits, files", [
+    ("full", 2, sorted(FILES)),
+    ("shallow", 1, sorted(FILES)),
+    ("partial", 1, SPARSE_TREE),
+    ("mirror", 2, SPARSE_TREE),
+])
+def test_clone_history_and_tree(tmp_path, origin, monkeypatch, strategy, commits, files):
+    monkeypatch.setenv("TEMP_PATH", str(tmp_path / "temp"))
+    commit(origin, {"README.md": "readme v2"})
+    clone = tmp_path / "clone"
+    stats = clone_repository(origin, clone, strategy)
+    assert stats["strategy"] == strategy and stats["path"] == str(clone) and stats["disk_bytes"] > 0
+    assert int(git(clone, "rev-list", "--count", "HEAD")) == commits
+    assert tree(clone) == files
+    assert (clone / "README.md").read_text() == "readme v2"
+
+
+def test_partial_clone_skips_blobs_outside_the_checkout(tmp_path, origin):
+    clone = tmp_path / "clone"
+    clone_repository(origin, clone, "partial")
+    missing = [line[1:] for line in git(clone, "rev-list", "--objects", "--missing=print", "HEAD").split() if line.startswith("?")]
+    assert missing == [git(clone, "rev-parse", "HEAD:src/main.py").strip()]
+
+
+def test_mirror_is_shared_and_reused(tmp_path, origin, monkeypatch):
+    monkeypatch.setenv("TEMP_PATH", str(tmp_path / "temp"))
+    first = clone_repository(origin, tmp_path / "first", "mirror")
+    mirror = mirror_path(origin)
+    assert mirror.is_dir() and first["mirror_bytes"] > 0
+    alternates = (tmp_path / "first" / ".git" / "objects" / "info" / "alternates").read_text()
+    assert os.path.realpath(alternates.strip()) == os.path.realpath(mirror / "objects")
+
+    # Il secondo clone aggiorna lo stesso mirror con fetch e vede il nuovo commit
+    commit(origin, {"docs/new.md": "new"})
+    clone_repository(origin, tmp_path / "second", "mirror")
+    assert sorted(os.listdir(mirror.parent)) == [mirror.name, mirror.name + ".lock"]
+    assert "docs/new.md" in tree(tmp_path / "second")
+
+
+@pytest.mark.parametrize("strategy", ["full", "shallow", "partial", "mirror"])
+def test_update_repository(tmp_path, origin, monkeypatch, strategy):
+    monkeypatch.setenv("TEMP_PATH", str(tmp_path / "temp"))
+    clone = tmp_path / "clone"
+    clone_repository(origin, clone, strategy)
+    commit(origin, {"README.md": "readme v2", "docs/new.md": "new", "src/extra.py": "pass"})
+
+    stats = update_repository(origin, clone, strategy)
+    assert stats["strategy"] == strategy
+    assert (clone / "README.md").read_text() == "readme v2"
+    assert (clone / "docs/new.md").read_text() == "new"
+    assert (clone / "src/extra.py").exists() == (strategy in ("full", "shallow"))
+    assert git(clone, "rev-parse", "HEAD") == git(origin[len("file://"):], "rev-parse", "HEAD")
+
+
+def test_unknown_strategy(tmp_path, origin):
+    with pytest.raises(ValueError):
+        clone_repository(origin, tmp_path / "clone", "sparse")
@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from conftest import make_git_repo
+from tools.fileDiscovery import discover_files, is_ignored, parse_rules
+
+
+def write(root, files):
+    for rel, content in files.items():
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        mode = "wb" if isinstance(content, bytes) else "w"
+        with open(path, mode) as f:
+            f.write(content)
+    return str(root)
+
+
+def relative(result, root):
+    return [os.path.relpath(path, root).replace(os.sep, "/") for path, _ in result["files"]]
+
+
+@pytest.mark.parametrize("rules, rel, is_dir, expected", [
+    (["*.md"], "docs/a.md", False, True),
+    (["/a.md"], "docs/a.md", False, False),
+    (["/a.md"], "a.md", False, True),
+    (["build/"], "build", False, False),
+    (["build/"], "src/build", True, True),
+    (["docs/**/draft.md"], "docs/x/y/draft.md", False, True),
+    (["*.md", "!keep.md"], "keep.md", False, False),
+    (["# comment", "\\#hash.md"], "#hash.md", False, True),
+    (["draft?.md"], "draft1.md", False, True),
+    (["[ab].md"], "c.md", False, False),
+])
+def test_gitignore_rules(rules, rel, is_dir, expected):
+    assert is_ignored(parse_rules(rules), rel, is_dir) is expected
+
+
+def test_walk_respects_nested_gitignore_and_skip_dirs(tmp_path):
+    root = write(tmp_path, {
+        ".gitignore": "build/\n*.tmp.md\n",
+        "README.md": "readme",
+        "notes.tmp.md": "ignored",
+        "build/out.md": "ignored",
+        "docs/.gitignore": "private.md\n",
+        "docs/guide.md": "guide",
+        "docs/private.md": "ignored",
+        "node_modules/pkg/README.md": "skipped",
+        "src/main.py": "not a document",
+    })
+    result = discover_files(root, source="walk")
+    assert result["source"] == "walk"
+    assert relative(result, root) == ["README.md", "docs/guide.md"]
+    assert result["skipped"] == {"ignored": 3}
+
+
+def test_project_config_include_exclude_and_size(tmp_path):
+    root = write(tmp_path, {
+        ".spelling.json": '{"include": ["docs/"], "exclude": ["docs/old/"], "max_file_size": 10}',
+        ".spelling.txt": "words",
+        "README.md": "outside include",
+        "docs/a.md": "short",
+        "docs/big.md": "x" * 11,
+        "docs/old/b.md": "excluded",
+        "docs/bin.txt": b"\0binary",
+    })
+    result = discover_files(root, source="walk")
+    assert relative(result, root) == ["docs/a.md"]
+    assert result["skipped"] == {"excluded": 2, "too_large": 1, "binary": 1}
+
+
+def test_arguments_add_to_project_config(tmp_path):
+    root = write(tmp_path, {
+        ".spelling.json": '{"exclude": ["a.md"]}',
+        "a.md": "a", "b.md": "b", "c.md": "c",
+    })
+    assert relative(discover_files(root, exclude=["b.md"], source="walk"), root) == ["c.md"]
+
+
+def test_index_lists_tracked_files_only(tmp_path):
+    root = make_git_repo(tmp_path, {
+        ".gitignore": "ignored.md\n",
+        "README.md": "readme",
+        "docs/guide.md": "guide",
+        "node_modules/x.md": "skipped",
+    })
+    write(tmp_path, {"untracked.md": "new", "ignored.md": "ignored"})
+    result = discover_files(root, source="auto")
+    assert result["source"] == "index"
+    assert relative(result, root) == ["README.md", "docs/guide.md"]
+
+
+def test_index_falls_back_to_walk_outside_git(tmp_path):
+    root = write(tmp_path, {"a.md": "a"})
+    result = discover_files(root, source="index")
+    assert result["source"] == "walk"
+    assert relative(result, root) == ["a.md"]
+
+
+@pytest.mark.parametrize("pattern", ["docs", "docs/", "/docs", "docs/**"])
+def test_include_matches_parent_directories(tmp_path, pattern):
+    root = write(tmp_path, {
+        "README.md": "outside",
+        "docs/a.md": "a",
+        "docs/deep/b.md": "b",
+        "src/docs.md": "not a directory",
+    })
+    expected = ["docs/a.md", "docs/deep/b.md"]
+    assert relative(discover_files(root, include=[pattern], source="walk"), root) == expected
@@ -0,0 +1,110 @@
+import os
+import subprocess
+
+import pytest
+
+pytest.importorskip("git", exc_type=ImportError)
+
+from conftest import make_git_repo
+from tools.incrementalStore import (
+    IncrementalStore, blob_hashes, build_state_files, config_key, head_commit, plan_incremental,
+)
+
+FILES = {
+    "README.md": "Readme\n",
+    "docs/guide.md": "Guide\n",
+    "docs/old.md": "Old name\n",
+    "docs/gone.md": "Deleted\n",
+}
+
+
+def commit(repo, *args):
+    git = ["git", "-C", repo, "-c", "user.name=test", "-c", "user.email=test@example.com"]
+    if args:
+        subprocess.run(git + list(args), check=True)
+    subprocess.run(git + ["commit", "-q", "-am", "change"], check=True)
+
+
+def docs(repo):
+    return sorted(os.path.join(root, name) for root, _, names in os.walk(repo)
+                  if ".git" not in root for name in names if name.endswith(".md"))
+
+
+def analyze(repo, paths, blobs):
+    """Risultati fittizi di analyze_spelling e lo stato salvato dopo l'analisi."""
+    analysis = [{"file_path": path, "errors": [], "words_checked": 1} for path in paths]
+    return {"last_commit": head_commit(repo), "files": build_state_files(repo, analysis, blobs)}
+
+
+def relative(paths, repo):
+    return sorted(os.path.relpath(path, repo) for path in paths)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    return make_git_repo(tmp_path / "repo", FILES)
+
+
+def test_first_run_checks_everything(repo):
+    to_check, reused = plan_incremental(repo, docs(repo), None, blob_hashes(repo), head_commit(repo))
+    assert relative(to_check, repo) == sorted(FILES) and reused == {}
+
+
+def test_same_commit_reuses_everything(repo):
+    blobs = blob_hashes(repo)
+    state = analyze(repo, docs(repo), blobs)
+    to_check, reused = plan_incremental(repo, docs(repo), state, blobs, head_commit(repo))
+    assert to_check == [] and relative(reused, repo) == sorted(FILES)
+    assert all("blob" not in entry and entry["file_path"] == path for path, entry in reused.items())
+
+
+def test_modified_renamed_and_deleted_files(repo):
+    state = analyze(repo, docs(repo), blob_hashes(repo))
+    with open(os.path.join(repo, "docs/guide.md"), "a", encoding="utf-8") as f:
+        f.write("More text\n")
+    subprocess.run(["git", "-C", repo, "mv", "docs/old.md", "docs/new.md"], check=True)
+    subprocess.run(["git", "-C", repo, "rm", "-q", "docs/gone.md"], check=True)
+    commit(repo)
+
+    to_check, reused = plan_incremental(repo, docs(repo), state, blob_hashes(repo), head_commit(repo))
+    assert relative(to_check, repo) == ["docs/guide.md", "docs/new.md"]
+    assert relative(reused, repo) == ["README.md"]
+
+    # Lo stato successivo non conserva i file eliminati né il vecchio nome
+    analysis = [*reused.values(), *({"file_path": path, "errors": []} for path in to_check)]
+    files = build_state_files(repo, analysis, blob_hashes(repo))
+    assert sorted(files) == ["README.md", "docs/guide.md", "docs/new.md"]
+
+
+def test_unreachable_base_commit_falls_back_to_blobs(repo):
+    state = {**analyze(repo, docs(repo), blob_hashes(repo)), "last_commit": "0" * 40}
+    with open(os.path.join(repo, "README.md"), "w", encoding="utf-8") as f:
+        f.write("Changed\n")
+    commit(repo)
+    to_check, reused = plan_incremental(repo, docs(repo), state, blob_hashes(repo), head_commit(repo))
+    assert relative(to_check, repo) == ["README.md"]
+    assert relative(reused, repo) == ["docs/gone.md", "docs/guide.md", "docs/old.md"]
+
+
+def test_untracked_and_failed_files_are_rechecked(repo):
+    blobs = blob_hashes(repo)
+    state = analyze(repo, docs(repo), blobs)
+    state["files"]["docs/guide.md"]["error"] = "boom"
+    with open(os.path.join(repo, "docs/untracked.md"), "w", encoding="utf-8") as f:
+        f.write("New\n")
+    to_check, _ = plan_incremental(repo, docs(repo), state, blobs, head_commit(repo))
+    assert relative(to_check, repo) == ["docs/guide.md", "docs/untracked.md"]
+
+
+def test_store_round_trip_and_config_key(tmp_path):
+    store = IncrementalStore(str(tmp_path / "store"))
+    key = config_key(["en_US"], ["Foo"], "abc")
+    assert key == config_key(["en_US"], ["foo"], "abc")
+    assert key != config_key(["en_US", "it_IT"], ["foo"], "abc")
+    assert store.load("https://example.com/r.git", key) is None
+
+    store.save("https://example.com/r.git", key, "c0ffee", {"README.md": {"blob": "b1"}})
+    state = store.load("https://example.com/r.git", key)
+    assert state["last_commit"] == "c0ffee" and state["files"] == {"README.md": {"blob": "b1"}}
+    assert store.load("https://example.com/r.git", config_key(["it_IT"], [], "abc")) is None
+    assert store.load("https://example.com/other.git", key) is None
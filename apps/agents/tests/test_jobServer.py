@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("enchant", exc_type=ImportError)
+
+from conftest import make_git_repo
+
+import jobServer
+import orchestrator
+from jobServer import JobServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = JobServer(concurrency=2, temp_path=str(tmp_path / "work"), mode="deterministic")
+    yield server
+    server.close()
+
+
+def finished(server, job_id, analysis_id):
+    server.jobs[job_id] = {"job_id": job_id, "analysis_id": analysis_id, "status": "completed"}
+    server._by_analysis[analysis_id] = job_id
+    server._finish(server.jobs[job_id])
+
+
+def test_finished_jobs_beyond_history_size_are_evicted(server, monkeypatch):
+    monkeypatch.setattr(jobServer, "JOB_HISTORY_SIZE", 2)
+    for n in range(4):
+        finished(server, f"j{n}", f"a{n}")
+    assert sorted(server.jobs) == ["j2", "j3"]
+    assert sorted(server._by_analysis) == ["a2", "a3"]
+
+
+def test_expired_jobs_are_evicted(server, monkeypatch):
+    monkeypatch.setattr(jobServer, "JOB_HISTORY_TTL_S", 10)
+    finished(server, "old", "a")
+    server._finished["old"] -= 60
+    finished(server, "new", "b")
+    assert list(server.jobs) == ["new"] and list(server._by_analysis) == ["b"]
+
+
+def test_incremental_jobs_release_their_path_lock(server, tmp_path, monkeypatch):
+    monkeypatch.setenv("PROGRESS_ENABLED", "false")
+    delivered = []
+    monkeypatch.setattr(orchestrator, "send_webhook", lambda payload, timeout=None: delivered.append(payload))
+    repo = make_git_repo(tmp_path / "repo", {"README.md": "A documnet.\n"})
+
+    async def run():
+        for n in range(2):
+            status, _ = server.submit({"analysis_id": f"inc-{n}", "repo_url": repo, "languages": "en_US",
+                                       "incremental": True})
+            assert status == 202
+        await asyncio.gather(*server.tasks)
+
+    asyncio.run(run())
+    assert sorted(p["analysis_id"] for p in delivered) == ["inc-0", "inc-1"]
+    assert server.health()["completed"] == 2
+    assert server.runner._path_locks == {} and server.runner._path_users == {}
@@ -0,0 +1,94 @@
+import json
+import random
+import time
+
+import pytest
+
+from tools.jsonScanner import extract_json, iter_json_objects
+
+
+def test_extracts_json_block_after_free_text_braces():
+    text = 'I will check {the files} now.\n```json\n{"status": "completed", "report": {"summary": "a {b}"}}\n```'
+    assert extract_json(text) == {"status": "completed", "report": {"summary": "a {b}"}}
+
+
+def test_prefers_objects_outside_thinking():
+    text = '<thinking>{"draft": true, "notes": "much longer than the answer"}</thinking> {"final": 1}'
+    assert extract_json(text) == {"final": 1}
+
+
+def test_finds_objects_inside_invalid_candidate():
+    text = '{"a": {"b": 1} oops, "c": {"d": 22}}'
+    assert [obj for _, _, obj in iter_json_objects(text)] == [{"b": 1}, {"d": 22}]
+
+
+def test_unterminated_quote_is_free_text():
+    assert extract_json('bad { x "unterminated\n {"ok": [1, "}"]}') == {"ok": [1, "}"]}
+
+
+@pytest.mark.parametrize("text", [
+    'Result {x "y} {"status": "completed"}',
+    'Note: use {"braces} carefully. {"status": "completed"}',
+    'He said "hi {" and then {"status": "completed"}',
+    '{"a": "{\n"status": "completed"}',
+])
+def test_quotes_in_free_text_do_not_hide_objects(text):
+    assert extract_json(text) == {"status": "completed"}
+
+
+def longest_raw_decode(text):
+    """Riferimento: l'oggetto più lungo che raw_decode trova partendo da una qualsiasi '{'."""
+    decoder, best = json.JSONDecoder(), None
+    for i, ch in enumerate(text):
+        if ch == "{":
+            try:
+                obj, end = decoder.raw_decode(text, i)
+            except ValueError:
+                continue
+            if isinstance(obj, dict) and (best is None or end - i > best[0]):
+                best = (end - i, obj)
+    return None if best is None else best[1]
+
+
+def test_matches_brute_force_reference():
+    pieces = ['{', '}', '"', '"a"', ':', ',', '1', ' ', 'x', '\n', '\\', '[', ']', '{"s": 1}',
+              '{"k": "v"}', '"{"', '"}"', '{"n": {"m": [1, {"o": null}]}}', '\\"', '{}', ' "x} {"']
+    rng = random.Random(0)
+    for _ in range(20000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 20)))
+        try:
+            found = extract_json(text)
+        except ValueError:
+            found = None
+        assert found == longest_raw_decode(text), text
+
+
+def test_no_json_raises_value_error():
+    with pytest.raises(ValueError):
+        extract_json("no json {here")
+
+
+@pytest.mark.parametrize("text", [
+    "{" * 100000,
+    '{"' * 50000,
+    'x"{"' * 25000,
+    '{"a": 1, ' * 10000,
+], ids=["braces", "keys", "quotes", "failures"])
+def test_invalid_candidates_are_linear(text):
+    start = time.perf_counter()
+    assert list(iter_json_objects(text)) == []
+    assert time.perf_counter() - start < 1.0
+
+
+@pytest.mark.parametrize("text", [
+    "{" * 3000 + "}" * 3000,
+    '{"a":' * 3000 + "1" + "}" * 3000,
+    '{"a":' + "[" * 5000 + "]" * 5000 + "}",
+], ids=["braces", "objects", "arrays"])
+def test_deep_nesting_does_not_raise(text):
+    assert all(isinstance(obj, dict) for _, _, obj in iter_json_objects(text))
+    # merge_agent_output gestisce solo ValueError: nessuna RecursionError deve uscire
+    try:
+        extract_json(text)
+    except ValueError:
+        pass
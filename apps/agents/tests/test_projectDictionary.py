@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from tools.projectDictionary import ProjectDictionary, dictionary_for, use_permitted_words
+
+
+def test_words_prefixes_and_patterns():
+    dictionary = ProjectDictionary(["Kubernetes", "k8s*", "/v\\d+/", "# comment", ""])
+    assert "kubernetes" in dictionary
+    assert "k8sctl" in dictionary
+    assert "v12" in dictionary
+    assert "v" not in dictionary
+    assert len(dictionary) == 3
+
+
+@pytest.mark.parametrize("entry", [
+    "/(?i)abc/",
+    "/(unclosed/",
+    "/(a+)+$/",
+    "/((ab)*c)+/",
+    "/(a)\\1/",
+    "/" + "a" * 101 + "/",
+])
+def test_rejected_patterns_do_not_break_the_dictionary(entry):
+    dictionary = ProjectDictionary([entry, "/v\\d+/", "word"])
+    assert dictionary.patterns == ("v\\d+",)
+    assert "v2" in dictionary and "word" in dictionary
+
+
+def test_patterns_that_cannot_be_combined_are_dropped():
+    dictionary = ProjectDictionary(["/(?P<n>a)b/", "/(?P<n>c)d/"])
+    assert "ab" in dictionary
+    assert "cd" not in dictionary
+
+
+def test_permitted_words_are_per_analysis_on_a_shared_root(tmp_path):
+    (tmp_path / ".git").mkdir()
+    path = str(tmp_path / "README.md")
+    ready = threading.Barrier(2)
+    first_done = threading.Event()
+    seen = {}
+
+    def analysis(name, words, wait):
+        with use_permitted_words(str(tmp_path), words):
+            ready.wait()
+            if wait:
+                first_done.wait(5)
+            seen[name] = dictionary_for(path)
+        if not wait:
+            first_done.set()
+
+    threads = [threading.Thread(target=analysis, args=("a", ["alpha"], False)),
+               threading.Thread(target=analysis, args=("b", ["beta"], True))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert "alpha" in seen["a"] and "beta" not in seen["a"]
+    # La prima analisi, finendo, non rimuove le parole della seconda
+    assert "beta" in seen["b"] and "alpha" not in seen["b"]
+    assert "beta" not in dictionary_for(path)
@@ -0,0 +1,97 @@
+import pytest
+
+pytest.importorskip("enchant", exc_type=ImportError)
+fakeredis = pytest.importorskip("fakeredis")
+
+from conftest import make_git_repo
+
+import orchestrator
+import queueWorker
+from queueWorker import QueueWorker, STREAM_JOBS, STREAM_TASKS, enqueue_analysis
+
+
+@pytest.fixture
+def delivered(monkeypatch):
+    payloads = []
+    monkeypatch.setattr(orchestrator, "send_webhook", lambda payload, timeout=None: payloads.append(payload))
+    return payloads
+
+
+def drain(worker):
+    for _ in range(100):
+        if not worker.run_once(block_ms=1):
+            return
+    raise AssertionError("queue not drained")
+
+
+def test_analysis_is_completed_and_streams_are_emptied(tmp_path, delivered, monkeypatch):
+    monkeypatch.delenv("AGENT_MODEL_ID", raising=False)
+    repo = make_git_repo(tmp_path / "repo", {
+        "README.md": "# Title\n\nThis documnet has a tyypo.\n",
+        "docs/guide.txt": "Everything is fine here.\n",
+        "src/main.py": "print('not a document')\n",
+    })
+    r = fakeredis.FakeRedis(decode_responses=True)
+    worker = QueueWorker(r, name="w1", temp_path=str(tmp_path / "work"))
+
+    assert enqueue_analysis(r, "q1", repo, languages=["en_US"])
+    assert not enqueue_analysis(r, "q1", repo, languages=["en_US"])
+    drain(worker)
+
+    assert len(delivered) == 1
+    payload = delivered[0]
+    assert payload["analysis_id"] == "q1" and payload["status"] == "completed"
+    assert payload["summary"]["total_files"] == 2
+    # Messaggi confermati e cancellati: gli stream non crescono a ogni analisi
+    assert r.xlen(STREAM_JOBS) == 0 and r.xlen(STREAM_TASKS) == 0
+    assert r.hget(queueWorker.key("q1", "meta"), "status") == "completed"
+
+
+def run_until(worker, done, limit=50):
+    calls = iter(range(limit))
+    worker.run(stop=lambda: done() or next(calls, None) is None)
+    assert done(), "worker stopped before the expected result"
+
+
+def test_failed_job_is_reported_after_max_attempts(tmp_path, delivered, monkeypatch):
+    monkeypatch.setenv("QUEUE_VISIBILITY_TIMEOUT", "0")
+    monkeypatch.setenv("QUEUE_MAX_ATTEMPTS", "2")
+    r = fakeredis.FakeRedis(decode_responses=True)
+    worker = QueueWorker(r, name="w1", temp_path=str(tmp_path / "work"))
+
+    enqueue_analysis(r, "q2", str(tmp_path / "missing-repo"), languages=["en_US"])
+    run_until(worker, lambda: bool(delivered))
+
+    assert len(delivered) == 1
+    assert delivered[0]["analysis_id"] == "q2" and delivered[0]["error"]
+    assert r.hget(queueWorker.key("q2", "attempts"), "__job__") == "2"
+    assert r.hget(queueWorker.key("q2", "meta"), "status") == "failed"
+    assert r.xlen(STREAM_JOBS) == 0
+
+
+def test_task_errors_keep_the_worker_alive_and_give_up(tmp_path, delivered, monkeypatch):
+    monkeypatch.delenv("AGENT_MODEL_ID", raising=False)
+    monkeypatch.setenv("QUEUE_VISIBILITY_TIMEOUT", "0")
+    repo = make_git_repo(tmp_path / "repo", {"README.md": "Fine.\n", "docs/bad.md": "Broken.\n"})
+    r = fakeredis.FakeRedis(decode_responses=True)
+    worker = QueueWorker(r, name="w1", temp_path=str(tmp_path / "work"))
+
+    real, failures = queueWorker.check_files, []
+
+    def flaky(paths, *args, **kwargs):
+        # Un errore inatteso (non di Redis) su un solo file, a ogni tentativo
+        if paths[0].endswith("bad.md"):
+            failures.append(paths[0])
+            raise RuntimeError("dictionary unavailable")
+        return real(paths, *args, **kwargs)
+
+    monkeypatch.setattr(queueWorker, "check_files", flaky)
+    enqueue_analysis(r, "q3", repo, languages=["en_US"])
+    run_until(worker, lambda: bool(delivered))
+
+    assert len(failures) == worker.max_attempts
+    entries = {e["file_path"].rsplit("/", 1)[-1]: e for e in delivered[0]["spelling_analysis"]}
+    assert entries["bad.md"]["error"] == f"Gave up after {worker.max_attempts} attempts"
+    assert "error" not in entries["README.md"]
+    assert delivered[0]["status"] == "completed"
+    assert r.xlen(STREAM_TASKS) == 0
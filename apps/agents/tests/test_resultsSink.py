@@ -0,0 +1,83 @@
+import threading
+from contextvars import copy_context
+
+from tools.resultsSink import capture_results, record_result, sink_for
+
+
+def entry(path, *words):
+    return {"file_path": str(path), "misspelled_words": list(words)}
+
+
+def test_records_only_files_under_the_root(tmp_path):
+    with capture_results(str(tmp_path / "repo")) as sink:
+        record_result(entry(tmp_path / "repo" / "a.md", "documnet"))
+        record_result(entry(tmp_path / "other" / "b.md", "wrod"))
+        record_result(entry(tmp_path / "repo" / "a.md"))
+    assert sink.entries() == [entry(tmp_path / "repo" / "a.md")]
+    assert sink_for(str(tmp_path / "repo" / "a.md")) is None
+
+
+def test_two_analyses_on_the_same_root_stay_separate(tmp_path):
+    # Come due analisi agent del jobServer sulla stessa temp_path: ogni thread ha il suo contesto
+    root = str(tmp_path)
+    ready = threading.Barrier(2)
+    sinks = {}
+
+    def analysis(name):
+        with capture_results(root) as sink:
+            ready.wait()
+            # Il thread di un tool eredita il contesto dell'analisi
+            tool = threading.Thread(target=copy_context().run,
+                                    args=(record_result, entry(tmp_path / f"{name}.md", name)))
+            tool.start()
+            tool.join()
+            ready.wait()
+            sinks[name] = sink
+
+    threads = [threading.Thread(target=analysis, args=(name,)) for name in ("first", "second")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sinks["first"].entries() == [entry(tmp_path / "first.md", "first")]
+    assert sinks["second"].entries() == [entry(tmp_path / "second.md", "second")]
+
+
+def test_without_context_shared_roots_are_ambiguous(tmp_path):
+    root = str(tmp_path)
+    ready, done = threading.Event(), threading.Event()
+
+    def analysis():
+        with capture_results(root):
+            ready.set()
+            done.wait()
+
+    thread = threading.Thread(target=analysis)
+    thread.start()
+    ready.wait()
+    try:
+        # Un solo sink sulla root: trovato anche senza contesto
+        assert sink_for(str(tmp_path / "a.md")) is not None
+        with capture_results(root):
+            other = threading.Thread(target=lambda: results.append(sink_for(str(tmp_path / "a.md"))))
+            results = []
+            other.start()
+            other.join()
+            assert results == [None]
+    finally:
+        done.set()
+        thread.join()
+
+
+def test_digest_counts_and_worst_files(tmp_path):
+    with capture_results(str(tmp_path)) as sink:
+        record_result(entry(tmp_path / "a.md", "x"))
+        record_result(entry(tmp_path / "b.md", "x", "y", "z"))
+        record_result(entry(tmp_path / "c.md"))
+    assert sink.digest(max_files=1) == {
+        "files_checked": 3,
+        "files_with_errors": 2,
+        "total_errors": 4,
+        "worst_files": [{"file_path": str(tmp_path / "b.md"), "errors": 3}],
+    }
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+pytest.importorskip("enchant", exc_type=ImportError)
+
+from tools.spellAgentTools import analyze_spelling_batch
+
+
+@pytest.fixture
+def docs(tmp_path):
+    for rel in ("README.md", "docs/guide.md", "drafts/d.md", "drafts/old/e.md"):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("A documnet.\n")
+    return tmp_path
+
+
+def checked(result, root):
+    assert "error" not in result
+    return sorted(os.path.relpath(entry["file_path"], root) for entry in result["results"])
+
+
+@pytest.mark.parametrize("include, exclude, expected", [
+    (None, ["drafts/"], ["README.md", "docs/guide.md"]),
+    (None, ["drafts"], ["README.md", "docs/guide.md"]),
+    (["docs"], None, ["docs/guide.md"]),
+    (["/drafts/"], ["old/"], ["drafts/d.md"]),
+    (["*.md"], ["README.md"], ["docs/guide.md", "drafts/d.md", "drafts/old/e.md"]),
+])
+def test_patterns_follow_find_docs_files(docs, include, exclude, expected):
+    directory = analyze_spelling_batch(directory=str(docs), include=include, exclude=exclude, languages=["en_US"])
+    assert checked(directory, docs) == expected
+
+    paths = [str(docs / rel) for rel in ("README.md", "docs/guide.md", "drafts/d.md", "drafts/old/e.md")]
+    explicit = analyze_spelling_batch(paths=paths, directory=str(docs), include=include, exclude=exclude, languages=["en_US"])
+    assert checked(explicit, docs) == expected
@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("enchant", exc_type=ImportError)
+
+from conftest import make_git_repo
+
+import spellPipeline
+from spellPipeline import run_pipeline
+
+
+class RecordingEngine(spellPipeline.SpellEngine):
+    """SpellEngine vero che registra le chiusure."""
+
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.closed = False
+        RecordingEngine.instances.append(self)
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    RecordingEngine.instances = []
+    monkeypatch.setattr(spellPipeline, "SpellEngine", RecordingEngine)
+    return RecordingEngine.instances
+
+
+@pytest.fixture
+def repo(tmp_path):
+    return make_git_repo(tmp_path / "repo", {"README.md": "A documnet.\n"})
+
+
+def fail(*args, **kwargs):
+    raise RuntimeError("stage failed")
+
+
+@pytest.mark.parametrize("stage", ["find_docs_files", "load_project_dictionary", "incremental"])
+def test_prewarmed_engine_is_closed_when_a_stage_fails(tmp_path, repo, engines, monkeypatch, stage):
+    if stage == "incremental":
+        monkeypatch.setenv("TEMP_PATH", str(tmp_path / "temp"))
+        monkeypatch.setattr(spellPipeline.incrementalStore, "plan_incremental", fail)
+    else:
+        monkeypatch.setattr(spellPipeline, stage, fail)
+
+    with pytest.raises(RuntimeError, match="stage failed"):
+        run_pipeline(repo, str(tmp_path / "work"), [], ["en_US"], use_model=False, workers=2,
+                     incremental=stage == "incremental", prewarm=True)
+    assert len(engines) == 1 and engines[0].closed
+
+
+@pytest.mark.parametrize("prewarm", [True, False])
+def test_engine_is_closed_after_the_check(tmp_path, repo, engines, prewarm):
+    result = run_pipeline(repo, str(tmp_path / "work"), [], ["en_US"], use_model=False, workers=2, prewarm=prewarm)
+    assert result["summary"]["total_files"] == 1
+    assert len(engines) == 1 and engines[0].closed
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from tools.streamReader import iter_tokens, locate_stream
+from tools.tokenizer import LineIndex, find_ignored_positions, locate_tokens, raw_tokens
+
+# Costrutti che possono restare aperti a cavallo di un blocco: fence ```, code span, link,
+# immagini, commenti e formule TeX, ambienti, parole chiave Typst con il valore sulla riga dopo
+PIECES = {
+    ".md": ["word ", "Tyypo ", "`code span` ", "``", "```\nfenced cde\nmore\n```\n", "```", "`", "\n",
+            "[link](http://exmple.com/a_b) ", "![alt\ntxt](img.png) ", "https://host.tld/x ", "_x_ ", "è "],
+    ".tex": ["word ", "\\section{Intro} ", "\\emph", "{txt} ", "% comment lne\n", "$x+y$ ", "$$ a^2\n $$ ",
+             "$", "$$", "\\begin{equation}E=\nmc^2\\end{equation} ", "\\begin{align}", "\\end{align} ", "\n"],
+    ".typ": ["word ", "size: 12pt ", "margin =\n 2cm ", "fill:", " red ", "Tyypo ", "\n", "align", " = center "],
+    ".txt": ["word ", "Tyypo ", "_x_ ", "42 ", "\n", "ü "],
+}
+CHUNK_SIZES = [1, 3, 7, 64]
+
+
+def documents(ext, count=150, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rng.choice(PIECES[ext]) for _ in range(rng.randint(1, 40)))
+
+
+def write(tmp_path, content, ext):
+    path = tmp_path / f"doc{ext}"
+    path.write_text(content, encoding="utf-8", newline="")
+    return str(path)
+
+
+def full_read_locate(content, ext, permitted):
+    index = LineIndex(content)
+    located = locate_tokens(content, find_ignored_positions(content, ext), permitted)
+    return {word: [count, *index.line_col(offset)] for word, (count, offset) in located.items()}
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("ext", sorted(PIECES))
+def test_chunked_tokens_match_full_read(tmp_path, ext, chunk_size):
+    for content in documents(ext):
+        path = write(tmp_path, content, ext)
+        expected = raw_tokens(content, find_ignored_positions(content, ext))
+        assert list(iter_tokens(path, ext, chunk_size)) == expected, content
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("ext", sorted(PIECES))
+def test_chunked_locate_matches_full_read(tmp_path, ext, chunk_size):
+    for content in documents(ext, seed=1):
+        path = write(tmp_path, content, ext)
+        assert locate_stream(path, ext, {"word"}, chunk_size) == full_read_locate(content, ext, {"word"}), content
+
+
+@pytest.mark.parametrize("content", [
+    "before\n```\nnot chcked\n",                      # fence mai chiusa: resta ignorata fino alla fine
+    "one\n```\nskipp\n```\ntwo ```x``` thre\n",       # chiusura del fence oltre il blocco
+    "a `cde` b ``c`` `unclosed\nnext\n",
+])
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_fence_across_chunk_boundaries(tmp_path, content, chunk_size):
+    path = write(tmp_path, content, ".md")
+    assert list(iter_tokens(path, ".md", chunk_size)) == raw_tokens(content, find_ignored_positions(content, ".md"))
+    assert locate_stream(path, ".md", set(), chunk_size) == full_read_locate(content, ".md", set())
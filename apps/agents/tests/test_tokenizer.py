@@ -0,0 +1,62 @@
+import random
+import re
+from collections import Counter
+
+import pytest
+
+from tools.tokenizer import LineIndex, find_ignored_positions, locate_tokens, tokenize
+
+# Pezzi di documento con i costrutti di ogni estensione (codice, link, comandi, formule, parole chiave)
+PIECES = {
+    ".md": ["word ", "Tyypo ", "_under_ ", "**bold** ", "`code span` ", "```\nfenced cde\n```\n", "```", "`",
+            "[link text](http://exmple.com/pth) ", "![alt txt](img.png) ", "https://host.tld/a_b ", "\n", "12 ",
+            "snake_case ", "è perché ", "a`b`c "],
+    ".tex": ["word ", "\\section{Intro} ", "\\emph{txt} ", "% comment lne\n", "$x+y$ ", "$$ a^2 $$ ", "$",
+             "\\begin{equation}E=mc^2\\end{equation} ", "\\begin{align}", "\\end{align} ", "{", "}", "\n", "Tyypo "],
+    ".typ": ["word ", "size: 12pt ", "margin = 2cm ", "fill: red, ", "#set text(font: \"Linux\") ", "Tyypo ",
+             "width:", "\n", "align", "= center "],
+    ".txt": ["word ", "Tyypo ", "_x_ ", "42 ", "don't ", "\n", "ü ", "*star* "],
+}
+
+
+def original_extract_words(content, ext, permitted):
+    """extract_words e clean_word come erano prima del tokenizer (scansione per ogni parola)."""
+    positions = find_ignored_positions(content, ext)
+    words = []
+    for match in re.finditer(r'\b\w+\b', content):
+        word, pos = match.group(0), match.start()
+        if any(s <= pos < e for s, e in positions) or word.lower() in permitted:
+            continue
+        cleaned = re.sub(r'^`+|`+$', '', re.sub(r'^\*+|\*+$', '', re.sub(r'^_+|_+$', '', word))).lower()
+        if cleaned and cleaned not in permitted and not cleaned.isdigit():
+            words.append(cleaned)
+    return words
+
+
+def documents(ext, count=300, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rng.choice(PIECES[ext]) for _ in range(rng.randint(1, 40)))
+
+
+@pytest.mark.parametrize("ext", sorted(PIECES))
+def test_tokenize_matches_original_extract_words(ext):
+    permitted = {"word", "_under_"}
+    for content in documents(ext):
+        expected = Counter(original_extract_words(content, ext, permitted))
+        assert tokenize(content, find_ignored_positions(content, ext), permitted) == expected, content
+
+
+@pytest.mark.parametrize("ext", sorted(PIECES))
+def test_locate_tokens_counts_and_first_offset(ext):
+    for content in documents(ext, seed=1):
+        positions = find_ignored_positions(content, ext)
+        located = locate_tokens(content, positions, set())
+        assert {word: count for word, (count, _) in located.items()} == tokenize(content, positions, set())
+        for word, (_, offset) in located.items():
+            assert content[offset:offset + len(word)].lower() == word
+
+
+def test_line_index():
+    index = LineIndex("ab\ncd\n\nef")
+    assert [index.line_col(offset) for offset in (0, 1, 3, 6, 7, 8)] == [(1, 1), (1, 2), (2, 1), (3, 1), (4, 1), (4, 2)]
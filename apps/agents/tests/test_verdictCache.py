@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+from tools.verdictCache import SQLiteCache, SuggestionCache, VerdictCache
+
+
+def test_verdicts_survive_a_new_cache_on_the_same_file(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = VerdictCache(path)
+    cache.validate("en_US", lambda: "v1")
+    cache.store("en_US", {"hello": True, "helo": False})
+
+    other = VerdictCache(path)
+    other.validate("en_US", lambda: "v1")
+    assert other.lookup("en_US", ["hello", "helo", "world"]) == {"hello": True, "helo": False}
+    assert other.stats() == {"hits": 0, "disk_hits": 2, "misses": 1}
+
+
+def test_changed_fingerprint_drops_only_that_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    verdicts, suggestions = VerdictCache(path), SuggestionCache(path)
+    verdicts.validate("en_US", lambda: "v1")
+    suggestions.validate("en_US", lambda: "v1")
+    verdicts.store("en_US", {"helo": False})
+    suggestions.store("en_US", {"helo": ["hello", "help"]})
+
+    # Nuove istanze: il controllo del fingerprint non è ancora in _checked
+    verdicts, suggestions = VerdictCache(path), SuggestionCache(path)
+    suggestions.validate("en_US", lambda: "v2")
+    verdicts.validate("en_US", lambda: "v1")
+    assert suggestions.lookup("en_US", ["helo"]) == {}
+    assert verdicts.lookup("en_US", ["helo"]) == {"helo": False}
+
+
+def test_fingerprints_are_kept_in_separate_tables(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    VerdictCache(path).validate("en_US", lambda: "verdicts")
+    SuggestionCache(path).validate("en_US", lambda: "suggestions")
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT langset, fingerprint FROM meta").fetchall() == [("en_US", "verdicts")]
+    assert conn.execute("SELECT langset, fingerprint FROM suggestion_meta").fetchall() == [("en_US", "suggestions")]
+
+
+def test_subclass_without_invalidate_fails_at_construction(tmp_path):
+    class Incomplete(SQLiteCache):
+        SCHEMA = ("CREATE TABLE IF NOT EXISTS things (langset TEXT, word TEXT)",)
+
+    with pytest.raises(TypeError):
+        Incomplete(str(tmp_path / "cache.sqlite3"))
@@ -0,0 +1,77 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tools.webhookDelivery import DeliveryError, WebhookClient
+
+
+class StubApi:
+    """Endpoint HTTP locale: risponde con gli status in coda (poi 201) e registra le richieste."""
+
+    def __init__(self):
+        self.requests = []
+        self.statuses = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                stub.requests.append((self.path, json.loads(body)))
+                self.send_response(stub.statuses.pop(0) if stub.statuses else 201)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def api():
+    stub = StubApi()
+    yield stub
+    stub.server.shutdown()
+
+
+def test_retries_then_delivers_gzip(api, tmp_path):
+    api.statuses = [503, 429]
+    client = WebhookClient(api.url + "/analysis/webhook", spool_dir=str(tmp_path), backoff=0.01, gzip_min_bytes=10)
+    response = client.post({"analysis_id": "a1", "words": ["x"] * 20})
+    assert response.status_code == 201
+    assert [path for path, _ in api.requests] == ["/analysis/webhook"] * 3
+    assert api.requests[-1][1]["analysis_id"] == "a1"
+
+
+def test_client_error_is_not_retried(api, tmp_path):
+    api.statuses = [400]
+    client = WebhookClient(api.url + "/analysis/webhook", spool_dir=str(tmp_path), backoff=0.01)
+    assert client.post({"analysis_id": "a1"}).status_code == 400
+    assert len(api.requests) == 1
+
+
+def test_undelivered_payload_is_spooled_and_replayed_to_its_url(api, tmp_path):
+    down = WebhookClient("http://127.0.0.1:9/analysis/webhook/progress", spool_dir=str(tmp_path), retries=1, backoff=0.01)
+    with pytest.raises(DeliveryError):
+        down.post({"analysis_id": "a1"}, timeout=1)
+    assert down.deliver({"analysis_id": "a1"}, timeout=1) is None
+    assert len(down.pending()) == 1
+
+    # Stesso spool, client di un altro endpoint: il payload torna all'URL con cui era stato inviato
+    with gzip.open(down.pending()[0], "rt") as f:
+        entry = json.load(f)
+    entry["url"] = api.url + "/analysis/webhook/progress"
+    with gzip.open(down.pending()[0], "wt") as f:
+        json.dump(entry, f)
+
+    stats = WebhookClient(api.url + "/analysis/webhook", spool_dir=str(tmp_path)).replay()
+    assert stats == {"sent": 1, "rejected": 0, "remaining": 0}
+    assert api.requests == [("/analysis/webhook/progress", {"analysis_id": "a1"})]
+    assert down.pending() == []
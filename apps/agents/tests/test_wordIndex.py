@@ -0,0 +1,80 @@
+import pytest
+
+from tools.wordIndex import WordIndex, build_index, expand_dictionary
+
+AFF = """SET UTF-8
+FORBIDDENWORD !
+NEEDAFFIX ?
+
+SFX S Y 3
+SFX S y ies [^aeiou]y
+SFX S 0 s [aeiou]y
+SFX S 0 s [^y]
+
+SFX D N 1
+SFX D 0 ed [^e]
+
+PFX U Y 1
+PFX U 0 un .
+
+PFX R N 1
+PFX R 0 re [^r]
+"""
+
+DIC = """9
+city/S
+day/S
+lock/SUD
+run/R
+use/R
+Paris/S
+stem/?S
+badword/!
+cafè
+"""
+
+# Espansione attesa: radici, un suffisso, un prefisso, prefisso + suffisso solo se entrambi cross-product.
+# Esclusi: "Paris" e derivate (maiuscole), "stem" senza affisso (NEEDAFFIX), "badword" (FORBIDDENWORD),
+# "unlocked" (D non è cross-product), "rerun" (la condizione [^r] vale sulla radice)
+EXPANSION = {
+    "city", "cities",
+    "day", "days",
+    "lock", "locks", "locked", "unlock", "unlocks",
+    "run", "use", "reuse",
+    "stems",
+    "cafè",
+}
+NON_WORDS = ["citys", "dayies", "unlocked", "rerun", "reuses", "paris", "stem", "badword", "unday", "lockies", "cafe"]
+
+
+@pytest.fixture
+def dictionary(tmp_path):
+    (tmp_path / "xx.aff").write_text(AFF, encoding="utf-8")
+    (tmp_path / "xx.dic").write_text(DIC, encoding="utf-8")
+    return str(tmp_path / "xx.dic"), str(tmp_path / "xx.aff")
+
+
+def test_expansion(dictionary):
+    assert set(expand_dictionary(*dictionary)) == EXPANSION
+
+
+def test_index_membership(dictionary, tmp_path):
+    path = str(tmp_path / "index" / "xx.idx")
+    assert build_index(expand_dictionary(*dictionary), path) == len(EXPANSION)
+    index = WordIndex(path)
+    assert len(index) == len(EXPANSION)
+    assert all(word in index for word in EXPANSION)
+    assert not any(word in index for word in NON_WORDS)
+
+
+def test_ignore_disables_index(tmp_path):
+    (tmp_path / "xx.aff").write_text("IGNORE '\n", encoding="utf-8")
+    (tmp_path / "xx.dic").write_text("1\nword\n", encoding="utf-8")
+    assert list(expand_dictionary(str(tmp_path / "xx.dic"), str(tmp_path / "xx.aff"))) == []
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "bogus.idx"
+    path.write_bytes(b"NOTANIDX" + bytes(24))
+    with pytest.raises(ValueError):
+        WordIndex(str(path))
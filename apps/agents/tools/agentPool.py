@@ -0,0 +1,145 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List
+from tools import telemetry
+
+# Pool di oggetti agent (orchestrator Agent, SpellAgent) riusati tra chiamate dei tool e tra analisi.
+# Costruire un Agent strands crea client del modello (boto3, pool di connessioni) e registro dei tool:
+# un oggetto del pool li conserva e a ogni rilascio perde solo lo stato della conversazione.
+#   - al massimo AGENT_POOL_SIZE oggetti per pool restano in memoria; oltre (molte analisi in
+#     parallelo) se ne costruiscono di temporanei, scartati dopo l'uso: il pool non mette in coda
+#   - un oggetto il cui job è terminato con un'eccezione viene scartato, non riusato
+#   - AGENT_POOL=false costruisce un oggetto nuovo per ogni job (comportamento precedente)
+
+POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "8"))
+
+
+def pooling_enabled() -> bool:
+    return os.getenv("AGENT_POOL", "true").lower() != "false"
+
+
+def reset_agent(agent):
+    """Riporta un Agent strands allo stato iniziale: messaggi, stato, metriche del loop."""
+    agent.messages = []
+    agent.state = type(agent.state)()
+    agent.event_loop_metrics = type(agent.event_loop_metrics)()
+    if hasattr(agent.conversation_manager, "removed_message_count"):
+        agent.conversation_manager.removed_message_count = 0
+
+
+class AgentPool:
+    """Pool thread-safe di oggetti costruiti da factory e riportati allo stato iniziale da reset."""
+
+    def __init__(self, name: str, factory: Callable[[], Any], reset: Callable[[Any], None] = reset_agent,
+                 max_size: int = POOL_SIZE):
+        self.name = name
+        self.factory = factory
+        self.reset = reset
+        self.max_size = max_size
+        self._idle: List[Any] = []
+        self._kept = 0
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._stats = {"created": 0, "reused": 0, "overflow": 0, "discarded": 0, "in_use": 0, "peak_in_use": 0}
+        self._build_seconds = 0.0
+        self._busy_seconds = 0.0
+
+    def _build(self):
+        started = time.monotonic()
+        instance = self.factory()
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._stats["created"] += 1
+            self._build_seconds += elapsed
+        telemetry.count(f"agent_pool.{self.name}.created")
+        telemetry.observe(f"agent_pool.{self.name}.build_ms", elapsed * 1000)
+        return instance
+
+    @contextmanager
+    def acquire(self):
+        """Un oggetto libero del pool (o uno nuovo) per la durata del blocco."""
+        instance, kept = None, False
+        with self._lock:
+            if self._idle:
+                instance, kept = self._idle.pop(), True
+            elif pooling_enabled() and self._kept < self.max_size:
+                self._kept += 1
+                kept = True
+            self._stats["in_use"] += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._stats["in_use"])
+            average_build = self._build_seconds / self._stats["created"] if self._stats["created"] else 0.0
+
+        if instance is not None:
+            with self._lock:
+                self._stats["reused"] += 1
+            # Tempo di costruzione risparmiato rispetto a un oggetto nuovo (media delle costruzioni)
+            telemetry.count(f"agent_pool.{self.name}.reused")
+            telemetry.count(f"agent_pool.{self.name}.saved_ms", int(average_build * 1000))
+        else:
+            try:
+                instance = self._build()
+            except BaseException:
+                self._release(None, kept, 0.0)
+                raise
+            if not kept:
+                with self._lock:
+                    self._stats["overflow"] += 1
+
+        started = time.monotonic()
+        try:
+            yield instance
+        except BaseException:
+            self._release(None, kept, time.monotonic() - started)
+            raise
+        self._release(instance, kept, time.monotonic() - started)
+
+    def _release(self, instance, kept: bool, busy: float):
+        if instance is not None and kept:
+            try:
+                self.reset(instance)
+            except Exception:
+                instance = None
+        with self._lock:
+            self._stats["in_use"] -= 1
+            if not kept:
+                return
+            self._busy_seconds += busy
+            if instance is None:
+                # Il posto torna libero: il prossimo acquire costruirà un oggetto nuovo
+                self._kept -= 1
+                self._stats["discarded"] += 1
+            else:
+                self._idle.append(instance)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contatori del pool dall'avvio del processo, con utilizzo e tempo di costruzione risparmiato."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(size=self._kept, idle=len(self._idle), max_size=self.max_size)
+            uptime = time.monotonic() - self._started
+            average_build = self._build_seconds / stats["created"] if stats["created"] else 0.0
+            stats["build_seconds_avg"] = round(average_build, 4)
+            stats["saved_seconds"] = round(average_build * stats["reused"], 2)
+            # Frazione del tempo in cui gli oggetti mantenuti sono stati occupati
+            stats["utilization"] = round(min(1.0, self._busy_seconds / (max(self.max_size, 1) * uptime)), 4) if uptime else 0.0
+        return stats
+
+
+_pools: Dict[str, AgentPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str, factory: Callable[[], Any], reset: Callable[[Any], None] = reset_agent) -> AgentPool:
+    """Pool condiviso del processo con questo nome, creato alla prima richiesta."""
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = AgentPool(name, factory, reset)
+        return _pools[name]
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
@@ -0,0 +1,134 @@
+import os
+import sys
+import time
+import fcntl
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Any
+from git import Repo
+from tools.fileDiscovery import DOC_EXTENSIONS, PROJECT_CONFIG, PROJECT_WORDS, SKIP_DIRS
+
+# full:    clone completo (comportamento storico)
+# shallow: solo l'ultimo commit (--depth 1)
+# partial: --depth 1 --filter=blob:none + sparse checkout dei soli documenti (e della configurazione di progetto)
+# mirror:  mirror locale in cache sotto TEMP_PATH, aggiornato con fetch e clonato con --shared
+#          (anche qui il checkout è sparse)
+STRATEGIES = ("full", "shallow", "partial", "mirror")
+
+
+def default_mirror_dir() -> str:
+    base = os.getenv("TEMP_PATH") or tempfile.gettempdir()
+    return os.path.join(base, ".mirrors")
+
+
+def sparse_patterns(extensions=DOC_EXTENSIONS, skip_dirs=SKIP_DIRS) -> List[str]:
+    """
+    Pattern sparse-checkout (modalità no-cone): documenti ovunque, tranne nelle cartelle saltate da
+    find_docs_files, più i file che decidono cosa controllare (.gitignore, .spelling.json, .spelling.txt).
+    """
+    patterns = [f"*{ext}" for ext in extensions] + [f"/{PROJECT_CONFIG}", f"/{PROJECT_WORDS}", ".gitignore"]
+    for d in sorted(skip_dirs):
+        patterns += [f"!{d}/**", f"!**/{d}/**"]
+    return patterns
+
+
+def disk_usage(path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _sparse_checkout(repo: Repo):
+    repo.git.sparse_checkout("set", "--no-cone", *sparse_patterns())
+    repo.git.checkout()
+
+
+# ── Mirror cache ───────────────────────────────────────────────────────────
+
+def mirror_path(repo_url: str, mirror_dir: str = None) -> Path:
+    name = repo_url.rstrip("/").split("/")[-1].replace(".git", "")
+    digest = hashlib.sha1(repo_url.encode()).hexdigest()[:12]
+    return Path(mirror_dir or default_mirror_dir()) / f"{name}-{digest}.git"
+
+
+def update_mirror(repo_url: str, mirror_dir: str = None) -> Path:
+    """Crea il mirror al primo uso, altrimenti lo aggiorna con fetch. Serializzato tra processi con flock."""
+    path = mirror_path(repo_url, mirror_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(str(path) + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if path.exists():
+            Repo(path).git.fetch("--prune", "origin")
+        else:
+            Repo.clone_from(repo_url, path, mirror=True)
+    return path
+
+
+# ── Clone / update ─────────────────────────────────────────────────────────
+
+def clone_repository(repo_url: str, clone_path, strategy: str = None) -> Dict[str, Any]:
+    """
+    Clona repo_url in clone_path con la strategia indicata (default: CLONE_STRATEGY o "full").
+
+    Returns:
+        Dizionario con path, strategy, seconds, disk_bytes (e mirror_bytes per "mirror")
+    """
+    strategy = strategy or os.getenv("CLONE_STRATEGY", "full")
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown clone strategy '{strategy}', expected one of {STRATEGIES}")
+
+    start = time.time()
+    clone_path = Path(clone_path)
+    stats = {"strategy": strategy}
+
+    if strategy == "full":
+        Repo.clone_from(repo_url, clone_path)
+    elif strategy == "shallow":
+        Repo.clone_from(repo_url, clone_path, depth=1, single_branch=True)
+    elif strategy == "partial":
+        repo = Repo.clone_from(repo_url, clone_path, depth=1, single_branch=True,
+                               filter="blob:none", no_checkout=True)
+        _sparse_checkout(repo)
+    elif strategy == "mirror":
+        mirror = update_mirror(repo_url)
+        repo = Repo.clone_from(str(mirror), clone_path, shared=True, no_checkout=True)
+        _sparse_checkout(repo)
+        stats["mirror_bytes"] = disk_usage(mirror)
+
+    stats.update({
+        "path": str(clone_path),
+        "seconds": round(time.time() - start, 2),
+        "disk_bytes": disk_usage(clone_path),
+    })
+    print(f"[Clone] {repo_url} strategy={strategy} in {stats['seconds']:.2f}s, "
+          f"{stats['disk_bytes'] / 1_048_576:.1f} MB", file=sys.stderr)
+    return stats
+
+
+def update_repository(repo_url: str, clone_path, strategy: str = None) -> Dict[str, Any]:
+    """Aggiorna un clone esistente (fetch + reset sul ramo remoto) rispettando la strategia con cui è stato creato."""
+    strategy = strategy or os.getenv("CLONE_STRATEGY", "full")
+    start = time.time()
+    stats = {"strategy": strategy}
+
+    if strategy == "mirror":
+        stats["mirror_bytes"] = disk_usage(update_mirror(repo_url))
+    repo = Repo(clone_path)
+    if strategy in ("shallow", "partial"):
+        repo.remotes.origin.fetch(depth=1)
+    else:
+        repo.remotes.origin.fetch()
+    repo.git.reset("--hard", "@{upstream}")
+
+    stats.update({
+        "path": str(clone_path),
+        "seconds": round(time.time() - start, 2),
+        "disk_bytes": disk_usage(clone_path),
+    })
+    return stats
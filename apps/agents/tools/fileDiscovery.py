@@ -0,0 +1,354 @@
+import os
+import re
+import sys
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+# Ricerca dei documenti da controllare.
+#   index: file tracciati letti dall'indice git (git ls-files), nessuna visita del filesystem
+#   walk:  os.scandir livello per livello su un pool di thread, rispettando i .gitignore
+#   auto:  index se la cartella è la radice di un repository git, altrimenti walk
+# In entrambi i casi valgono le cartelle sempre saltate, la configurazione di progetto
+# (.spelling.json: "include", "exclude", "max_file_size"), il limite di dimensione e il
+# controllo dei file binari.
+
+DOC_EXTENSIONS = ('.txt', '.md', '.tex', '.typ')
+SKIP_DIRS = {'.git', 'node_modules', '__pycache__', 'venv', '.venv'}
+
+PROJECT_CONFIG = ".spelling.json"
+# Dizionario di progetto (vedi projectDictionary): è un .txt ma non va controllato
+PROJECT_WORDS = ".spelling.txt"
+# File più grandi vengono saltati (0 = nessun limite); sopra STREAM_THRESHOLD sono letti a blocchi
+MAX_FILE_SIZE = int(os.getenv("SPELL_MAX_FILE_SIZE", 64 << 20))
+DISCOVERY_SOURCE = os.getenv("DISCOVERY_SOURCE", "auto").lower()
+DISCOVERY_WORKERS = int(os.getenv("DISCOVERY_WORKERS", "8"))
+# Byte letti per riconoscere un file binario (un NUL nei primi BINARY_SNIFF byte)
+BINARY_SNIFF = 8192
+
+
+# ── Pattern stile .gitignore ───────────────────────────────────────────────
+
+def _glob_to_regex(pattern: str) -> str:
+    """Traduce un glob gitignore (*, ?, **, [...]) in regex sul path relativo con '/'."""
+    out, i = [], 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+                i += 1
+                continue
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            i = end + 1
+        elif c == "\\" and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+class IgnoreRule:
+    """Una riga di .gitignore (o un pattern di include/exclude), relativa alla cartella base."""
+
+    __slots__ = ("regex", "negate", "dir_only", "base")
+
+    def __init__(self, line: str, base: str = ""):
+        self.negate = line.startswith("!")
+        if self.negate:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        self.dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        # Con uno '/' (non finale) il pattern è ancorato alla base, altrimenti vale a ogni livello
+        anchored = "/" in line
+        line = line.lstrip("/")
+        prefix = "" if anchored or line.startswith("**/") else "(?:.*/)?"
+        self.regex = re.compile(prefix + _glob_to_regex(line) + "$")
+        self.base = base
+
+    def matches(self, rel: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel.startswith(self.base + "/"):
+                return False
+            rel = rel[len(self.base) + 1:]
+        return self.regex.match(rel) is not None
+
+
+def parse_rules(lines, base: str = "") -> List[IgnoreRule]:
+    rules = []
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+        if line and not line.startswith("#"):
+            rules.append(IgnoreRule(line, base))
+    return rules
+
+
+def is_ignored(rules: List[IgnoreRule], rel: str, is_dir: bool) -> bool:
+    """Come git: vince l'ultima regola che corrisponde."""
+    ignored = False
+    for rule in rules:
+        if rule.negate == ignored and rule.matches(rel, is_dir):
+            ignored = not rule.negate
+    return ignored
+
+
+def matches_path(rules: List[IgnoreRule], rel: str, dirs: Dict[str, bool] = None) -> bool:
+    """
+    Come .gitignore: le regole valgono per il file rel o per una delle sue cartelle ("docs", "docs/",
+    "/docs" coprono docs/a/b.md). dirs conserva l'esito per cartella tra più chiamate.
+    """
+    dirs = {} if dirs is None else dirs
+    parts = rel.split("/")
+    for depth in range(1, len(parts)):
+        rel_dir = "/".join(parts[:depth])
+        if rel_dir not in dirs:
+            dirs[rel_dir] = is_ignored(rules, rel_dir, True)
+        if dirs[rel_dir]:
+            return True
+    return is_ignored(rules, rel, False)
+
+
+def _read_gitignore(directory: str, base: str) -> List[IgnoreRule]:
+    try:
+        with open(os.path.join(directory, ".gitignore"), "r", encoding="utf-8", errors="replace") as f:
+            return parse_rules(f, base)
+    except OSError:
+        return []
+
+
+# ── Configurazione ─────────────────────────────────────────────────────────
+
+def load_project_config(directory: str) -> Dict[str, Any]:
+    """Legge .spelling.json nella radice analizzata ({} se assente o non valido)."""
+    path = os.path.join(directory, PROJECT_CONFIG)
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        return config if isinstance(config, dict) else {}
+    except (OSError, ValueError) as e:
+        print(f"[Warning] Ignoring {path}: {e}", file=sys.stderr)
+        return {}
+
+
+def is_binary(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return b"\0" in f.read(BINARY_SNIFF)
+    except OSError:
+        return True
+
+
+class _Filter:
+    """Regole comuni alle due sorgenti: cartelle saltate, include/exclude, dimensione, binari."""
+
+    def __init__(self, include: List[str], exclude: List[str], max_size: int):
+        self.include = parse_rules(include)
+        self.exclude = parse_rules(exclude)
+        self.max_size = max_size
+        self.skipped = {"ignored": 0, "excluded": 0, "too_large": 0, "binary": 0}
+        self._lock = threading.Lock()
+        self._included_dirs: Dict[str, bool] = {}
+
+    def skip(self, reason: str):
+        with self._lock:
+            self.skipped[reason] += 1
+
+    def skip_dir(self, name: str, rel: str) -> bool:
+        if name in SKIP_DIRS:
+            return True
+        if is_ignored(self.exclude, rel, True):
+            self.skip("excluded")
+            return True
+        return False
+
+    def accept(self, path: str, rel: str, size: int) -> bool:
+        if rel == PROJECT_WORDS:
+            return False
+        if self.include and not matches_path(self.include, rel, self._included_dirs):
+            self.skip("excluded")
+            return False
+        if self.exclude and is_ignored(self.exclude, rel, False):
+            self.skip("excluded")
+            return False
+        if self.max_size and size > self.max_size:
+            print(f"[Warning] Skipping {path}: {size} bytes exceeds the {self.max_size} bytes limit", file=sys.stderr)
+            self.skip("too_large")
+            return False
+        if is_binary(path):
+            self.skip("binary")
+            return False
+        return True
+
+
+# ── Sorgenti ───────────────────────────────────────────────────────────────
+
+def _scan_dir(directory: str, rel: str, rules: List[IgnoreRule], flt: _Filter, gitignore: bool):
+    """Una cartella: restituisce (sottocartelle da visitare, file accettati [(path, size)])."""
+    if gitignore:
+        rules = rules + _read_gitignore(directory, rel)
+    subdirs, files = [], []
+    try:
+        entries = list(os.scandir(directory))
+    except OSError as e:
+        print(f"[Warning] Cannot read {directory}: {e}", file=sys.stderr)
+        return subdirs, files
+
+    for entry in entries:
+        child = f"{rel}/{entry.name}" if rel else entry.name
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if flt.skip_dir(entry.name, child):
+                    continue
+                if rules and is_ignored(rules, child, True):
+                    flt.skip("ignored")
+                    continue
+                subdirs.append((entry.path, child, rules))
+            elif entry.is_file() and entry.name.endswith(DOC_EXTENSIONS):
+                if rules and is_ignored(rules, child, False):
+                    flt.skip("ignored")
+                    continue
+                size = entry.stat().st_size
+                if flt.accept(entry.path, child, size):
+                    files.append((entry.path, size))
+        except OSError:
+            continue
+    return subdirs, files
+
+
+def _scan_dirs(items, flt: _Filter, gitignore: bool):
+    subdirs, files = [], []
+    for item in items:
+        more_dirs, more_files = _scan_dir(*item, flt, gitignore)
+        subdirs.extend(more_dirs)
+        files.extend(more_files)
+    return subdirs, files
+
+
+def walk_files(directory: str, flt: _Filter, gitignore: bool = True, workers: int = DISCOVERY_WORKERS) -> List[Tuple[str, int]]:
+    """
+    Visita in ampiezza: le cartelle di ogni livello sono divise in gruppi letti in parallelo
+    dal pool di thread (un task per gruppo, non per cartella, per alberi con molte cartelle piccole).
+    """
+    workers = max(1, workers)
+    found: List[Tuple[str, int]] = []
+    frontier = [(directory, "", [])]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while frontier:
+            groups = [frontier[i::workers] for i in range(min(workers, len(frontier)))]
+            if len(groups) == 1:
+                results = [_scan_dirs(groups[0], flt, gitignore)]
+            else:
+                results = list(pool.map(lambda group: _scan_dirs(group, flt, gitignore), groups))
+            frontier = []
+            for subdirs, files in results:
+                frontier.extend(subdirs)
+                found.extend(files)
+    return found
+
+
+def index_files(directory: str, flt: _Filter) -> Optional[List[Tuple[str, int]]]:
+    """File tracciati dall'indice git; None se directory non è un repository."""
+    # GitPython solo qui: chi importa il modulo per le costanti (projectDictionary) non lo carica
+    from git import Repo
+    from git.exc import GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+    try:
+        output = Repo(directory).git.ls_files("-z")
+    except (InvalidGitRepositoryError, NoSuchPathError, GitCommandError):
+        return None
+
+    found = []
+    skipped_dirs: Dict[str, bool] = {}
+
+    def in_skipped_dir(parts: List[str]) -> bool:
+        # Le cartelle escluse valgono anche per i file tracciati (un esito per cartella)
+        for depth in range(1, len(parts)):
+            rel_dir = "/".join(parts[:depth])
+            if rel_dir not in skipped_dirs:
+                skipped_dirs[rel_dir] = flt.skip_dir(parts[depth - 1], rel_dir)
+            if skipped_dirs[rel_dir]:
+                return True
+        return False
+
+    for rel in output.split("\0"):
+        if not rel.endswith(DOC_EXTENSIONS):
+            continue
+        parts = rel.split("/")
+        if in_skipped_dir(parts):
+            continue
+        path = os.path.join(directory, *parts)
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            continue  # fuori dallo sparse checkout o cancellato nel working tree
+        if flt.accept(path, rel, size):
+            found.append((path, size))
+    return found
+
+
+def discover_files(directory: str, include: List[str] = None, exclude: List[str] = None,
+                   max_size: int = None, source: str = None, gitignore: bool = True) -> Dict[str, Any]:
+    """
+    Documenti da controllare sotto directory, con la dimensione di ognuno.
+
+    Args:
+        directory: Radice da analizzare
+        include: Pattern (sintassi .gitignore) dei file da considerare; si aggiungono a quelli di .spelling.json
+        exclude: Pattern dei file o cartelle da saltare; si aggiungono a quelli di .spelling.json
+        max_size: Dimensione massima in byte (default: .spelling.json "max_file_size" o SPELL_MAX_FILE_SIZE)
+        source: "index", "walk" o "auto" (default: DISCOVERY_SOURCE)
+        gitignore: Rispetta i .gitignore nella visita del filesystem
+
+    Returns:
+        {"files": [(path, size)] ordinati per path, "source", "skipped": conteggi per motivo}
+    """
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"Directory not found: {directory}")
+
+    config = load_project_config(directory)
+    if max_size is None:
+        max_size = int(config.get("max_file_size", MAX_FILE_SIZE))
+    flt = _Filter(list(config.get("include", [])) + list(include or []),
+                  list(config.get("exclude", [])) + list(exclude or []), max_size)
+
+    source = (source or DISCOVERY_SOURCE).lower()
+    files = None
+    if source == "index" or (source == "auto" and os.path.exists(os.path.join(directory, ".git"))):
+        files = index_files(directory, flt)
+    if files is None:
+        source = "walk"
+        files = walk_files(directory, flt, gitignore)
+    else:
+        source = "index"
+
+    files.sort()
+    return {"files": files, "source": source, "skipped": {k: v for k, v in flt.skipped.items() if v}}
@@ -0,0 +1,121 @@
+import os
+import json
+import hashlib
+import tempfile
+from typing import Dict, List, Any, Optional, Set
+from git import Repo
+
+
+# Stato per repository: ultimo commit analizzato e risultati per file, indicizzati per blob hash.
+# Un file viene ricontrollato solo se compare in `git diff --name-only` o se il suo blob è cambiato.
+
+
+def default_store_dir() -> str:
+    base = os.getenv("TEMP_PATH") or tempfile.gettempdir()
+    return os.path.join(base, ".incremental")
+
+
+def config_key(languages: List[str], permitted: List[str], dictionary_fingerprint: str = "") -> str:
+    """I risultati in cache valgono solo per le stesse lingue, parole permesse e dizionari."""
+    raw = json.dumps([sorted(languages), sorted(w.lower() for w in permitted), dictionary_fingerprint])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class IncrementalStore:
+    """Persistenza JSON dello stato incrementale, un file per repository."""
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or default_store_dir()
+
+    def _path(self, repo_url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(repo_url.encode()).hexdigest()[:16] + ".json")
+
+    def load(self, repo_url: str, key: str) -> Optional[Dict[str, Any]]:
+        """Restituisce lo stato salvato, o None se assente o calcolato con una configurazione diversa."""
+        try:
+            with open(self._path(repo_url), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if state.get("config") != key or state.get("repo_url") != repo_url:
+            return None
+        return state
+
+    def save(self, repo_url: str, key: str, commit: str, files: Dict[str, Dict[str, Any]]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(repo_url)
+        state = {"repo_url": repo_url, "config": key, "last_commit": commit, "files": files}
+        # Scrittura atomica: un'analisi interrotta non lascia uno stato corrotto
+        with tempfile.NamedTemporaryFile("w", dir=self.directory, delete=False, encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(f.name, path)
+
+
+# ── Git helpers ────────────────────────────────────────────────────────────
+
+def head_commit(repo_path: str) -> str:
+    return Repo(repo_path).head.commit.hexsha
+
+
+def blob_hashes(repo_path: str) -> Dict[str, str]:
+    """path relativo -> blob hash dei file tracciati (da `git ls-files -s`)."""
+    output = Repo(repo_path).git.ls_files("-s", "-z")
+    blobs = {}
+    for record in output.split("\0"):
+        if not record:
+            continue
+        meta, path = record.split("\t", 1)
+        blobs[path] = meta.split()[1]
+    return blobs
+
+
+def changed_paths(repo_path: str, base_commit: str, head: str) -> Optional[Set[str]]:
+    """
+    File aggiunti o modificati tra base_commit e head (`git diff --name-only`).
+    None se base_commit non è raggiungibile (es. force push o clone shallow).
+    """
+    try:
+        output = Repo(repo_path).git.diff("--name-only", "--diff-filter=ACMRT", "-z", base_commit, head)
+    except Exception:
+        return None
+    return {path for path in output.split("\0") if path}
+
+
+def plan_incremental(repo_path: str, file_paths: List[str], state: Optional[Dict[str, Any]],
+                     blobs: Dict[str, str], head: str) -> tuple:
+    """
+    Divide i file in (da controllare, riutilizzabili).
+
+    Returns:
+        (lista dei path da controllare, dict path -> voce spelling_analysis riusata)
+    """
+    if not state:
+        return list(file_paths), {}
+
+    changed = None
+    if state.get("last_commit") and state["last_commit"] != head:
+        changed = changed_paths(repo_path, state["last_commit"], head)
+    elif state.get("last_commit") == head:
+        changed = set()
+
+    to_check, reused = [], {}
+    cached_files = state.get("files", {})
+    for path in file_paths:
+        rel = os.path.relpath(path, repo_path).replace(os.sep, "/")
+        cached = cached_files.get(rel)
+        blob = blobs.get(rel)
+        # I file non tracciati (blob None) e quelli in errore vengono sempre ricontrollati
+        if (cached is None or blob is None or cached.get("blob") != blob or "error" in cached
+                or (changed is not None and rel in changed)):
+            to_check.append(path)
+        else:
+            reused[path] = {"file_path": path, **{k: v for k, v in cached.items() if k != "blob"}}
+    return to_check, reused
+
+
+def build_state_files(repo_path: str, spelling_analysis: List[Dict[str, Any]], blobs: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    files = {}
+    for entry in spelling_analysis:
+        rel = os.path.relpath(entry["file_path"], repo_path).replace(os.sep, "/")
+        files[rel] = {"blob": blobs.get(rel), **{k: v for k, v in entry.items() if k != "file_path"}}
+    return files
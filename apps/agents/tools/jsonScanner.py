@@ -0,0 +1,226 @@
+import re
+import json
+from typing import Any, Iterator, List, Optional, Tuple
+
+# Estrazione del JSON dalla risposta del modello in tempo lineare.
+# Si provano con JSONDecoder.raw_decode (in C) solo le '{' che possono aprire un oggetto ('{' seguita
+# da '}' o da una chiave e ':'): nel caso comune l'oggetto è valido e si salta direttamente alla sua fine.
+# Se il decoder fallisce alla posizione p, text[inizio:p] è un prefisso JSON valido e solo lì la
+# struttura è affidabile. Un passaggio in avanti accoppia le graffe del prefisso con una pila (senza
+# ricorsione e senza tornare indietro): salta da un carattere strutturale al successivo ({, }, ") e
+# attraversa le stringhe con una sola regex. Le coppie chiuse prima di p sono oggetti validi; quelle
+# ancora aperte fallirebbero allo stesso punto e non vengono decodificate.
+# Le virgolette del prefisso possono però essere testo libero ('Nota: {"graffe} ... {"status": 1}'):
+# dentro le stringhe si provano anche le aperture di oggetto, che lì possono essere solo '{}' o una
+# '{' subito prima della virgoletta di chiusura (al massimo un tentativo non banale per stringa).
+# Dopo p il testo non è JSON: la ricerca riprende da p e ogni '{' successiva viene provata di nuovo.
+# I segmenti [inizio, p) non si sovrappongono, quindi il lavoro resta lineare.
+
+# Inizio di un oggetto JSON: '{' seguita da '}' o da una chiave e ':'
+_OPEN_RE = re.compile(r'\{\s*(?:\}|"(?:[^"\\\n]|\\[^\n])*"\s*:)')
+_STRUCT_RE = re.compile(r'[{}"]')
+_STRING_RE = re.compile(r'"(?:[^"\\\n]|\\[^\n])*"')
+_THINKING_RE = re.compile(r'<thinking>.*?</thinking>', re.DOTALL)
+
+# Oltre questa profondità di graffe annidate non si prova il decoder (che è ricorsivo)
+_MAX_DECODE_DEPTH = 200
+# Finestra iniziale di raw_decode (vedi _decode), usata dopo i primi _WINDOW_FROM caratteri, e distanza
+# dalla sua fine entro cui un errore può essere dovuto al taglio (letterali, numeri, escape \uXXXX troncati)
+_WINDOW_FROM = 1 << 14
+_WINDOW = 4096
+_WINDOW_MARGIN = 16
+
+_decoder = json.JSONDecoder()
+
+
+def _openers(text: str, start: int, end: int) -> List[int]:
+    """
+    '{' in text[start:end] da cui può iniziare un oggetto. Dentro una stringa senza altre virgolette
+    sono solo '{}' o una '{' subito prima della virgoletta di chiusura: la verifica prosegue oltre end.
+    """
+    found = []
+    brace = text.find('{', start, end)
+    while brace != -1:
+        if _OPEN_RE.match(text, brace):
+            found.append(brace)
+        brace = text.find('{', brace + 1, end)
+    return found
+
+
+class _BraceTree:
+    """
+    Coppie di graffe bilanciate di un candidato: liste parallele per nodo (inizio, fine, altezza, figli),
+    più le aperture di oggetto che il passaggio ha attraversato come contenuto di stringhe.
+    """
+
+    def __init__(self, text: str, open_pos: int, stop: int):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.heights: List[int] = []
+        self.children: List[List[int]] = []
+        self.quoted: List[int] = []
+        # Coppie di primo livello e posizione da cui riprendere la ricerca dopo il candidato
+        self.roots: List[int] = []
+        self.stop = stop
+
+        stack: List[int] = []
+        pos = open_pos
+        while True:
+            m = _STRUCT_RE.search(text, pos, stop)
+            if m is None:
+                break
+            ch = m.group()
+            pos = m.end()
+            if ch == '"':
+                string = _STRING_RE.match(text, m.start(), stop)
+                if string is not None:
+                    pos = string.end()
+                    self.quoted.extend(_openers(text, m.end(), pos))
+                else:
+                    # Virgoletta senza chiusura: per il decoder il resto della riga è comunque una stringa
+                    line_end = text.find('\n', pos, stop)
+                    self.quoted.extend(_openers(text, pos, stop if line_end == -1 else line_end))
+            elif ch == '{':
+                stack.append(len(self.starts))
+                self.starts.append(m.start())
+                self.ends.append(-1)
+                self.heights.append(1)
+                self.children.append([])
+            elif stack:
+                node = stack.pop()
+                self.ends[node] = pos
+                if not stack:
+                    self.roots.append(node)
+                    self.stop = pos
+                    return
+                parent = stack[-1]
+                self.children[parent].append(node)
+                self.heights[parent] = max(self.heights[parent], self.heights[node] + 1)
+        # Candidato che non si chiude: le coppie chiuse al suo interno diventano di primo livello
+        for node in stack:
+            self.roots.extend(self.children[node])
+        self.roots.sort(key=self.starts.__getitem__)
+
+
+def _decode(text: str, pos: int, stop: int) -> Tuple[Optional[Tuple[int, int, Any]], Optional[int]]:
+    """raw_decode in pos: ((inizio, fine, oggetto), None) se valido entro stop, altrimenti (None, posizione dell'errore o None)."""
+    # JSONDecodeError calcola riga e colonna contando gli a capo dall'inizio del documento: su text intero
+    # ogni errore costerebbe O(pos). Oltre _WINDOW_FROM si decodifica una finestra che parte da pos e
+    # raddoppia finché l'errore può dipendere dal taglio (vicino alla fine della finestra o stringa non chiusa).
+    if pos < _WINDOW_FROM:
+        try:
+            obj, end = _decoder.raw_decode(text, pos)
+        except json.JSONDecodeError as e:
+            return None, e.pos
+        except RecursionError:
+            return None, None
+        return ((pos, end, obj), None) if end <= stop else (None, None)
+
+    size = _WINDOW
+    while True:
+        window = text[pos:pos + size]
+        truncated = pos + size < len(text)
+        try:
+            obj, end = _decoder.raw_decode(window)
+        except json.JSONDecodeError as e:
+            if truncated and (e.pos >= len(window) - _WINDOW_MARGIN or e.msg.startswith("Unterminated string")):
+                size *= 2
+                continue
+            return None, pos + e.pos
+        except RecursionError:
+            return None, None
+        end += pos
+        return ((pos, end, obj), None) if end <= stop else (None, None)
+
+
+def _tree_objects(text: str, tree: _BraceTree, stop: int, failed: Optional[int]) -> List[Tuple[int, int, Any]]:
+    """Oggetti validi dentro il candidato, il cui decoder è fallito alla posizione failed (None se ignota)."""
+    starts, ends, heights, children = tree.starts, tree.ends, tree.heights, tree.children
+    found = []
+
+    def pending(nodes):
+        # Una coppia che contiene failed fallirebbe nello stesso punto: si scende senza decodificarla
+        return [(node, failed if failed is not None and starts[node] < failed < ends[node] else None)
+                for node in reversed(nodes)]
+
+    # La coppia del candidato è già stata provata: si parte dai suoi figli
+    work = pending(children[0] if ends[0] != -1 else tree.roots)
+    while work:
+        node, node_failed = work.pop()
+        if node_failed is None and heights[node] <= _MAX_DECODE_DEPTH:
+            result, node_failed = _decode(text, starts[node], stop)
+            if result is not None:
+                found.append(result)
+                continue
+        work.extend(pending(children[node]))
+
+    for pos in tree.quoted:
+        result, _ = _decode(text, pos, stop)
+        if result is not None:
+            found.append(result)
+
+    # In ordine di inizio, senza gli oggetti contenuti in uno già trovato
+    found.sort(key=lambda item: (item[0], -item[1]))
+    objects, covered = [], -1
+    for item in found:
+        if item[1] > covered:
+            objects.append(item)
+            covered = item[1]
+    return objects
+
+
+def iter_json_objects(text: str, start: int = 0, stop: int = None) -> Iterator[Tuple[int, int, Any]]:
+    """
+    Oggetti JSON di primo livello in text[start:stop], come (inizio, fine, oggetto).
+    Se un candidato bilanciato non è JSON valido (es. graffe nel testo libero) si cercano
+    gli oggetti al suo interno e dopo il punto in cui il decoder è fallito.
+    """
+    stop = len(text) if stop is None else stop
+    pos = start
+    while True:
+        m = _OPEN_RE.search(text, pos, stop)
+        if m is None:
+            return
+        open_pos = m.start()
+        # Caso comune: l'oggetto è valido e raw_decode ne trova la fine in un solo passaggio
+        result, failed = _decode(text, open_pos, stop)
+        if result is not None:
+            yield result
+            pos = result[1]
+            continue
+        if failed is None:
+            # RecursionError (o oggetto oltre stop): si usano le coppie dell'intero candidato
+            tree = _BraceTree(text, open_pos, stop)
+            objects = _tree_objects(text, tree, stop, None)
+            pos = tree.stop
+        else:
+            failed = min(failed, stop)
+            objects = _tree_objects(text, _BraceTree(text, open_pos, failed), stop, failed)
+            pos = failed
+        yield from objects
+        pos = max([pos, open_pos + 1] + [end for _, end, _ in objects])
+
+
+def extract_json(text: str) -> dict:
+    """
+    Estrae l'oggetto JSON della risposta del modello.
+    Gestisce: blocchi ```json, tag <response>/<thinking>, testo misto, graffe dentro le stringhe.
+    Strategia: tra gli oggetti di primo livello sceglie il più lungo, preferendo quelli
+    fuori dai blocchi <thinking>.
+    """
+    thinking: List[Tuple[int, int]] = [m.span() for m in _THINKING_RE.finditer(text)]
+
+    def in_thinking(pos: int) -> bool:
+        return any(s <= pos < e for s, e in thinking)
+
+    best, best_key = None, None
+    for start, end, obj in iter_json_objects(text):
+        if not isinstance(obj, dict):
+            continue
+        key = (not in_thinking(start), end - start)
+        if best_key is None or key > best_key:
+            best, best_key = obj, key
+
+    if best is None:
+        raise ValueError(f"Nessun JSON valido trovato. Testo (primi 500 char):\n{text[:500]}")
+    return best
@@ -0,0 +1,25 @@
+import threading
+from typing import Callable, Dict, List
+
+# I tool restano funzioni Python normali finché un Agent non li richiede: il decoratore @tool di
+# strands (che importa strands, boto3, ...) viene applicato solo da agent_tools(). Così la pipeline
+# deterministica e i worker usano le stesse funzioni senza caricare l'SDK degli agenti.
+
+_wrapped: Dict[Callable, object] = {}
+_wrapped_lock = threading.Lock()
+
+
+def tool(func: Callable) -> Callable:
+    """Segna func come tool per gli Agent, senza importare strands."""
+    func.__agent_tool__ = True
+    return func
+
+
+def agent_tools(*funcs: Callable) -> List[object]:
+    """I tool strands corrispondenti a funcs, creati una volta per processo."""
+    from strands import tool as strands_tool
+    with _wrapped_lock:
+        for func in funcs:
+            if func not in _wrapped:
+                _wrapped[func] = strands_tool(func)
+        return [_wrapped[func] for func in funcs]
@@ -1,10 +1,64 @@
 from pathlib import Path
 import os
 import sys
-from strands import tool
-from spellAgent import SpellAgent
+import time
+import threading
+from contextlib import nullcontext
+from tools.lazyTools import tool
 import json
-from git import Repo
+from typing import Dict, Any, Optional
+from tools.cloneStrategies import clone_repository, update_repository
+from tools.resultsSink import sink_for
+from tools import telemetry
+
+
+def local_clone_path(repo_url: str, temp_path: str) -> Path:
+    repo_name = repo_url.rstrip("/").split("/")[-1].replace(".git", "")
+    return Path(temp_path) / repo_name
+
+
+# Clone contemporanei nel processo (es. batchRunner con molti repository); None = nessun limite
+_clone_slots: Optional[threading.BoundedSemaphore] = None
+
+
+def limit_clones(concurrency: Optional[int]):
+    """Limita i clone/fetch in corso nello stesso momento a concurrency (None o 0: nessun limite)."""
+    global _clone_slots
+    _clone_slots = threading.BoundedSemaphore(concurrency) if concurrency else None
+
+
+def checkout_repo(repo_url: str, temp_path: str, strategy: str = None, reuse: bool = False) -> Dict[str, Any]:
+    """
+    Prepara il clone locale con la strategia indicata (default: CLONE_STRATEGY, vedi cloneStrategies).
+    Con reuse=True un clone già presente viene aggiornato (fetch + reset) invece di essere ricreato.
+    Restituisce path, strategia, tempo e spazio su disco.
+    """
+    clone_path = local_clone_path(repo_url, temp_path)
+    slots = _clone_slots
+    waiting = time.time()
+    with slots or nullcontext(), telemetry.span("clone", reuse=reuse) as attributes:
+        if slots is not None:
+            telemetry.observe("clone.wait_ms", (time.time() - waiting) * 1000)
+        if reuse and (clone_path / ".git").exists():
+            stats = update_repository(repo_url, clone_path, strategy)
+        else:
+            stats = clone_repository(repo_url, clone_path, strategy)
+        if attributes is not None:
+            attributes["strategy"] = stats.get("strategy")
+    return stats
+
+
+def clone_repo(repo_url: str, temp_path: str, strategy: str = None) -> Path:
+    """Clona il repository in temp_path/<repo_name> e restituisce il path locale."""
+    return Path(checkout_repo(repo_url, temp_path, strategy)["path"])
+
+
+def sync_repo(repo_url: str, temp_path: str, strategy: str = None) -> Path:
+    """
+    Come clone_repo, ma se il clone esiste già lo aggiorna (fetch + reset sul ramo remoto)
+    invece di clonare di nuovo. Usato dall'analisi incrementale.
+    """
+    return Path(checkout_repo(repo_url, temp_path, strategy, reuse=True)["path"])
 
 
 @tool
@@ -13,11 +67,9 @@ def clone_repo_tool(repo_url: str, temp_path: str) -> str:
     Clones a GitHub repository into a local temporary folder.
     Returns a success or error message.
     """
+    telemetry.count("tool_calls.clone_repo_tool")
     try:
-        repo_name = repo_url.split("/")[-1].replace(".git", "")
-        clone_path = Path(temp_path) / repo_name
-
-        Repo.clone_from(repo_url, clone_path)
+        clone_path = clone_repo(repo_url, temp_path)
         return f"Successfully cloned repository to {clone_path}."
 
     except Exception as e:
@@ -28,15 +80,23 @@ def clone_repo_tool(repo_url: str, temp_path: str) -> str:
 def analyze_spelling_tool(temp_path: str, permitted: set = None, languages: list = None) -> str:
     """
     Starts the specialized SpellAgent to analyze files in the specified path for spelling errors.
-    It supports specifying permitted words to ignore and multiple languages for spell checking.
-    Returns the spelling analysis results in JSON format.
+    The permitted words of the analysis and the repository dictionary (.spelling.txt) are applied
+    automatically; permitted adds more words to ignore. Multiple languages are supported.
+    Returns a JSON summary (files checked, files with errors, total errors, worst files);
+    the per-file results are collected automatically and must not be repeated.
     """
     if languages is None:
         languages = ['en_US']
     if permitted is None:
         permitted = set()
     
-    spell_agent = SpellAgent()
-    result = spell_agent.check_spelling(temp_path, permitted=permitted, languages=languages)
+    telemetry.count("tool_calls.analyze_spelling_tool")
+    # Import qui: SpellAgent carica strands, che serve solo nel percorso agent
+    from spellAgent import acquire_spell_agent
+    with acquire_spell_agent() as spell_agent:
+        result = spell_agent.check_spelling(temp_path, permitted=permitted, languages=languages)
+    # I risultati per file restano nel sink dell'analisi: al modello basta un riepilogo compatto
+    sink = sink_for(temp_path)
+    if sink is not None:
+        result["results"] = sink.digest()
     return json.dumps(result)
-    return json.dumps(result)
\ No newline at end of file
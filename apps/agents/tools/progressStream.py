@@ -0,0 +1,137 @@
+import os
+import sys
+import time
+import queue
+import threading
+import contextvars
+from typing import Any, Dict, List, Optional
+from tools import telemetry
+
+# Risultati parziali verso NestJs durante l'analisi (POST /analysis/webhook/progress):
+#   - le voci spelling_analysis dei file appena controllati, a gruppi di PROGRESS_BATCH_FILES
+#     o ogni PROGRESS_INTERVAL_S secondi, con i contatori cumulativi del summary
+#   - l'invio avviene su un thread del reporter: il controllo dei file non aspetta l'API
+#   - best effort: un gruppo non consegnato non va nello spool (lo fa il risultato finale), ma ogni
+#     messaggio porta un numero di sequenza e l'API ignora i duplicati dei retry
+# Se l'analisi fallisce o va in timeout, l'API conserva i file già ricevuti.
+
+PROGRESS_BATCH_FILES = int(os.getenv("PROGRESS_BATCH_FILES", "50"))
+PROGRESS_INTERVAL_S = float(os.getenv("PROGRESS_INTERVAL_S", "2"))
+PROGRESS_RETRIES = int(os.getenv("PROGRESS_RETRIES", "1"))
+# Attesa massima, a fine analisi, per i gruppi ancora in coda
+CLOSE_TIMEOUT = 15.0
+
+_STOP = object()
+
+
+def progress_enabled() -> bool:
+    return os.getenv("PROGRESS_ENABLED", "true").lower() != "false"
+
+
+def progress_url() -> str:
+    """PROGRESS_WEBHOOK_URL, altrimenti <NEST_WEBHOOK_URL>/progress."""
+    from tools.webhookDelivery import webhook_url
+    return os.getenv("PROGRESS_WEBHOOK_URL") or webhook_url().rstrip("/") + "/progress"
+
+
+class ProgressReporter:
+    """Accumula le voci per file di un'analisi e le invia a gruppi, in ordine, da un thread dedicato."""
+
+    def __init__(self, analysis_id: str, url: str = None, batch_files: int = PROGRESS_BATCH_FILES,
+                 interval: float = PROGRESS_INTERVAL_S):
+        self.analysis_id = analysis_id
+        self.url = url or progress_url()
+        self.batch_files = max(1, batch_files)
+        self.interval = interval
+        self.expected_files: Optional[int] = None
+        self.sent = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._summary = {"total_files": 0, "total_errors": 0, "files_with_errors": 0}
+        self._sequence = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._disabled = False
+        # Il thread eredita il contesto dell'analisi: gli span "webhook" finiscono nel suo recorder
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._send_loop,),
+                                         name=f"progress-{analysis_id}", daemon=True)
+        self._thread.start()
+
+    def expect(self, files: int):
+        """Numero di file da controllare, se noto (incluso nei messaggi per la barra di avanzamento)."""
+        self.expected_files = files
+
+    def add(self, entries: List[Dict[str, Any]]):
+        """Voci {file_path, misspelled_words, ...} appena completate; thread-safe."""
+        if not entries or self._disabled:
+            return
+        with self._lock:
+            for entry in entries:
+                errors = len(entry.get("misspelled_words") or ())
+                self._summary["total_files"] += 1
+                self._summary["total_errors"] += errors
+                self._summary["files_with_errors"] += 1 if errors else 0
+            self._buffer.extend(entries)
+            if len(self._buffer) >= self.batch_files or time.monotonic() - self._last_flush >= self.interval:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        self._sequence += 1
+        self._queue.put({
+            "analysis_id": self.analysis_id,
+            "type": "progress",
+            "sequence": self._sequence,
+            "spelling_analysis": self._buffer,
+            "summary": dict(self._summary),
+            "expected_files": self.expected_files,
+        })
+        self._buffer = []
+
+    def close(self, timeout: float = CLOSE_TIMEOUT):
+        """Invia le voci rimaste e attende (al massimo timeout secondi) che la coda si svuoti."""
+        self.flush()
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"[Warning] Progress updates for {self.analysis_id} still pending after {timeout:.0f}s", file=sys.stderr)
+
+    def _send_loop(self):
+        from tools.webhookDelivery import DeliveryError, get_client
+        client = get_client(self.url)
+        while True:
+            payload = self._queue.get()
+            if payload is _STOP:
+                return
+            if self._disabled:
+                continue
+            try:
+                response = client.post(payload, retries=PROGRESS_RETRIES)
+            except DeliveryError as e:
+                telemetry.count("progress.failed")
+                print(f"[Warning] Progress update {payload['sequence']} not delivered: {e}", file=sys.stderr)
+                continue
+            if response.status_code == 404:
+                # API senza l'endpoint di avanzamento: resta solo il risultato finale
+                self._disabled = True
+                print(f"[Warning] {self.url} not found, progress updates disabled", file=sys.stderr)
+            elif response.status_code >= 400:
+                telemetry.count("progress.failed")
+                print(f"[Warning] Progress update {payload['sequence']} rejected: HTTP {response.status_code}", file=sys.stderr)
+            else:
+                self.sent += 1
+                telemetry.count("progress.sent")
+                telemetry.count("progress.files", len(payload["spelling_analysis"]))
+
+
+def start_progress(analysis_id: Optional[str]) -> Optional[ProgressReporter]:
+    """Reporter per l'analisi, o None se disattivato (PROGRESS_ENABLED=false) o senza analysis id."""
+    if not progress_enabled() or not analysis_id or analysis_id in ("unknown", "unknown_id"):
+        return None
+    return ProgressReporter(analysis_id)
@@ -0,0 +1,285 @@
+import os
+import re
+import sys
+import hashlib
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+from tools.fileDiscovery import load_project_config, PROJECT_CONFIG, PROJECT_WORDS
+
+# Parole ammesse di un progetto, caricate una volta e condivise da tutti i controlli:
+#   - .spelling.txt nella radice del repository (una voce per riga, '#' per i commenti)
+#   - "words" in .spelling.json
+#   - glossari dell'organizzazione: file *.txt in SPELL_GLOSSARY_DIR, stesso formato
+#   - parole passate all'analisi (argv[3] / permitted_words), registrate con use_permitted_words()
+# Formato di una voce:
+#   kubernetes      parola (confronto senza maiuscole)
+#   k8s*            prefisso: ogni parola che inizia così
+#   /v\d+/          regex sull'intera parola (in minuscolo, IGNORECASE); le voci sono scritte dagli
+#                   utenti, quindi sono scartati pattern lunghi, con backreference o quantificatori
+#                   annidati (backtracking catastrofico) e quelli che non compilano
+# Le parole non passano più dal prompt del modello: i tool trovano il dizionario dal path del file.
+
+GLOSSARY_DIR = os.getenv("SPELL_GLOSSARY_DIR", "")
+# Marcatori della radice di un progetto, cercati risalendo dal file controllato
+_ROOT_MARKERS = (".git", PROJECT_WORDS, PROJECT_CONFIG)
+MAX_PATTERN_LENGTH = 100
+
+_BACKREFERENCE_RE = re.compile(r'\\[1-9]|\(\?P=')
+_QUANTIFIER_RE = re.compile(r'[*+]|\{\d*,')
+
+
+def _nested_quantifier(pattern: str) -> bool:
+    """True se un gruppo che contiene un quantificatore è a sua volta ripetuto: (a+)+, ((ab)*x)*, (a{2,})+"""
+    stack = [False]
+    pos = 0
+    while pos < len(pattern):
+        ch = pattern[pos]
+        if ch == "\\":
+            pos += 2
+            continue
+        if ch == "[":
+            # Classe di caratteri: ']' subito dopo '[' o '[^' è un carattere
+            end = pos + 1 + (pattern[pos + 1:pos + 2] == "^")
+            end = pattern.find("]", end + 1)
+            pos = len(pattern) if end == -1 else end + 1
+            continue
+        pos += 1
+        if ch == "(":
+            stack.append(False)
+        elif ch == ")" and len(stack) > 1:
+            inner = stack.pop()
+            repeated = _QUANTIFIER_RE.match(pattern, pos) is not None
+            if inner and repeated:
+                return True
+            stack[-1] = stack[-1] or inner or repeated
+        elif _QUANTIFIER_RE.match(pattern, pos - 1):
+            stack[-1] = True
+    return False
+
+
+def _pattern_problem(pattern: str) -> Optional[str]:
+    """Motivo per cui un pattern di un utente non è accettato, o None."""
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        return f"longer than {MAX_PATTERN_LENGTH} characters"
+    if _BACKREFERENCE_RE.search(pattern):
+        return "backreferences are not supported"
+    if _nested_quantifier(pattern):
+        return "nested quantifiers can backtrack catastrophically"
+    try:
+        # Compilato come sarà nell'alternativa unica: (?i) e simili devono stare all'inizio della regex
+        re.compile(f"(?:{pattern})", re.IGNORECASE)
+    except re.error as e:
+        return str(e)
+    return None
+
+
+class ProjectDictionary:
+    """
+    Insieme di parole, prefissi e pattern ammessi. Si usa al posto del set `permitted`
+    (operatore `in` sulla parola in minuscolo) in tokenizer e check_words.
+    """
+
+    def __init__(self, entries: Iterable[str] = (), sources: Tuple = ()):
+        words, prefixes, patterns = set(), set(), []
+        for entry in entries:
+            entry = entry.strip()
+            if not entry or entry.startswith("#"):
+                continue
+            if len(entry) > 2 and entry.startswith("/") and entry.endswith("/"):
+                problem = _pattern_problem(entry[1:-1])
+                if problem is None:
+                    patterns.append(entry[1:-1])
+                else:
+                    print(f"[Warning] Ignoring pattern {entry}: {problem}", file=sys.stderr)
+            elif len(entry) > 1 and entry.endswith("*"):
+                prefixes.add(entry[:-1].lower())
+            else:
+                words.add(entry.lower())
+
+        self.words = frozenset(words)
+        self.prefixes = frozenset(prefixes)
+        # Una lookup nel set per ogni lunghezza di prefisso distinta, non una per prefisso
+        self._prefix_lengths = sorted({len(p) for p in prefixes})
+        # Tutti i pattern in un'unica regex: una sola fullmatch per parola
+        self._pattern = None
+        if patterns:
+            try:
+                self._pattern = re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+            except re.error as e:
+                # Es. lo stesso nome di gruppo in due pattern: si tengono solo quelli che compilano insieme
+                print(f"[Warning] Patterns cannot be combined ({e}), keeping the compatible ones", file=sys.stderr)
+                patterns = self._compatible(patterns)
+                self._pattern = re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE) if patterns else None
+        self.patterns = tuple(patterns)
+        # Per ricaricare il dizionario nei worker di spellEngine invece di serializzarlo (vedi __reduce__)
+        self._sources = sources
+
+    @staticmethod
+    def _compatible(patterns: List[str]) -> List[str]:
+        kept = []
+        for pattern in patterns:
+            try:
+                re.compile("|".join(f"(?:{p})" for p in kept + [pattern]), re.IGNORECASE)
+                kept.append(pattern)
+            except re.error as e:
+                print(f"[Warning] Ignoring pattern /{pattern}/: {e}", file=sys.stderr)
+        return kept
+
+    def __contains__(self, word: str) -> bool:
+        if word in self.words:
+            return True
+        for length in self._prefix_lengths:
+            if length > len(word):
+                break
+            if word[:length] in self.prefixes:
+                return True
+        return self._pattern is not None and self._pattern.fullmatch(word) is not None
+
+    def __len__(self) -> int:
+        return len(self.words) + len(self.prefixes) + len(self.patterns)
+
+    def __reduce__(self):
+        if self._sources:
+            return load_project_dictionary, self._sources
+        return ProjectDictionary, (self.entries(),)
+
+    def entries(self) -> List[str]:
+        return sorted(self.words) + sorted(p + "*" for p in self.prefixes) + [f"/{p}/" for p in self.patterns]
+
+    def fingerprint(self) -> str:
+        """Hash del contenuto, per le chiavi che dipendono dalle parole ammesse (es. incrementalStore)."""
+        return hashlib.sha256("\n".join(self.entries()).encode("utf-8")).hexdigest()
+
+
+def as_permitted(permitted) -> ProjectDictionary:
+    """Un ProjectDictionary così com'è, altrimenti uno costruito dall'elenco di voci."""
+    if isinstance(permitted, ProjectDictionary):
+        return permitted
+    return ProjectDictionary(permitted or ())
+
+
+# ── Caricamento ────────────────────────────────────────────────────────────
+
+def _source_files(root: Optional[str]) -> List[str]:
+    files = []
+    if root:
+        files.extend(os.path.join(root, name) for name in (PROJECT_WORDS, PROJECT_CONFIG))
+    if GLOSSARY_DIR and os.path.isdir(GLOSSARY_DIR):
+        files.extend(os.path.join(GLOSSARY_DIR, name) for name in sorted(os.listdir(GLOSSARY_DIR)) if name.endswith(".txt"))
+    return [f for f in files if os.path.isfile(f)]
+
+
+def _read_entries(path: str) -> List[str]:
+    try:
+        if path.endswith(".json"):
+            return [str(w) for w in load_project_config(os.path.dirname(path)).get("words", [])]
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read().splitlines()
+    except OSError as e:
+        print(f"[Warning] Cannot read {path}: {e}", file=sys.stderr)
+        return []
+
+
+_loaded: Dict[tuple, ProjectDictionary] = {}
+_loaded_lock = threading.Lock()
+_MAX_LOADED = 32
+
+
+def load_project_dictionary(root: Optional[str], permitted: Tuple[str, ...] = ()) -> ProjectDictionary:
+    """
+    Dizionario del progetto in root (None: solo glossari e parole passate). Il risultato resta in
+    memoria finché i file sorgente non cambiano (path, dimensione, mtime).
+
+    Args:
+        root: Radice del repository analizzato
+        permitted: Voci aggiuntive (parole ammesse passate all'analisi)
+    """
+    permitted = tuple(sorted(set(permitted)))
+    files = _source_files(root)
+    stamps = []
+    for path in files:
+        st = os.stat(path)
+        stamps.append((path, st.st_size, st.st_mtime_ns))
+    key = (root, permitted, tuple(stamps))
+
+    dictionary = _loaded.get(key)
+    if dictionary is None:
+        entries = list(permitted)
+        for path in files:
+            entries.extend(_read_entries(path))
+        dictionary = ProjectDictionary(entries, sources=(root, permitted))
+        with _loaded_lock:
+            if len(_loaded) >= _MAX_LOADED:
+                _loaded.pop(next(iter(_loaded)))
+            _loaded[key] = dictionary
+    return dictionary
+
+
+def find_project_root(path: str) -> Optional[str]:
+    """Prima cartella, risalendo da path, con .git, .spelling.txt o .spelling.json."""
+    directory = os.path.realpath(path if os.path.isdir(path) else os.path.dirname(path))
+    while True:
+        if any(os.path.exists(os.path.join(directory, marker)) for marker in _ROOT_MARKERS):
+            return directory
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+# ── Parole passate all'analisi ─────────────────────────────────────────────
+
+# Parole dell'analisi corrente nel contesto (ereditato dai thread dei tool), come per resultsSink:
+# analisi diverse sulla stessa temp_path non si sovrascrivono. Il path è solo un ripiego.
+_current: ContextVar[Optional[Tuple[str, Tuple[str, ...]]]] = ContextVar("permitted_words", default=None)
+_registered: List[Tuple[str, Tuple[str, ...]]] = []
+_registered_lock = threading.Lock()
+
+
+def _under(path: str, root: str) -> bool:
+    return path == root or path.startswith(root + os.sep)
+
+
+@contextmanager
+def use_permitted_words(root: str, words: Iterable[str]):
+    """Rende disponibili le parole ammesse ai tool che controllano file sotto root, per la durata del blocco."""
+    registration = (os.path.realpath(root), tuple(words))
+    token = _current.set(registration)
+    with _registered_lock:
+        _registered.append(registration)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+        with _registered_lock:
+            # Solo la propria voce: un'altra analisi può avere la stessa root
+            _registered.remove(registration)
+
+
+def _registered_words(path: str) -> Tuple[str, ...]:
+    path = os.path.realpath(path)
+    current = _current.get()
+    if current is not None:
+        return current[1] if _under(path, current[0]) else ()
+    if not _registered:
+        return ()
+    with _registered_lock:
+        matches = [(root, words) for root, words in _registered if _under(path, root)]
+    if not matches:
+        return ()
+    longest = max(len(root) for root, _ in matches)
+    matches = {words for root, words in matches if len(root) == longest}
+    # Root condivisa da analisi con parole diverse: nessuna è quella giusta
+    return matches.pop() if len(matches) == 1 else ()
+
+
+def dictionary_for(path: Optional[str], permitted: Iterable[str] = ()) -> ProjectDictionary:
+    """
+    Dizionario da usare per un file o una cartella: file del progetto che lo contiene, glossari,
+    parole registrate per l'analisi e quelle passate esplicitamente al tool.
+    """
+    if path is None:
+        return load_project_dictionary(None, tuple(permitted))
+    return load_project_dictionary(find_project_root(path), tuple(permitted) + _registered_words(path))
@@ -0,0 +1,100 @@
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Any, Optional
+
+# Raccolta dei risultati di spell-checking fuori dalla conversazione con il modello.
+# I tool registrano ogni file controllato nel sink dell'analisi a cui appartiene, così l'orchestrator
+# unisce i dati in Python e il modello deve scrivere solo il report, qualunque sia il numero di errori.
+# Il sink dell'analisi è nel contesto (ContextVar, ereditata dai thread dei tool di strands): più
+# analisi agent possono condividere la stessa temp_path (jobServer, batch incrementali) senza
+# mescolare i risultati. Il path serve solo come ripiego per i thread senza contesto.
+
+
+class ResultsSink:
+    """Risultati per file di una singola analisi (thread-safe: i tool girano in thread diversi)."""
+
+    def __init__(self, root: str, on_record: Callable[[Dict[str, Any]], None] = None):
+        self.root = os.path.realpath(root)
+        self.on_record = on_record
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, entry: Dict[str, Any]):
+        """Registra la voce {file_path, misspelled_words[, occurrences]}; un secondo controllo dello stesso file la sostituisce."""
+        with self._lock:
+            self._entries[os.path.realpath(entry["file_path"])] = entry
+        if self.on_record is not None:
+            self.on_record(entry)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._entries[path] for path in sorted(self._entries)]
+
+    def digest(self, max_files: int = 10) -> Dict[str, Any]:
+        """Riepilogo compatto per il modello: conteggi e file con più errori, senza le parole."""
+        entries = self.entries()
+        worst = sorted(entries, key=lambda e: len(e["misspelled_words"]), reverse=True)[:max_files]
+        return {
+            "files_checked": len(entries),
+            "files_with_errors": sum(1 for e in entries if e["misspelled_words"]),
+            "total_errors": sum(len(e["misspelled_words"]) for e in entries),
+            "worst_files": [
+                {"file_path": e["file_path"], "errors": len(e["misspelled_words"])}
+                for e in worst if e["misspelled_words"]
+            ],
+        }
+
+
+_current: ContextVar[Optional[ResultsSink]] = ContextVar("results_sink", default=None)
+_sinks: List[ResultsSink] = []
+_sinks_lock = threading.Lock()
+
+
+def _under(path: str, root: str) -> bool:
+    return path == root or path.startswith(root + os.sep)
+
+
+def sink_for(path: str) -> Optional[ResultsSink]:
+    """
+    Il sink dell'analisi corrente se path è sotto la sua root. Fuori da un contesto di analisi,
+    il sink con la root più specifica che contiene path, purché non sia condivisa da più analisi.
+    """
+    path = os.path.realpath(path)
+    current = _current.get()
+    if current is not None:
+        return current if _under(path, current.root) else None
+    if not _sinks:
+        return None
+    with _sinks_lock:
+        matches = [sink for sink in _sinks if _under(path, sink.root)]
+    if not matches:
+        return None
+    root = max(len(sink.root) for sink in matches)
+    matches = [sink for sink in matches if len(sink.root) == root]
+    return matches[0] if len(matches) == 1 else None
+
+
+def record_result(entry: Dict[str, Any]):
+    sink = sink_for(entry["file_path"])
+    if sink is not None:
+        sink.record(entry)
+
+
+@contextmanager
+def capture_results(root: str, on_record: Callable[[Dict[str, Any]], None] = None):
+    """
+    Attiva un sink per tutti i file sotto root per la durata del blocco, legato al contesto corrente.
+    on_record riceve ogni voce appena registrata (es. avanzamento verso l'API).
+    """
+    sink = ResultsSink(root, on_record)
+    token = _current.set(sink)
+    with _sinks_lock:
+        _sinks.append(sink)
+    try:
+        yield sink
+    finally:
+        _current.reset(token)
+        with _sinks_lock:
+            _sinks.remove(sink)
@@ -1,103 +1,350 @@
 import os
+import sys
 import json
 import threading
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Dict, List, Any
-from strands import Agent, tool
+from tools.lazyTools import tool
 import enchant
+from tools.verdictCache import get_verdict_cache, get_suggestion_cache, dictionary_fingerprint
+from tools.tokenizer import find_ignored_positions, tokenize, normalize_tokens, locate_tokens, LineIndex, IGNORE_PATTERNS
+from tools.streamReader import iter_tokens, locate_stream, STREAM_THRESHOLD
+from tools.resultsSink import record_result
+from tools import telemetry
+from tools.fileDiscovery import discover_files, matches_path, parse_rules, DOC_EXTENSIONS, SKIP_DIRS
+from tools.wordIndex import get_word_index
+from tools.projectDictionary import dictionary_for
 
-# ── Singleton thread-safe per i dizionari enchant ──────────────────────────
+# ── Dizionari enchant per thread ───────────────────────────────────────────
+# hunspell non è thread-safe: invece di serializzare tutti i controlli su un lock
+# globale ogni thread (e ogni processo del pool di spellEngine) usa i propri Dict.
+# Il lock protegge solo la creazione, che passa per il broker enchant condiviso.
 _spell_lock = threading.Lock()
-_spell_cache: Dict[str, enchant.Dict] = {}
+_spell_local = threading.local()
+_missing_languages = set()
+
+_NUMBER_SUFFIX_RE = re.compile(r'^\d+[a-z]+$')
+_CLEAN_RES = [re.compile(r'^_+|_+$'), re.compile(r'^\*+|\*+$'), re.compile(r'^`+|`+$')]
 
 def get_spell_checkers(languages: List[str]) -> List[enchant.Dict]:
-    """Restituisce dizionari enchant cached, creandoli solo una volta."""
+    """Restituisce i dizionari enchant del thread corrente, creandoli solo una volta."""
+    cache = getattr(_spell_local, "cache", None)
+    if cache is None:
+        cache = _spell_local.cache = {}
+
     checkers = []
     for lang in languages:
-        with _spell_lock:
-            if lang not in _spell_cache:
+        if lang not in cache:
+            with _spell_lock:
                 try:
-                    _spell_cache[lang] = enchant.Dict(lang)
+                    cache[lang] = enchant.Dict(lang)
                 except enchant.errors.DictNotFoundError:
-                    print(f"Warning: Dictionary for language '{lang}' not found, skipping")
-                    _spell_cache[lang] = None  # Segna come non disponibile
-            
-            if _spell_cache[lang] is not None:
-                checkers.append(_spell_cache[lang])
+                    if lang not in _missing_languages:
+                        print(f"Warning: Dictionary for language '{lang}' not found, skipping")
+                        _missing_languages.add(lang)
+                    cache[lang] = None  # Segna come non disponibile
+
+        if cache[lang] is not None:
+            checkers.append(cache[lang])
     
     return checkers
 
 
+def reset_spell_checkers():
+    """Scarta i dizionari del thread corrente (usato dai worker dopo il fork)."""
+    _spell_local.cache = {}
+
+
+# Cartelle in cui enchant (provider hunspell/myspell) cerca i file .dic/.aff
+DICTIONARY_DIRS = [
+    os.path.expanduser("~/.config/enchant/hunspell"),
+    os.path.expanduser("~/.config/enchant"),
+    "/usr/share/hunspell",
+    "/usr/share/myspell",
+    "/usr/share/myspell/dicts",
+    "/usr/local/share/hunspell",
+]
+
+def find_dictionary_files(lang: str) -> List[str]:
+    """Restituisce i file dizionario (.dic, .aff) installati per la lingua indicata."""
+    dirs = [d for d in os.getenv("DICPATH", "").split(os.pathsep) if d]
+    if os.getenv("ENCHANT_CONFIG_DIR"):
+        dirs.append(os.getenv("ENCHANT_CONFIG_DIR"))
+    files = []
+    for directory in dirs + DICTIONARY_DIRS:
+        if os.path.isdir(directory):
+            files.extend(str(p) for p in Path(directory).glob(f"{lang}*") if p.suffix in (".dic", ".aff"))
+    return sorted(set(files))
+
+
 def check_words(words_to_check: List[str], languages: List[str], permitted: set) -> List[str]:
     """
     Core spell-checking: dato un elenco di parole pulite, restituisce quelle errate.
-    Thread-safe grazie al lock su enchant.
+    Thread-safe: ogni thread controlla con i propri dizionari.
+    Ogni parola viene controllata una volta sola: prima l'indice delle forme del dizionario
+    (tools/wordIndex.py), poi la VerdictCache (memoria + disco); solo le parole rimaste arrivano a hunspell.
     """
     checkers = get_spell_checkers(languages)
     if not checkers:
         raise ValueError(f"Nessun dizionario disponibile per: {languages}")
-    
+
+    with telemetry.span("check_words") as attributes:
+        misspelled = _check_candidates(words_to_check, checkers, permitted)
+        if attributes is not None:
+            attributes["misspelled"] = len(misspelled)
+    return misspelled
+
+
+def _check_candidates(words_to_check: List[str], checkers: List[enchant.Dict], permitted: set) -> List[str]:
+    candidates = {
+        word for word in words_to_check
+        if not (word in permitted or word.isdigit() or _NUMBER_SUFFIX_RE.match(word))
+    }
+    checked = len(candidates)
+
+    # Parole presenti nell'indice di almeno una lingua: corrette senza cache né hunspell
+    indexes = [index for index in (get_word_index(spell.tag) for spell in checkers) if index is not None]
+    if indexes:
+        candidates = {word for word in candidates if not any(word in index for index in indexes)}
+
+    cache = get_verdict_cache()
+    verdicts = {}
+    if cache is not None and candidates:
+        tags = sorted(spell.tag for spell in checkers)
+        langset = ",".join(tags)
+        cache.validate(langset, lambda: dictionary_fingerprint([f for tag in tags for f in find_dictionary_files(tag)]))
+        verdicts = cache.lookup(langset, candidates)
+
+    new_verdicts = {}
     misspelled = []
-    with _spell_lock:  # hunspell non è thread-safe: un file alla volta
-        for word in words_to_check:
-            if word in permitted or word.isdigit() or re.match(r'^\d+[a-z]+$', word):
-                continue
-            if not any(spell.check(word) for spell in checkers):
-                misspelled.append(word)
-    
-    return list(set(misspelled))
+    for word in candidates:
+        ok = verdicts.get(word)
+        if ok is None:
+            ok = new_verdicts[word] = any(spell.check(word) for spell in checkers)
+        if not ok:
+            misspelled.append(word)
+
+    if cache is not None and new_verdicts:
+        cache.store(langset, new_verdicts)
+
+    telemetry.count("words.checked", checked)
+    telemetry.count("word_index.hits", checked - len(candidates))
+    telemetry.count("verdict_cache.hits", len(candidates) - len(new_verdicts))
+    telemetry.count("hunspell.lookups", len(new_verdicts))
+    return misspelled
+
+
+# ── Suggerimenti ───────────────────────────────────────────────────────────
+# Fase opzionale (SPELL_SUGGESTIONS=true) dopo il controllo: enchant.suggest costa decine di ms
+# per parola, quindi gira solo sulle parole errate distinte di tutta l'analisi, su un pool di
+# thread (le chiamate a hunspell rilasciano il GIL) e con un tempo massimo. Quello che non
+# finisce in tempo non ritarda il risultato: le parole restano senza suggerimenti (quelle già
+# avviate finiscono in background e vanno nella cache (lingua, parola) per l'analisi successiva).
+SUGGESTIONS_ENABLED = os.getenv("SPELL_SUGGESTIONS", "false").lower() == "true"
+SUGGEST_BUDGET_MS = float(os.getenv("SPELL_SUGGEST_BUDGET_MS", "2000"))
+SUGGEST_WORKERS = int(os.getenv("SPELL_SUGGEST_WORKERS", "4"))
+SUGGEST_LIMIT = int(os.getenv("SPELL_SUGGEST_LIMIT", "5"))
+
+_suggest_pool = None
+_suggest_pool_lock = threading.Lock()
+
+
+def _get_suggest_pool() -> ThreadPoolExecutor:
+    global _suggest_pool
+    with _suggest_pool_lock:
+        if _suggest_pool is None:
+            _suggest_pool = ThreadPoolExecutor(max_workers=SUGGEST_WORKERS, thread_name_prefix="suggest")
+        return _suggest_pool
+
+
+def _suggest_one(lang: str, word: str) -> List[str]:
+    checkers = get_spell_checkers([lang])
+    return checkers[0].suggest(word)[:SUGGEST_LIMIT] if checkers else []
+
+
+def suggest_words(words, languages: List[str], budget_ms: float = None) -> Dict[str, List[str]]:
+    """
+    Suggerimenti di correzione per le parole indicate, al massimo SUGGEST_LIMIT per parola
+    (prima quelli della prima lingua).
+
+    Args:
+        words: Parole errate (vengono deduplicate)
+        languages: Codici lingua
+        budget_ms: Tempo massimo di attesa (default: SPELL_SUGGEST_BUDGET_MS)
+
+    Returns:
+        {parola: [suggerimenti]} per le parole completate entro il budget
+    """
+    budget_ms = SUGGEST_BUDGET_MS if budget_ms is None else budget_ms
+    words = sorted(set(words))
+    languages = [lang for lang in languages if get_spell_checkers([lang])]
+    cache = get_suggestion_cache()
+    per_lang: Dict[str, Dict[str, List[str]]] = {}
+
+    with telemetry.span("suggestions", words=len(words)):
+        pending = {}
+        for lang in languages:
+            known = {}
+            if cache is not None:
+                cache.validate(lang, lambda: dictionary_fingerprint(find_dictionary_files(lang)))
+                known = cache.lookup(lang, words)
+            per_lang[lang] = known
+            pool = _get_suggest_pool()
+            for word in words:
+                if word not in known:
+                    pending[pool.submit(_suggest_one, lang, word)] = (lang, word)
+
+        telemetry.count("suggestions.cached", sum(len(known) for known in per_lang.values()))
+        if pending:
+            done, not_done = wait(pending, timeout=budget_ms / 1000)
+            computed: Dict[str, Dict[str, List[str]]] = {}
+            for future in done:
+                lang, word = pending[future]
+                try:
+                    per_lang[lang][word] = computed.setdefault(lang, {})[word] = future.result()
+                except Exception as e:
+                    print(f"[Warning] Suggestions for '{word}' ({lang}) failed: {e}", file=sys.stderr)
+            if cache is not None:
+                for lang, values in computed.items():
+                    cache.store(lang, values)
+            telemetry.count("suggestions.computed", len(done))
+            if not_done:
+                # Le richieste ancora in coda vengono annullate, quelle già avviate finiscono in background
+                running = [f for f in not_done if not f.cancel()]
+                for future in running:
+                    future.add_done_callback(lambda f, key=pending[future]: _store_late(cache, key, f))
+                telemetry.count("suggestions.timed_out", len(not_done))
+                print(f"[Warning] Suggestion budget of {budget_ms:.0f} ms exceeded: {len(not_done)} lookups "
+                      f"left out ({len(running)} still running)", file=sys.stderr)
+
+    suggestions = {}
+    for word in words:
+        # Una parola è completa solo se lo sono tutte le sue lingue
+        if all(word in per_lang[lang] for lang in languages):
+            merged = []
+            for lang in languages:
+                merged.extend(s for s in per_lang[lang][word] if s not in merged)
+            suggestions[word] = merged[:SUGGEST_LIMIT]
+    return suggestions
+
+
+def _store_late(cache, key, future):
+    if cache is not None and not future.cancelled() and future.exception() is None:
+        cache.store(key[0], {key[1]: future.result()})
+
+
+def add_suggestions(spelling_analysis: List[Dict[str, Any]], languages: List[str], budget_ms: float = None) -> Dict[str, Any]:
+    """
+    Aggiunge a ogni voce con errori il campo "suggestions" ({parola: [suggerimenti]}),
+    con un'unica chiamata a suggest_words per tutte le parole errate dell'analisi.
+    Restituisce le statistiche della fase (per i tempi dell'analisi).
+    """
+    words = {word for entry in spelling_analysis for word in entry.get("misspelled_words", [])}
+    started = time.perf_counter()
+    suggestions = suggest_words(words, languages, budget_ms) if words else {}
+    for entry in spelling_analysis:
+        if entry.get("misspelled_words"):
+            entry["suggestions"] = {w: suggestions[w] for w in entry["misspelled_words"] if w in suggestions}
+    return {
+        "words": len(words),
+        "completed": len(suggestions),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
 
 
 # ── Utility ────────────────────────────────────────────────────────────────
 
 def clean_word(word: str) -> str:
-    word = re.sub(r'^_+|_+$', '', word)
-    word = re.sub(r'^\*+|\*+$', '', word)
-    word = re.sub(r'^`+|`+$', '', word)
+    for pattern in _CLEAN_RES:
+        word = pattern.sub('', word)
     return word
 
 
 def extract_words(content: str, positions_to_ignore: list, permitted: set) -> List[str]:
-    """Estrae e pulisce le parole da controllare, escludendo le posizioni ignorate."""
-    words = []
-    for match in re.finditer(r'\b\w+\b', content):
-        word = match.group(0)
-        pos = match.start()
-
-        in_ignored = any(s <= pos < e for s, e in positions_to_ignore)
-        if in_ignored or word.lower() in permitted:
-            continue
+    """
+    Estrae e pulisce le parole da controllare, escludendo le posizioni ignorate.
+    Le parole ripetute compaiono una volta per occorrenza; vedi tokenizer.tokenize
+    per la versione deduplicata con i conteggi.
+    """
+    return list(tokenize(content, positions_to_ignore, permitted).elements())
+
+
+def _supported_ext(filepath: str) -> str:
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"File not found: {filepath}")
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext not in IGNORE_PATTERNS:
+        raise ValueError(f"Extension '{ext}' not supported")
+    return ext
+
+
+def locate_words(filepath: str, permitted: set) -> Dict[str, List[int]]:
+    """Parole da controllare nel file: parola -> [occorrenze, riga, colonna della prima]."""
+    ext = _supported_ext(filepath)
+    if os.path.getsize(filepath) > STREAM_THRESHOLD:
+        return locate_stream(filepath, ext, permitted)
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        content = f.read()
+    index = LineIndex(content)
+    return {
+        word: [count, *index.line_col(offset)]
+        for word, (count, offset) in locate_tokens(content, find_ignored_positions(content, ext), permitted).items()
+    }
 
-        cleaned = clean_word(word).lower()
-        if cleaned and cleaned not in permitted and not cleaned.isdigit():
-            words.append(cleaned)
 
-    return words
+def occurrences(located: Dict[str, List[int]], misspelled) -> List[Dict[str, Any]]:
+    """Voci compatte {word, count, line, column} delle parole errate, in ordine di posizione."""
+    hits = [
+        {"word": word, "count": located[word][0], "line": located[word][1], "column": located[word][2]}
+        for word in misspelled
+    ]
+    return sorted(hits, key=lambda hit: (hit["line"], hit["column"]))
+
+
+def check_file(filepath: str, permitted: set, languages: List[str]) -> List[Dict[str, Any]]:
+    """Come analyze_spelling, ma con occorrenze e prima posizione di ogni parola errata."""
+    located = locate_words(filepath, permitted)
+    return occurrences(located, check_words(located, languages, permitted))
 
 
 # ── Tools ──────────────────────────────────────────────────────────────────
 
 @tool
-def find_docs_files(directory: str) -> Dict[str, Any]:
+def find_docs_files(directory: str, include: List[str] = None, exclude: List[str] = None) -> Dict[str, Any]:
     """
     Find all document files (.txt, .md, .tex, .typ) in a directory recursively.
+    Files ignored by .gitignore or by the project config (.spelling.json), binaries and
+    files over the size limit are skipped.
     
     Args:
         directory: Root directory to search
+        include: Optional .gitignore-style patterns of files to keep (e.g. ["docs/**"])
+        exclude: Optional .gitignore-style patterns of files or directories to skip
         
     Returns:
-        Dictionary with files_found count and file_paths list
+        Dictionary with files_found count, file_paths list, file_sizes (bytes, same order)
+        and total_bytes
     """
+    telemetry.count("tool_calls.find_docs_files")
     try:
-        doc_files = []
-        skip_dirs = {'.git', 'node_modules', '__pycache__', 'venv', '.venv'}
-        for root, dirs, files in os.walk(directory):
-            dirs[:] = [d for d in dirs if d not in skip_dirs]
-            for file in files:
-                if file.endswith(('.txt', '.md', '.tex', '.typ')):
-                    doc_files.append(os.path.join(root, file))
-        return {"files_found": len(doc_files), "file_paths": doc_files}
+        with telemetry.span("find_docs_files") as attributes:
+            found = discover_files(directory, include, exclude)
+            if attributes is not None:
+                attributes["source"] = found["source"]
+        telemetry.count("files.found", len(found["files"]))
+        result = {
+            "files_found": len(found["files"]),
+            "file_paths": [path for path, _ in found["files"]],
+            "file_sizes": [size for _, size in found["files"]],
+            "total_bytes": sum(size for _, size in found["files"]),
+        }
+        if found["skipped"]:
+            result["skipped"] = found["skipped"]
+        return result
     except Exception as e:
         return {"error": f"Error finding files: {str(e)}"}
 
@@ -109,7 +356,7 @@ def analyze_spelling(filepath: str, permitted: list = None, languages: List[str]
     
     Args:
         filepath: Path of the file to check
-        permitted: List of words to ignore
+        permitted: List of words to ignore (in addition to the project dictionary)
         languages: Language codes (default: ['en_US'])
         
     Returns:
@@ -117,56 +364,117 @@ def analyze_spelling(filepath: str, permitted: list = None, languages: List[str]
     """
     if languages is None:
         languages = ['en_US']
-    if permitted is None:
-        permitted = set()
+    # .spelling.txt del repository, glossari e parole ammesse dell'analisi (vedi projectDictionary)
+    permitted = dictionary_for(filepath, permitted or ())
+
+    telemetry.count("tool_calls.analyze_spelling")
+    with telemetry.span("analyze_spelling"):
+        started = time.perf_counter()
+        misspelled = _analyze_file(filepath, permitted, languages)
+        telemetry.observe("file.check_ms", (time.perf_counter() - started) * 1000)
+    telemetry.count("files.checked")
+    # Il risultato arriva all'orchestrator anche senza passare dalla risposta del modello
+    record_result({"file_path": filepath, "misspelled_words": sorted(misspelled)})
+    return misspelled
+
+
+def _analyze_file(filepath: str, permitted: set, languages: List[str]) -> List[str]:
+    ext = _supported_ext(filepath)
+
+    # File molto grandi: lettura a blocchi, le parole arrivano al checker come generatore
+    if os.path.getsize(filepath) > STREAM_THRESHOLD:
+        words = normalize_tokens(iter_tokens(filepath, ext), permitted)
     else:
-        permitted = set(w.lower() for w in permitted)
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
 
-    if not os.path.exists(filepath):
-        raise FileNotFoundError(f"File not found: {filepath}")
+        # .txt → nessuna posizione da ignorare
+        positions_to_ignore = find_ignored_positions(content, ext)
 
-    ext = os.path.splitext(filepath)[1].lower()
-    
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+        words = tokenize(content, positions_to_ignore, permitted)
 
-    positions_to_ignore = []
-
-    if ext == '.md':
-        for pattern in [
-            r'```.*?```',
-            r'`[^`]+`',
-            r'https?://[^\s\)]+',
-            r'!\[.*?\]\(.*?\)',
-        ]:
-            for m in re.finditer(pattern, content, re.DOTALL):
-                positions_to_ignore.append((m.start(), m.end()))
-        for m in re.finditer(r'\[.*?\]\((.*?)\)', content):
-            positions_to_ignore.append((m.start(1), m.end(1)))
-
-    elif ext == '.tex':
-        for pattern in [
-            r'\\[a-zA-Z]+(\{[^}]*\})?',
-            r'%.*?$',
-            r'\$\$?.*?\$\$?',
-            r'\\begin\{(equation|align|verbatim|lstlisting)\}.*?\\end\{\1\}',
-        ]:
-            flags = re.MULTILINE if pattern.startswith('%') else re.DOTALL
-            for m in re.finditer(pattern, content, flags):
-                positions_to_ignore.append((m.start(), m.end()))
-
-    elif ext == '.typ':
-        typst_keywords = ['size','margin','font','width','height','spacing',
-                          'padding','radius','stroke','fill','align','weight',
-                          'style','top','bottom','left','right']
-        kw_pattern = '|'.join(typst_keywords)
-        for m in re.finditer(rf'\b(?:{kw_pattern})\s*[:=]\s*([^\s,\)]+)', content, re.IGNORECASE):
-            positions_to_ignore.append((m.start(1), m.end(1)))
-
-    # .txt → nessuna posizione da ignorare
-
-    if ext not in ('.md', '.tex', '.typ', '.txt'):
-        raise ValueError(f"Extension '{ext}' not supported")
+    return check_words(words, languages, permitted)
+
+
+@tool
+def analyze_spelling_batch(paths: List[str] = None, directory: str = None, include: List[str] = None,
+                           exclude: List[str] = None, permitted: list = None, languages: List[str] = None) -> Dict[str, Any]:
+    """
+    Checks spelling in many files with a single call. Pass either a list of paths or a
+    directory (searched like find_docs_files), optionally filtered by .gitignore-style patterns.
+
+    Args:
+        paths: Files to check
+        directory: Root directory to search when paths is not given
+        include: Same as find_docs_files: .gitignore-style patterns of files or directories to keep,
+                 relative to directory (e.g. ["docs/", "*.tex"])
+        exclude: Same as find_docs_files: .gitignore-style patterns of files or directories to skip
+        permitted: List of words to ignore (in addition to the project dictionary)
+        languages: Language codes (default: ['en_US'])
+
+    Returns:
+        Dictionary with files_checked, files_with_errors, total_errors and results: one entry per file
+        with errors ({file_path, misspelled: [{word, count, line, column}]}) or unreadable ({file_path, error}).
+        Clean files are omitted; line and column (1-based) are those of the first occurrence.
+    """
+    if languages is None:
+        languages = ['en_US']
+    telemetry.count("tool_calls.analyze_spelling_batch")
+
+    if paths is None:
+        if directory is None:
+            return {"error": "Either paths or directory is required"}
+        found = find_docs_files(directory, include, exclude)
+        if "error" in found:
+            return found
+        paths = found["file_paths"]
+    elif include or exclude:
+        # Percorsi espliciti: stesse regole di find_docs_files, sul path relativo a directory se indicata
+        include_rules, exclude_rules = parse_rules(include or ()), parse_rules(exclude or ())
+
+        def selected(path):
+            rel = (os.path.relpath(path, directory) if directory else path).replace(os.sep, "/").lstrip("/")
+            if include_rules and not matches_path(include_rules, rel):
+                return False
+            return not (exclude_rules and matches_path(exclude_rules, rel))
+
+        paths = [path for path in paths if selected(path)]
+
+    permitted = dictionary_for(directory or (os.path.commonpath(paths) if paths else None), permitted or ())
+
+    # Un solo passaggio sui dizionari: le parole di tutti i file vengono controllate insieme
+    located, errors = {}, {}
+    with telemetry.span("analyze_spelling_batch", files=len(paths)):
+        for path in paths:
+            started = time.perf_counter()
+            try:
+                located[path] = locate_words(path, permitted)
+            except Exception as e:
+                errors[path] = str(e)
+            # Nel batch il controllo sui dizionari è unico: la latenza per file è quella della tokenizzazione
+            telemetry.observe("file.tokenize_ms", (time.perf_counter() - started) * 1000)
+        telemetry.count("files.checked", len(paths))
+
+        try:
+            misspelled = set(check_words({word for words in located.values() for word in words}, languages, permitted))
+        except ValueError as e:
+            return {"error": str(e)}
+
+    results, total_errors = [], 0
+    for path in paths:
+        if path in errors:
+            results.append({"file_path": path, "error": errors[path]})
+            record_result({"file_path": path, "misspelled_words": [], "error": errors[path]})
+            continue
+        hits = occurrences(located[path], misspelled.intersection(located[path]))
+        record_result({"file_path": path, "misspelled_words": sorted(hit["word"] for hit in hits), "occurrences": hits})
+        if hits:
+            total_errors += len(hits)
+            results.append({"file_path": path, "misspelled": hits})
 
-    words = extract_words(content, positions_to_ignore, permitted)
-    return check_words(words, languages, permitted)
\ No newline at end of file
+    return {
+        "files_checked": len(paths),
+        "files_with_errors": sum(1 for entry in results if "misspelled" in entry),
+        "total_errors": total_errors,
+        "results": results,
+    }
@@ -0,0 +1,193 @@
+import os
+import sys
+import time
+import heapq
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Any
+from tools.spellAgentTools import check_file, get_spell_checkers, reset_spell_checkers
+from tools.verdictCache import get_verdict_cache
+from tools.wordIndex import get_word_index
+from tools.projectDictionary import as_permitted
+from tools import telemetry
+
+# Numero di chunk per worker: più chunk che processi così un file enorme non lascia gli altri worker fermi
+CHUNKS_PER_WORKER = 4
+# Con un solo worker e risultati parziali richiesti, file controllati per gruppo
+PROGRESS_CHUNK_FILES = 25
+
+
+def check_files(file_paths: List[str], permitted: List[str], languages: List[str]) -> List[Dict[str, Any]]:
+    """
+    Controlla tutti i file nel processo corrente, uno dopo l'altro. Oltre alle parole errate
+    ogni voce riporta le occorrenze ({word, count, line, column} della prima).
+    Un file illeggibile non interrompe l'analisi: viene riportato con il campo "error".
+    permitted può essere un elenco di voci o un ProjectDictionary (ricaricato una volta per worker).
+    """
+    permitted = as_permitted(permitted)
+    results = []
+    for path in file_paths:
+        entry = {"file_path": path, "misspelled_words": [], "occurrences": []}
+        started = time.perf_counter()
+        try:
+            entry["occurrences"] = check_file(path, permitted, languages)
+            entry["misspelled_words"] = sorted(hit["word"] for hit in entry["occurrences"])
+        except Exception as e:
+            print(f"[Warning] Skipping {path}: {e}", file=sys.stderr)
+            entry["error"] = str(e)
+        telemetry.observe("file.check_ms", (time.perf_counter() - started) * 1000)
+        results.append(entry)
+    telemetry.count("files.checked", len(file_paths))
+    return results
+
+
+def _check_chunk(file_paths: List[str], permitted: List[str], languages: List[str], trace: bool = False) -> tuple:
+    """
+    check_files + variazione delle statistiche della VerdictCache del processo che lo esegue.
+    Con trace=True restituisce anche contatori e istogrammi raccolti nel worker (vedi telemetry.merge).
+    """
+    cache = get_verdict_cache()
+    before = cache.stats() if cache is not None else {}
+    with telemetry.collect("check_chunk") if trace else nullcontext() as recorder:
+        entries = check_files(file_paths, permitted, languages)
+    after = cache.stats() if cache is not None else {}
+    snapshot = recorder.snapshot() if recorder is not None else None
+    return entries, {key: after[key] - before.get(key, 0) for key in after}, snapshot
+
+
+def split_by_size(file_paths: List[str], chunks: int, sizes: Dict[str, int] = None) -> List[List[str]]:
+    """
+    Divide i file in `chunks` gruppi di dimensione totale simile (greedy: il file più grande
+    va sempre nel gruppo più leggero). I gruppi vuoti vengono scartati.
+    Le dimensioni già note (es. da find_docs_files) evitano una stat per file.
+    """
+    def size(path):
+        if sizes is not None and path in sizes:
+            return sizes[path]
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    bins = [(0, i, []) for i in range(max(1, chunks))]
+    heapq.heapify(bins)
+    for path in sorted(file_paths, key=size, reverse=True):
+        total, i, paths = heapq.heappop(bins)
+        paths.append(path)
+        heapq.heappush(bins, (total + size(path), i, paths))
+    return [paths for _, _, paths in sorted(bins, key=lambda b: b[1]) if paths]
+
+
+def _init_worker(languages: List[str]):
+    # Dopo il fork i Dict ereditati dal padre non vanno riusati: ogni worker crea i propri una volta sola
+    reset_spell_checkers()
+    # Idem per il recorder della telemetria: il worker raccoglie solo con _check_chunk(trace=True)
+    telemetry.detach()
+    get_spell_checkers(languages)
+
+
+class SpellEngine:
+    """
+    Pool di processi per lo spell-checking: ogni worker tiene i propri dizionari enchant,
+    quindi i file vengono controllati in parallelo senza contendersi un lock.
+    """
+
+    def __init__(self, languages: List[str], workers: int = None):
+        """
+        Args:
+            languages: Lingue da precaricare in ogni worker
+            workers: Numero di processi (default: SPELL_WORKERS o il numero di CPU)
+        """
+        if workers is None:
+            workers = int(os.getenv("SPELL_WORKERS", "0")) or os.cpu_count() or 1
+        self.languages = languages
+        self.workers = workers
+        self.cache_stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Indici delle parole costruiti (o aperti) qui, una volta: i worker li mappano in sola lettura
+            for lang in self.languages:
+                get_word_index(lang)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.languages,),
+            )
+        return self._pool
+
+    def check_files(self, file_paths: List[str], permitted: List[str], languages: List[str] = None,
+                    sizes: Dict[str, int] = None,
+                    on_result: Callable[[List[Dict[str, Any]]], None] = None) -> List[Dict[str, Any]]:
+        """
+        Controlla i file in parallelo e restituisce i risultati nello stesso ordine di file_paths,
+        con la stessa struttura di check_files ({"file_path", "misspelled_words", "occurrences"}).
+        sizes (path -> byte) serve a bilanciare i chunk tra i worker.
+        on_result riceve le voci di ogni chunk appena completato (risultati parziali).
+        """
+        languages = languages or self.languages
+        with telemetry.span("spell_engine", files=len(file_paths), workers=self.workers):
+            if self.workers <= 1 or len(file_paths) <= 1:
+                # Stesso processo: check_files registra direttamente nel recorder attivo.
+                # Con on_result i file vanno a gruppi, così l'avanzamento non arriva tutto alla fine
+                step = PROGRESS_CHUNK_FILES if on_result is not None else len(file_paths) or 1
+                entries = []
+                for i in range(0, len(file_paths), step):
+                    chunk_entries, stats, _ = _check_chunk(file_paths[i:i + step], permitted, languages)
+                    self._add_stats(stats)
+                    if on_result is not None:
+                        on_result(chunk_entries)
+                    entries.extend(chunk_entries)
+                return entries
+
+            pool = self._get_pool()
+            chunks = split_by_size(file_paths, min(len(file_paths), self.workers * CHUNKS_PER_WORKER), sizes)
+            trace = telemetry.active() is not None
+            futures = [pool.submit(_check_chunk, chunk, permitted, languages, trace) for chunk in chunks]
+
+            by_path = {}
+            for future in as_completed(futures):
+                entries, stats, snapshot = future.result()
+                self._add_stats(stats)
+                telemetry.merge(snapshot)
+                if on_result is not None:
+                    on_result(entries)
+                for entry in entries:
+                    by_path[entry["file_path"]] = entry
+            return [by_path[path] for path in file_paths]
+
+    def start(self) -> list:
+        """
+        Crea (fork) i processi worker senza attendere che carichino i dizionari. Va chiamato prima
+        di avviare altri thread: un fork mentre un thread tiene un lock può bloccare i worker.
+        """
+        if self.workers <= 1:
+            return []
+        pool = self._get_pool()
+        return [pool.submit(os.getpid) for _ in range(self.workers)]
+
+    def warm(self):
+        """Avvia subito tutti i worker (e quindi carica i dizionari) invece che al primo check_files."""
+        if self.workers > 1:
+            for future in self.start():
+                future.result()
+        else:
+            get_spell_checkers(self.languages)
+            for lang in self.languages:
+                get_word_index(lang)
+
+    def _add_stats(self, stats: Dict[str, int]):
+        for key, value in stats.items():
+            self.cache_stats[key] = self.cache_stats.get(key, 0) + value
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,169 @@
+import os
+import re
+import bisect
+from typing import Dict, Iterator, List, Tuple
+from tools.tokenizer import IGNORE_PATTERNS, TYPST_KEYWORDS, raw_tokens, locate_tokens, LineIndex, _WORD_CHAR_RE
+
+# Lettura a blocchi per file molto grandi: il testo viene elaborato un segmento alla volta,
+# tagliando solo dove nessuna regione da ignorare può essere ancora aperta. In questo modo
+# il risultato è identico alla lettura completa con f.read().
+
+CHUNK_SIZE = 1 << 20
+# Sopra questa dimensione analyze_spelling usa la lettura a blocchi
+STREAM_THRESHOLD = int(os.getenv("SPELL_STREAM_THRESHOLD", 8 << 20))
+
+_TYPST_KW = "|".join(TYPST_KEYWORDS)
+_TYPST_PENDING_RE = re.compile(rf'(?:{_TYPST_KW})\s*(?:[:=]\s*)?', re.IGNORECASE)
+
+# Per ogni pattern di IGNORE_PATTERNS (stesso ordine): come riconoscere un costrutto ancora aperto.
+#   line:     il match non attraversa mai un '\n', basta tagliare a fine riga
+#   open:     un'apertura senza chiusura nel buffer può chiudersi più avanti (pattern DOTALL .*?)
+#   backtick: come open, tranne "``" che non può mai diventare un code span
+#   tex_cmd:  \comando seguito da '{' senza '}' nel buffer: il gruppo opzionale può ancora allungarsi
+#   dollar:   come open; in più un match "$$" senza altri '$' dopo è provvisorio: con altro testo
+#             l'apertura "$$" può trovare la sua chiusura e il match diventare più lungo
+#   typst:    parola chiave seguita solo da spazi e ':'/'=' fino alla fine del buffer
+STREAM_RULES = {
+    '.md': [
+        ('open', re.compile(r'(?=```)')),
+        ('backtick', re.compile(r'`')),
+        ('line', None),
+        ('open', re.compile(r'!\[')),
+        ('line', None),
+    ],
+    '.tex': [
+        ('tex_cmd', None),
+        ('line', None),
+        ('dollar', re.compile(r'\$')),
+        ('open', re.compile(r'\\begin\{(?:equation|align|verbatim|lstlisting)\}')),
+    ],
+    '.typ': [
+        ('typst', re.compile(rf'\b(?:{_TYPST_KW})', re.IGNORECASE)),
+    ],
+    '.txt': [],
+}
+
+
+def _first_pending(buf: str, pattern: re.Pattern, kind: str, opener: re.Pattern, matches: list) -> int:
+    """Prima posizione in cui un costrutto di questo pattern è ancora aperto o provvisorio (len(buf) se nessuna)."""
+    earliest = len(buf)
+    for m in matches:
+        if ((kind == 'tex_cmd' and m.group(1) is None and buf.startswith('{', m.end()))
+                or (kind == 'dollar' and m.group() == '$$' and buf.find('$', m.end()) == -1)):
+            earliest = m.start()
+            break
+
+    if opener is None:
+        return earliest
+
+    i = 0
+    for o in opener.finditer(buf):
+        start = o.start()
+        if start >= earliest:
+            break
+        while i < len(matches) and matches[i].end() <= start:
+            i += 1
+        if i < len(matches) and matches[i].start() <= start:
+            continue  # dentro (o all'inizio di) un match già trovato
+        if pattern.match(buf, start) is not None:
+            continue
+        if kind == 'backtick' and buf.startswith('``', start):
+            continue
+        if kind == 'typst' and _TYPST_PENDING_RE.fullmatch(buf, start) is None:
+            continue
+        return start
+    return earliest
+
+
+def _safe_cut(buf: str, ext: str, eof: bool) -> Tuple[int, List[list]]:
+    """
+    Restituisce il punto di taglio e i match di ogni pattern sul buffer. Il primo candidato è
+    l'ultima fine riga prima di ogni costrutto aperto (le aperture non attraversano mai un '\\n',
+    quindi prima di lì sono tutte complete); poi si arretra fuori dai match che lo attraversano.
+    """
+    rules = IGNORE_PATTERNS[ext]
+    matches = [list(pattern.finditer(buf)) for pattern, _ in rules]
+    if eof:
+        return len(buf), matches
+
+    limit = len(buf)
+    for (pattern, _), (kind, opener), ms in zip(rules, STREAM_RULES[ext], matches):
+        limit = min(limit, _first_pending(buf, pattern, kind, opener, ms))
+    cut = buf.rfind('\n', 0, limit) + 1
+
+    # Nessun match può attraversare il taglio: si arretra all'inizio del match (e della parola
+    # che lo precede, così \b e le parole a cavallo si comportano come nella lettura completa)
+    starts = [[m.start() for m in ms] for ms in matches]
+    moved = True
+    while moved and cut > 0:
+        moved = False
+        for ms, st in zip(matches, starts):
+            i = bisect.bisect_left(st, cut) - 1
+            if i >= 0 and ms[i].end() > cut:
+                cut = ms[i].start()
+                while cut > 0 and _WORD_CHAR_RE.match(buf, cut - 1):
+                    cut -= 1
+                moved = True
+    return cut, matches
+
+
+def iter_segments(filepath: str, ext: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, List[Tuple[int, int]]]]:
+    """
+    Legge il file a blocchi e produce (segmento, intervalli da ignorare relativi al segmento).
+    Nessuna regione ignorata né parola attraversa il confine tra due segmenti; un costrutto
+    lasciato aperto (es. un blocco ``` senza chiusura) resta nel buffer finché non si chiude
+    o finisce il file, esattamente come nella lettura completa.
+    """
+    groups = [group for _, group in IGNORE_PATTERNS[ext]]
+    buf = ""
+    read_size = chunk_size
+    with open(filepath, 'r', encoding='utf-8') as f:
+        while True:
+            data = f.read(read_size)
+            eof = not data
+            buf += data
+            cut, matches = _safe_cut(buf, ext, eof)
+            if cut == 0 and not eof:
+                # Nessun punto di taglio sicuro: si legge di più, raddoppiando per non riscandire il buffer troppe volte
+                read_size *= 2
+                continue
+            read_size = chunk_size
+
+            positions = [
+                (m.start(group), m.end(group))
+                for ms, group in zip(matches, groups) for m in ms if m.start() < cut
+            ]
+            yield buf[:cut], positions
+            buf = buf[cut:]
+            if eof:
+                return
+
+
+def iter_tokens(filepath: str, ext: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Token grezzi del file, prodotti segmento per segmento (generatore)."""
+    for segment, positions in iter_segments(filepath, ext, chunk_size):
+        yield from raw_tokens(segment, positions)
+
+
+def locate_stream(filepath: str, ext: str, permitted: set, chunk_size: int = CHUNK_SIZE) -> Dict[str, List[int]]:
+    """
+    locate_tokens sul file letto a blocchi: parola -> [occorrenze, riga, colonna] della prima.
+    Righe e colonne sono riferite al file intero (i segmenti possono iniziare a metà riga).
+    """
+    words = {}
+    line_base, col_base = 0, 0  # righe complete e caratteri della riga corrente prima del segmento
+    for segment, positions in iter_segments(filepath, ext, chunk_size):
+        index = None
+        for word, (count, offset) in locate_tokens(segment, positions, permitted).items():
+            entry = words.get(word)
+            if entry is not None:
+                entry[0] += count
+                continue
+            index = index or LineIndex(segment)
+            line, col = index.line_col(offset)
+            words[word] = [count, line_base + line, col + (col_base if line == 1 else 0)]
+
+        newlines = segment.count('\n')
+        line_base += newlines
+        col_base = len(segment) - segment.rfind('\n') - 1 + (col_base if newlines == 0 else 0)
+    return words
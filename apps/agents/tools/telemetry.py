@@ -0,0 +1,287 @@
+import os
+import sys
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+# Strumentazione leggera delle fasi dell'analisi: span (context manager), contatori e istogrammi.
+# Si registra solo dentro un blocco collect(): fuori, span() restituisce un context manager vuoto
+# condiviso e count()/observe() escono subito, quindi il costo è un solo ContextVar.get().
+# Il riepilogo finisce in execution_metrics.telemetry; con TELEMETRY_OTEL_FILE gli span e le
+# metriche vengono anche aggiunti in formato OTLP/JSON (una richiesta per riga).
+
+ENABLED = os.getenv("TELEMETRY_ENABLED", "true").lower() != "false"
+
+# Limiti superiori (ms) dei bucket degli istogrammi di latenza, l'ultimo bucket è +inf
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+_recorder: ContextVar[Optional["Recorder"]] = ContextVar("telemetry_recorder", default=None)
+_parent: ContextVar[Optional[Dict[str, Any]]] = ContextVar("telemetry_parent", default=None)
+_NOOP = nullcontext()
+
+
+class Histogram:
+    """Istogramma a bucket fissi (come gli explicit bucket di OpenTelemetry)."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, data: Dict[str, Any]):
+        if not data["count"]:
+            return
+        self.counts = [a + b for a, b in zip(self.counts, data["counts"])]
+        self.count += data["count"]
+        self.sum += data["sum"]
+        self.min = data["min"] if self.min is None else min(self.min, data["min"])
+        self.max = data["max"] if self.max is None else max(self.max, data["max"])
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approssimato al limite superiore del bucket (al massimo osservato per l'ultimo)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return round(min(bound, self.max), 3)
+        return round(self.max, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "sum": self.sum, "min": self.min, "max": self.max, "counts": self.counts}
+
+
+class Recorder:
+    """Span, contatori e istogrammi di una singola analisi. Thread-safe."""
+
+    def __init__(self, name: str, attributes: Dict[str, Any] = None):
+        self.name = name
+        self.attributes = attributes or {}
+        self.trace_id = os.urandom(16).hex()
+        self.start_ns = time.time_ns()
+        self.spans: List[Dict[str, Any]] = []
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        parent = _parent.get()
+        record = {
+            "name": name,
+            "span_id": os.urandom(8).hex(),
+            "parent_id": parent["span_id"] if parent else None,
+            "start_ns": time.time_ns(),
+            "attributes": attributes,
+        }
+        token = _parent.set(record)
+        try:
+            yield record["attributes"]
+        except BaseException as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _parent.reset(token)
+            record["end_ns"] = time.time_ns()
+            with self._lock:
+                self.spans.append(record)
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Contatori e istogrammi serializzabili, da unire al recorder di un altro processo con merge()."""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {name: h.to_dict() for name, h in self.histograms.items()},
+            }
+
+    def merge(self, snapshot: Dict[str, Any]):
+        with self._lock:
+            for name, value in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, data in snapshot["histograms"].items():
+                self.histograms.setdefault(name, Histogram()).merge(data)
+
+    def summary(self) -> Dict[str, Any]:
+        """Riepilogo per execution_metrics: tempo per fase, contatori, latenze (ms)."""
+        with self._lock:
+            spans: Dict[str, Dict[str, Any]] = {}
+            for record in self.spans:
+                seconds = (record["end_ns"] - record["start_ns"]) / 1e9
+                stage = spans.setdefault(record["name"], {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+                stage["count"] += 1
+                stage["total_seconds"] += seconds
+                stage["max_seconds"] = max(stage["max_seconds"], seconds)
+                if "error" in record:
+                    stage["errors"] = stage.get("errors", 0) + 1
+            for stage in spans.values():
+                stage["total_seconds"] = round(stage["total_seconds"], 4)
+                stage["max_seconds"] = round(stage["max_seconds"], 4)
+            return {
+                "spans": spans,
+                "counters": dict(self.counters),
+                "histograms": {
+                    name: {
+                        "count": h.count,
+                        "mean_ms": round(h.sum / h.count, 3) if h.count else None,
+                        "p50_ms": h.quantile(0.5),
+                        "p95_ms": h.quantile(0.95),
+                        "max_ms": round(h.max, 3) if h.max is not None else None,
+                    }
+                    for name, h in self.histograms.items()
+                },
+            }
+
+    def to_otel(self) -> List[Dict[str, Any]]:
+        """Una richiesta OTLP/JSON per gli span e una per le metriche."""
+        resource = {"attributes": _otel_attributes({"service.name": "swep-agents", **self.attributes})}
+        scope = {"name": "swep.agents.telemetry"}
+        now = str(time.time_ns())
+        with self._lock:
+            spans = [
+                {
+                    "traceId": self.trace_id,
+                    "spanId": record["span_id"],
+                    **({"parentSpanId": record["parent_id"]} if record["parent_id"] else {}),
+                    "name": record["name"],
+                    "kind": 1,
+                    "startTimeUnixNano": str(record["start_ns"]),
+                    "endTimeUnixNano": str(record["end_ns"]),
+                    "attributes": _otel_attributes(record["attributes"]),
+                    "status": {"code": 2, "message": record["error"]} if "error" in record else {"code": 1},
+                }
+                for record in self.spans
+            ]
+            metrics = [
+                {"name": name, "sum": {
+                    "dataPoints": [{"asInt": str(value), "startTimeUnixNano": str(self.start_ns), "timeUnixNano": now}],
+                    "aggregationTemporality": 2, "isMonotonic": True,
+                }}
+                for name, value in self.counters.items()
+            ] + [
+                {"name": name, "unit": "ms", "histogram": {
+                    "dataPoints": [{
+                        "startTimeUnixNano": str(self.start_ns), "timeUnixNano": now,
+                        "count": str(h.count), "sum": h.sum, "min": h.min, "max": h.max,
+                        "bucketCounts": [str(c) for c in h.counts], "explicitBounds": list(h.bounds),
+                    }],
+                    "aggregationTemporality": 2,
+                }}
+                for name, h in self.histograms.items()
+            ]
+        return [
+            {"resourceSpans": [{"resource": resource, "scopeSpans": [{"scope": scope, "spans": spans}]}]},
+            {"resourceMetrics": [{"resource": resource, "scopeMetrics": [{"scope": scope, "metrics": metrics}]}]},
+        ]
+
+
+def _otel_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    result = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        result.append({"key": key, "value": typed})
+    return result
+
+
+# ── API ────────────────────────────────────────────────────────────────────
+
+def active() -> Optional[Recorder]:
+    return _recorder.get()
+
+
+def detach():
+    """Disattiva il recorder ereditato (es. nei processi creati con fork)."""
+    _recorder.set(None)
+    _parent.set(None)
+
+
+def span(name: str, **attributes):
+    """Misura il blocco come fase `name`; il context manager restituisce il dict degli attributi."""
+    recorder = _recorder.get()
+    if recorder is None:
+        return _NOOP
+    return recorder.span(name, **attributes)
+
+
+def count(name: str, value: int = 1):
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.count(name, value)
+
+
+def observe(name: str, value: float):
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.observe(name, value)
+
+
+def merge(snapshot: Optional[Dict[str, Any]]):
+    """Unisce i contatori raccolti in un worker (vedi spellEngine) al recorder attivo."""
+    recorder = _recorder.get()
+    if recorder is not None and snapshot:
+        recorder.merge(snapshot)
+
+
+@contextmanager
+def collect(name: str = "analysis", **attributes):
+    """
+    Attiva un recorder per il blocco (e per i thread/task avviati copiando il contesto).
+    Se un recorder è già attivo viene riusato, così main può includere anche l'invio del webhook.
+    Restituisce None se TELEMETRY_ENABLED=false.
+    """
+    current = _recorder.get()
+    if current is not None or not ENABLED:
+        yield current
+        return
+    recorder = Recorder(name, attributes)
+    token = _recorder.set(recorder)
+    try:
+        with recorder.span(name, **attributes):
+            yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+def export(recorder: Optional[Recorder], path: str = None):
+    """Aggiunge span e metriche del recorder al file OTLP/JSON (default: TELEMETRY_OTEL_FILE)."""
+    path = path or os.getenv("TELEMETRY_OTEL_FILE")
+    if recorder is None or not path:
+        return
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            for request in recorder.to_otel():
+                f.write(json.dumps(request) + "\n")
+    except OSError as e:
+        print(f"[Warning] Unable to write telemetry to {path}: {e}", file=sys.stderr)
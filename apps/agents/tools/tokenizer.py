@@ -0,0 +1,152 @@
+import re
+import bisect
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# ── Pattern precompilati ───────────────────────────────────────────────────
+
+_WORD_RE = re.compile(r'\b\w+\b')
+_WORD_CHAR_RE = re.compile(r'\w')
+_WORD_TAIL_RE = re.compile(r'\w*')
+_NEWLINE_RE = re.compile(r'\n')
+
+TYPST_KEYWORDS = ['size', 'margin', 'font', 'width', 'height', 'spacing',
+                   'padding', 'radius', 'stroke', 'fill', 'align', 'weight',
+                   'style', 'top', 'bottom', 'left', 'right']
+
+# Regioni da non controllare per estensione: (pattern, gruppo da ignorare).
+# Stessi pattern e flag usati storicamente da analyze_spelling.
+IGNORE_PATTERNS: Dict[str, List[Tuple[re.Pattern, int]]] = {
+    '.md': [
+        (re.compile(r'```.*?```', re.DOTALL), 0),
+        (re.compile(r'`[^`]+`', re.DOTALL), 0),
+        (re.compile(r'https?://[^\s\)]+', re.DOTALL), 0),
+        (re.compile(r'!\[.*?\]\(.*?\)', re.DOTALL), 0),
+        (re.compile(r'\[.*?\]\((.*?)\)'), 1),
+    ],
+    '.tex': [
+        (re.compile(r'\\[a-zA-Z]+(\{[^}]*\})?', re.DOTALL), 0),
+        (re.compile(r'%.*?$', re.MULTILINE), 0),
+        (re.compile(r'\$\$?.*?\$\$?', re.DOTALL), 0),
+        (re.compile(r'\\begin\{(equation|align|verbatim|lstlisting)\}.*?\\end\{\1\}', re.DOTALL), 0),
+    ],
+    '.typ': [
+        (re.compile(rf'\b(?:{"|".join(TYPST_KEYWORDS)})\s*[:=]\s*([^\s,\)]+)', re.IGNORECASE), 1),
+    ],
+    '.txt': [],
+}
+
+
+def find_ignored_positions(content: str, ext: str) -> List[Tuple[int, int]]:
+    """Intervalli [start, end) di codice, link, comandi e formule da escludere dal controllo."""
+    positions = []
+    for pattern, group in IGNORE_PATTERNS.get(ext, []):
+        for m in pattern.finditer(content):
+            positions.append((m.start(group), m.end(group)))
+    return positions
+
+
+def merge_intervals(positions: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Ordina e fonde gli intervalli sovrapposti o adiacenti; gli intervalli vuoti vengono scartati."""
+    merged = []
+    for start, end in sorted(p for p in positions if p[1] > p[0]):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+# ── Tokenizer ──────────────────────────────────────────────────────────────
+
+def _gaps(content: str, positions_to_ignore: List[Tuple[int, int]]) -> Iterator[Tuple[int, int]]:
+    """Tratti [start, end) di testo tra un intervallo ignorato e l'altro, in cui cercare le parole."""
+    length = len(content)
+    pos = 0
+    for start, end in merge_intervals(positions_to_ignore) + [(length, length)]:
+        gap_end = min(start, length)
+        if pos < gap_end:
+            # La parola a cavallo dell'inizio dell'intervallo va presa intera
+            if gap_end < length and _WORD_CHAR_RE.match(content, gap_end - 1) and _WORD_CHAR_RE.match(content, gap_end):
+                gap_end = _WORD_TAIL_RE.match(content, gap_end).end()
+            yield pos, gap_end
+        pos = max(pos, gap_end, end)
+
+
+def raw_tokens(content: str, positions_to_ignore: List[Tuple[int, int]]) -> List[str]:
+    """
+    Parole (\\b\\w+\\b) che iniziano fuori dagli intervalli ignorati, in un solo passaggio.
+    La regex gira solo sui tratti di testo tra un intervallo e l'altro: le regioni ignorate
+    non vengono nemmeno scandite. Una parola che inizia prima di un intervallo e ci entra
+    dentro viene comunque presa per intero, come faceva extract_words.
+    """
+    tokens = []
+    for start, end in _gaps(content, positions_to_ignore):
+        tokens.extend(_WORD_RE.findall(content, start, end))
+    return tokens
+
+
+def normalize_tokens(tokens: Iterable[str], permitted: set) -> Counter:
+    """
+    Normalizza e deduplica i token: stessa logica di clean_word + lower di extract_words,
+    ma eseguita una volta per token distinto invece che per occorrenza.
+    """
+    words = Counter()
+    for raw, count in Counter(tokens).items():
+        if raw.lower() in permitted:
+            continue
+        # Un token \w+ può contenere solo '_' ai bordi: '*' e '`' non sono caratteri di parola
+        cleaned = raw.strip('_').lower()
+        if cleaned and cleaned not in permitted and not cleaned.isdigit():
+            words[cleaned] += count
+    return words
+
+
+def tokenize(content: str, positions_to_ignore: List[Tuple[int, int]], permitted: set) -> Counter:
+    """Parole normalizzate e deduplicate di content, con il numero di occorrenze."""
+    return normalize_tokens(raw_tokens(content, positions_to_ignore), permitted)
+
+
+# ── Posizioni ──────────────────────────────────────────────────────────────
+
+def locate_tokens(content: str, positions_to_ignore: List[Tuple[int, int]], permitted: set) -> Dict[str, List[int]]:
+    """
+    Come tokenize, ma per ogni parola normalizzata restituisce [occorrenze, offset della prima].
+    L'offset punta alla parola ripulita (dopo gli eventuali '_' iniziali).
+    """
+    raw = {}
+    for start, end in _gaps(content, positions_to_ignore):
+        for m in _WORD_RE.finditer(content, start, end):
+            entry = raw.get(m.group())
+            if entry is None:
+                raw[m.group()] = [1, m.start()]
+            else:
+                entry[0] += 1
+
+    words = {}
+    for token, (count, offset) in raw.items():
+        if token.lower() in permitted:
+            continue
+        cleaned = token.strip('_').lower()
+        if not cleaned or cleaned in permitted or cleaned.isdigit():
+            continue
+        offset += len(token) - len(token.lstrip('_'))
+        entry = words.get(cleaned)
+        if entry is None:
+            words[cleaned] = [count, offset]
+        else:
+            entry[0] += count
+            entry[1] = min(entry[1], offset)
+    return words
+
+
+class LineIndex:
+    """Converte offset in (riga, colonna), entrambe a partire da 1."""
+
+    def __init__(self, content: str):
+        self.starts = [0] + [m.end() for m in _NEWLINE_RE.finditer(content)]
+
+    def line_col(self, offset: int) -> Tuple[int, int]:
+        line = bisect.bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
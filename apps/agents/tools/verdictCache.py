@@ -0,0 +1,237 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Dimensione massima della LRU in memoria (parole per processo)
+DEFAULT_MAX_ENTRIES = 200_000
+# Ogni quanto (secondi) ricontrollare se i file dei dizionari sono cambiati
+FINGERPRINT_TTL = 60
+# Limite dei parametri per singola query SQLite
+_SQL_BATCH = 500
+
+
+def default_cache_path() -> str:
+    base = os.getenv("TEMP_PATH") or tempfile.gettempdir()
+    return os.path.join(base, ".spellcache", "verdicts.sqlite3")
+
+
+def dictionary_fingerprint(dictionary_files: List[str]) -> str:
+    """Hash di path, dimensione e mtime dei file dizionario: cambia quando un dizionario viene aggiornato."""
+    h = hashlib.sha1()
+    for path in sorted(dictionary_files):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        h.update(f"{path}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()
+
+
+class SQLiteCache(ABC):
+    """
+    Base delle cache su SQLite: connessione per processo (WAL, creata dopo ogni fork), schema e
+    invalidazione per chiave quando cambia il fingerprint dei file dizionario. Ogni sottoclasse ha
+    le sue tabelle, inclusa quella dei fingerprint (colonne langset, fingerprint).
+    """
+
+    SCHEMA: Tuple[str, ...] = ()
+    META_TABLE = "meta"
+
+    def __init__(self, path: str = None):
+        self.path = path or default_cache_path()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._checked: Dict[str, float] = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        # Una connessione SQLite non sopravvive a un fork: i worker del pool ne aprono una propria
+        if self._conn is None or self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.META_TABLE} (langset TEXT PRIMARY KEY, fingerprint TEXT)")
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+            self._checked = {}
+        return self._conn
+
+    def validate(self, key: str, fingerprint: Callable[[], str]):
+        """
+        Invalida le voci di key se i dizionari sono cambiati dall'ultima esecuzione.
+        fingerprint viene calcolato al massimo una volta ogni FINGERPRINT_TTL secondi.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if key in self._checked and now - self._checked[key] < FINGERPRINT_TTL:
+                return
+            conn = self._connection()
+            fingerprint = fingerprint()
+            row = conn.execute(f"SELECT fingerprint FROM {self.META_TABLE} WHERE langset = ?", (key,)).fetchone()
+            if row is None or row[0] != fingerprint:
+                self._invalidate(conn, key)
+                conn.execute(f"INSERT OR REPLACE INTO {self.META_TABLE} (langset, fingerprint) VALUES (?, ?)", (key, fingerprint))
+                conn.commit()
+            self._checked[key] = now
+
+    @abstractmethod
+    def _invalidate(self, conn: sqlite3.Connection, key: str):
+        """Rimuove le voci di key (chiamato con il lock, prima del commit)."""
+
+
+class VerdictCache(SQLiteCache):
+    """
+    Cache dei verdetti di spell-checking, chiave (insieme di lingue, parola).
+    Primo livello: LRU in memoria. Secondo livello: SQLite su disco, condiviso tra processi
+    e tra esecuzioni diverse dell'orchestrator. Le voci di un insieme di lingue vengono
+    scartate quando cambia il fingerprint dei suoi file dizionario.
+    """
+
+    SCHEMA = ("CREATE TABLE IF NOT EXISTS verdicts (langset TEXT, word TEXT, ok INTEGER, PRIMARY KEY (langset, word))",)
+
+    def __init__(self, path: str = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[Tuple[str, str], bool]" = OrderedDict()
+
+    def _invalidate(self, conn: sqlite3.Connection, langset: str):
+        conn.execute("DELETE FROM verdicts WHERE langset = ?", (langset,))
+        for key in [k for k in self._lru if k[0] == langset]:
+            del self._lru[key]
+
+    # ── Lookup ─────────────────────────────────────────────────────────────
+
+    def lookup(self, langset: str, words: Iterable[str]) -> Dict[str, bool]:
+        """Restituisce i verdetti noti per words; le parole assenti dal risultato vanno controllate."""
+        found = {}
+        missing = []
+        with self._lock:
+            for word in words:
+                key = (langset, word)
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[word] = self._lru[key]
+                    self.hits += 1
+                else:
+                    missing.append(word)
+
+            if missing:
+                conn = self._connection()
+                for i in range(0, len(missing), _SQL_BATCH):
+                    batch = missing[i:i + _SQL_BATCH]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = conn.execute(
+                        f"SELECT word, ok FROM verdicts WHERE langset = ? AND word IN ({placeholders})",
+                        (langset, *batch),
+                    ).fetchall()
+                    for word, ok in rows:
+                        found[word] = bool(ok)
+                        self._remember((langset, word), bool(ok))
+                disk = sum(1 for word in missing if word in found)
+                self.disk_hits += disk
+                self.misses += len(missing) - disk
+        return found
+
+    def store(self, langset: str, verdicts: Dict[str, bool]):
+        """Salva i nuovi verdetti in memoria e su disco in un'unica transazione."""
+        if not verdicts:
+            return
+        with self._lock:
+            for word, ok in verdicts.items():
+                self._remember((langset, word), ok)
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO verdicts (langset, word, ok) VALUES (?, ?, ?)",
+                [(langset, word, int(ok)) for word, ok in verdicts.items()],
+            )
+            conn.commit()
+
+    def _remember(self, key: Tuple[str, str], ok: bool):
+        self._lru[key] = ok
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_verdict_cache():
+    """Cache condivisa del processo; None se disabilitata con SPELL_CACHE=false."""
+    global _cache
+    if os.getenv("SPELL_CACHE", "true").lower() == "false":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = VerdictCache(max_entries=int(os.getenv("SPELL_CACHE_SIZE", DEFAULT_MAX_ENTRIES)))
+        return _cache
+
+
+class SuggestionCache(SQLiteCache):
+    """
+    Suggerimenti di correzione già calcolati, chiave (lingua, parola), nello stesso file SQLite
+    dei verdetti. enchant.suggest costa decine di ms per parola: ogni coppia si calcola una volta
+    finché i file dizionario della lingua non cambiano.
+    """
+
+    SCHEMA = ("CREATE TABLE IF NOT EXISTS suggestions (lang TEXT, word TEXT, suggestions TEXT, PRIMARY KEY (lang, word))",)
+    META_TABLE = "suggestion_meta"
+
+    def _invalidate(self, conn: sqlite3.Connection, lang: str):
+        conn.execute("DELETE FROM suggestions WHERE lang = ?", (lang,))
+
+    def lookup(self, lang: str, words: Iterable[str]) -> Dict[str, List[str]]:
+        words = list(words)
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            for i in range(0, len(words), _SQL_BATCH):
+                batch = words[i:i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT word, suggestions FROM suggestions WHERE lang = ? AND word IN ({placeholders})",
+                    (lang, *batch),
+                ).fetchall()
+                found.update((word, json.loads(value)) for word, value in rows)
+        return found
+
+    def store(self, lang: str, suggestions: Dict[str, List[str]]):
+        if not suggestions:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO suggestions (lang, word, suggestions) VALUES (?, ?, ?)",
+                [(lang, word, json.dumps(values)) for word, values in suggestions.items()],
+            )
+            conn.commit()
+
+
+_suggestion_cache = None
+
+def get_suggestion_cache():
+    """Cache dei suggerimenti del processo; None se disabilitata con SPELL_CACHE=false."""
+    global _suggestion_cache
+    if os.getenv("SPELL_CACHE", "true").lower() == "false":
+        return None
+    with _cache_lock:
+        if _suggestion_cache is None:
+            _suggestion_cache = SuggestionCache()
+        return _suggestion_cache
@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import time
+import gzip
+import fcntl
+import random
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from tools import telemetry
+
+# Consegna dei risultati all'endpoint /analysis/webhook di NestJs.
+#   - una requests.Session per processo con pool di connessioni (jobServer e queueWorker inviano
+#     molti risultati allo stesso host)
+#   - corpo compresso con gzip sopra WEBHOOK_GZIP_MIN_BYTES (NestJs/body-parser lo decomprime)
+#   - retry con backoff esponenziale e jitter su errori di rete, timeout, 429 e 5xx
+#   - se l'API resta irraggiungibile il payload va nello spool su disco e viene reinviato all'URL
+#     con cui era stato inviato: all'avvio di jobServer e queueWorker, dopo il prossimo invio riuscito
+#     (orchestrator, jobServer) o con `python -m tools.webhookDelivery replay`
+# Lo spool serve solo se sopravvive al processo: i container `docker run --rm` dell'API montano un
+# volume in WEBHOOK_SPOOL_DIR (vedi analysis-executor.service.ts), altrimenti resta nel /tmp del container.
+
+DEFAULT_URL = "http://host.docker.internal:3000/analysis/webhook"
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "30"))
+WEBHOOK_RETRIES = int(os.getenv("WEBHOOK_RETRIES", "5"))
+# Attesa prima del primo retry, raddoppiata a ogni tentativo fino a BACKOFF_MAX
+WEBHOOK_BACKOFF_S = float(os.getenv("WEBHOOK_BACKOFF_S", "0.5"))
+BACKOFF_MAX = 30.0
+# Corpi più grandi vengono compressi (0 = mai)
+GZIP_MIN_BYTES = int(os.getenv("WEBHOOK_GZIP_MIN_BYTES", 64 << 10))
+POOL_SIZE = int(os.getenv("WEBHOOK_POOL_SIZE", "10"))
+
+_RETRY_STATUS = {408, 429} | set(range(500, 600))
+
+
+def webhook_url() -> str:
+    return os.getenv("NEST_WEBHOOK_URL", DEFAULT_URL)
+
+
+def default_spool_dir() -> str:
+    base = os.getenv("WEBHOOK_SPOOL_DIR")
+    if base:
+        return base
+    return os.path.join(os.getenv("TEMP_PATH") or tempfile.gettempdir(), ".webhook-spool")
+
+
+class DeliveryError(Exception):
+    """Consegna fallita dopo tutti i tentativi (o con un errore non ripetibile)."""
+
+    def __init__(self, message: str, response: Optional[requests.Response] = None):
+        super().__init__(message)
+        self.response = response
+
+
+class WebhookClient:
+    """Client HTTP riusabile tra molte analisi: sessione, retry, compressione e spool."""
+
+    def __init__(self, url: str = None, spool_dir: str = None, retries: int = WEBHOOK_RETRIES,
+                 backoff: float = WEBHOOK_BACKOFF_S, gzip_min_bytes: int = GZIP_MIN_BYTES):
+        self.url = url or webhook_url()
+        self.spool_dir = spool_dir or default_spool_dir()
+        self.retries = retries
+        self.backoff = backoff
+        self.gzip_min_bytes = gzip_min_bytes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Content-Type"] = "application/json"
+
+    # ── Invio ──────────────────────────────────────────────────────────────
+
+    def encode(self, payload: Dict[str, Any]):
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        if self.gzip_min_bytes and len(body) >= self.gzip_min_bytes:
+            return gzip.compress(body, compresslevel=5), {"Content-Encoding": "gzip"}
+        return body, {}
+
+    def post(self, payload: Dict[str, Any], timeout: float = None, retries: int = None,
+             url: str = None) -> requests.Response:
+        """
+        Invia payload con retry (a url, default quello del client). Restituisce la risposta (anche 4xx,
+        che non vengono ripetute); solleva DeliveryError se l'API non risponde o risponde 429/5xx a
+        tutti i tentativi.
+        """
+        url = url or self.url
+        timeout = WEBHOOK_TIMEOUT if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        body, headers = self.encode(payload)
+
+        with telemetry.span("webhook", bytes=len(body), gzip=bool(headers)) as attributes:
+            last_error, response = None, None
+            for attempt in range(retries + 1):
+                if attempt:
+                    telemetry.count("webhook.retries")
+                    time.sleep(self._delay(attempt, response))
+                try:
+                    response = self.session.post(url, data=body, headers=headers, timeout=timeout)
+                except requests.RequestException as e:
+                    last_error, response = e, None
+                    print(f"[Warning] Webhook attempt {attempt + 1}/{retries + 1} failed: {e}", file=sys.stderr)
+                    continue
+                if response.status_code not in _RETRY_STATUS:
+                    if attributes is not None:
+                        attributes["http.status_code"] = response.status_code
+                        attributes["attempts"] = attempt + 1
+                    return response
+                last_error = f"HTTP {response.status_code}"
+                print(f"[Warning] Webhook attempt {attempt + 1}/{retries + 1}: HTTP {response.status_code}", file=sys.stderr)
+
+        raise DeliveryError(f"Webhook delivery to {url} failed after {retries + 1} attempts: {last_error}", response)
+
+    def _delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        # Retry-After (secondi) di un 429/503 ha la precedenza sul backoff
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return min(float(response.headers["Retry-After"]), BACKOFF_MAX)
+        delay = min(self.backoff * (2 ** (attempt - 1)), BACKOFF_MAX)
+        return delay * random.uniform(0.5, 1.0)
+
+    def deliver(self, payload: Dict[str, Any], timeout: float = None) -> Optional[requests.Response]:
+        """post; se la consegna fallisce il payload finisce nello spool e viene restituito None."""
+        try:
+            return self.post(payload, timeout)
+        except DeliveryError as e:
+            path = self.spool(payload)
+            print(f"[CRITICAL]: {e}. Result spooled to {path}", file=sys.stderr)
+            return None
+
+    # ── Spool ──────────────────────────────────────────────────────────────
+
+    def spool(self, payload: Dict[str, Any]) -> str:
+        os.makedirs(self.spool_dir, exist_ok=True)
+        analysis_id = str(payload.get("analysisId") or payload.get("analysis_id") or "unknown")
+        name = f"{time.time_ns()}-{''.join(c if c.isalnum() or c in '-_' else '_' for c in analysis_id)}.json.gz"
+        path = os.path.join(self.spool_dir, name)
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump({"url": self.url, "payload": payload}, f)
+        os.replace(tmp, path)
+        telemetry.count("webhook.spooled")
+        return path
+
+    def pending(self):
+        if not os.path.isdir(self.spool_dir):
+            return []
+        return sorted(os.path.join(self.spool_dir, name) for name in os.listdir(self.spool_dir) if name.endswith(".json.gz"))
+
+    def replay(self, retries: int = 1) -> Dict[str, int]:
+        """
+        Reinvia i payload dello spool, dal più vecchio. Si ferma al primo errore (API ancora giù);
+        un solo processo alla volta (flock), gli altri saltano il replay.
+        """
+        stats = {"sent": 0, "rejected": 0, "remaining": 0}
+        files = self.pending()
+        if not files:
+            return stats
+        with open(os.path.join(self.spool_dir, ".lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                stats["remaining"] = len(files)
+                return stats
+            files = self.pending()
+            for i, path in enumerate(files):
+                try:
+                    with gzip.open(path, "rt", encoding="utf-8") as f:
+                        entry = json.load(f)
+                    # L'URL salvato: lo spool è condiviso dai client dei diversi endpoint
+                    response = self.post(entry["payload"], retries=retries, url=entry.get("url"))
+                except DeliveryError as e:
+                    print(f"[Warning] Spool replay stopped: {e}", file=sys.stderr)
+                    stats["remaining"] = len(files) - i
+                    break
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"[Warning] Dropping unreadable spool file {path}: {e}", file=sys.stderr)
+                    os.remove(path)
+                    continue
+                # Un 4xx non cambierà al prossimo tentativo: il payload viene scartato
+                if response.status_code >= 400:
+                    print(f"[Warning] Spooled result {os.path.basename(path)} rejected: HTTP {response.status_code}", file=sys.stderr)
+                    stats["rejected"] += 1
+                else:
+                    stats["sent"] += 1
+                os.remove(path)
+        telemetry.count("webhook.replayed", stats["sent"])
+        if stats["sent"] or stats["rejected"]:
+            print(f"[Webhook] Spool replay: {stats['sent']} sent, {stats['rejected']} rejected, "
+                  f"{stats['remaining']} remaining", file=sys.stderr)
+        return stats
+
+
+_clients: Dict[str, WebhookClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(url: str = None) -> WebhookClient:
+    """Client condiviso del processo per url (default: NEST_WEBHOOK_URL)."""
+    url = url or webhook_url()
+    with _clients_lock:
+        if url not in _clients:
+            _clients[url] = WebhookClient(url)
+        return _clients[url]
+
+
+def deliver(payload: Dict[str, Any], timeout: float = None) -> Optional[requests.Response]:
+    return get_client().deliver(payload, timeout)
+
+
+def replay_spool() -> Dict[str, int]:
+    """Reinvia lo spool; non solleva eccezioni (chiamato all'avvio dei processi)."""
+    try:
+        return get_client().replay()
+    except Exception as e:
+        print(f"[Warning] Spool replay failed: {e}", file=sys.stderr)
+        return {"sent": 0, "rejected": 0, "remaining": -1}
+
+
+if __name__ == "__main__":
+    # Dalla cartella apps/agents: python -m tools.webhookDelivery replay
+    if sys.argv[1:] != ["replay"]:
+        print("Usage: python -m tools.webhookDelivery replay", file=sys.stderr)
+        sys.exit(1)
+    from dotenv import load_dotenv
+    load_dotenv()
+    print(json.dumps(get_client().replay(retries=WEBHOOK_RETRIES)))
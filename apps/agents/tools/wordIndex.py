@@ -0,0 +1,313 @@
+import os
+import re
+import sys
+import mmap
+import fcntl
+import hashlib
+import tempfile
+import threading
+from array import array
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# Indice compatto delle parole sicuramente corrette per lingua, davanti a hunspell.
+# Viene costruito una volta dai file .dic/.aff (radici + forme con un prefisso e/o un suffisso)
+# e salvato come tabella hash a indirizzamento aperto di hash a 64 bit, letta con mmap: i worker
+# di spellEngine condividono le stesse pagine in sola lettura.
+# L'indice è conservativo: contiene solo forme che hunspell accetta (niente parole FORBIDDENWORD,
+# NEEDAFFIX, ONLYINCOMPOUND, CIRCUMFIX), quindi una parola trovata è corretta e tutte le altre
+# passano comunque da hunspell. Le query sono parole minuscole: si indicizzano solo forme minuscole.
+
+INDEX_ENABLED = os.getenv("SPELL_WORD_INDEX", "true").lower() != "false"
+# Oltre questo numero di forme l'espansione si ferma (l'indice resta valido, solo meno completo)
+MAX_WORDS = int(os.getenv("SPELL_INDEX_MAX_WORDS", 4_000_000))
+
+_MAGIC = b"SPIDX001"
+_HEADER = 24  # magic + numero di parole + capacità (uint64)
+
+
+def default_index_dir() -> str:
+    base = os.getenv("SPELL_INDEX_DIR")
+    if base:
+        return base
+    return os.path.join(os.getenv("TEMP_PATH") or tempfile.gettempdir(), ".spellindex")
+
+
+def word_hash(word: str) -> int:
+    # 0 indica uno slot vuoto
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+
+# ── Lettura .aff / .dic ────────────────────────────────────────────────────
+
+class Affix:
+    __slots__ = ("strip", "add", "condition", "cross")
+
+    def __init__(self, strip: str, add: str, condition: Optional[re.Pattern], cross: bool):
+        self.strip = strip
+        self.add = add
+        self.condition = condition
+        self.cross = cross
+
+
+class AffixFile:
+    """Le parti di un file .aff che servono a generare le forme flesse."""
+
+    def __init__(self, path: str):
+        self.encoding = "utf-8"
+        self.flag_mode = "short"
+        self.aliases: List[str] = []
+        self.prefixes: Dict[str, List[Affix]] = {}
+        self.suffixes: Dict[str, List[Affix]] = {}
+        self.special: Dict[str, str] = {}
+        self.full_strip = False
+        self.unsupported = None
+
+        with open(path, "rb") as f:
+            raw = f.read()
+        match = re.search(rb"^SET\s+(\S+)", raw, re.MULTILINE)
+        if match:
+            self.encoding = match.group(1).decode("ascii", "replace").lower().replace("microsoft-", "")
+        text = raw.decode(self.encoding, errors="replace")
+
+        headers: Dict[Tuple[str, str], bool] = {}
+        for line in text.splitlines():
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            keyword = fields[0]
+            if keyword == "FLAG" and len(fields) > 1:
+                self.flag_mode = fields[1].lower()
+            elif keyword == "AF" and len(fields) > 1 and not fields[1].isdigit():
+                self.aliases.append(fields[1])
+            elif keyword in ("FORBIDDENWORD", "NEEDAFFIX", "PSEUDOROOT", "ONLYINCOMPOUND", "CIRCUMFIX") and len(fields) > 1:
+                self.special[keyword] = fields[1]
+            elif keyword == "FULLSTRIP":
+                self.full_strip = True
+            elif keyword == "IGNORE":
+                # hunspell toglie questi caratteri dalle parole prima del controllo: l'indice non lo replica
+                self.unsupported = "IGNORE"
+            elif keyword in ("PFX", "SFX") and len(fields) >= 4:
+                table = self.prefixes if keyword == "PFX" else self.suffixes
+                key = (keyword, fields[1])
+                if key not in headers:
+                    headers[key] = fields[2] == "Y"
+                    table.setdefault(fields[1], [])
+                    continue
+                if len(fields) < 5:
+                    continue
+                strip = "" if fields[2] == "0" else fields[2]
+                add, _, continuation = fields[3].partition("/")
+                add = "" if add == "0" else add
+                # Affissi che richiedono altri affissi o i composti: fuori dall'indice
+                if continuation and self._blocked(self.parse_flags(continuation)):
+                    continue
+                condition = None if fields[4] == "." else self._condition(fields[4], keyword == "PFX")
+                table[fields[1]].append(Affix(strip, add, condition, headers[key]))
+
+    def parse_flags(self, flags: str) -> Set[str]:
+        if self.aliases and flags.isdigit():
+            index = int(flags) - 1
+            flags = self.aliases[index] if 0 <= index < len(self.aliases) else ""
+        if self.flag_mode == "long":
+            return {flags[i:i + 2] for i in range(0, len(flags), 2)}
+        if self.flag_mode == "num":
+            return set(flags.split(","))
+        return set(flags)
+
+    def _blocked(self, flags: Set[str]) -> bool:
+        return any(self.special.get(k) in flags for k in ("NEEDAFFIX", "PSEUDOROOT", "ONLYINCOMPOUND", "CIRCUMFIX", "FORBIDDENWORD"))
+
+    @staticmethod
+    def _condition(condition: str, prefix: bool) -> Optional[re.Pattern]:
+        # La condizione è una sequenza di caratteri e classi [..] / [^..], già sintassi regex
+        pattern = "".join(part if part.startswith("[") else re.escape(part)
+                          for part in re.findall(r"\[[^\]]*\]|.", condition))
+        try:
+            return re.compile("^" + pattern if prefix else pattern + "$")
+        except re.error:
+            return re.compile(r"(?!)")  # condizione non leggibile: l'affisso non si applica mai
+
+
+def _apply_suffix(root: str, affix: Affix, full_strip: bool) -> Optional[str]:
+    if affix.strip:
+        if not root.endswith(affix.strip) or (len(affix.strip) >= len(root) and not full_strip):
+            return None
+    if affix.condition is not None and not affix.condition.search(root):
+        return None
+    return root[:len(root) - len(affix.strip)] + affix.add
+
+
+def _apply_prefix(root: str, affix: Affix, full_strip: bool) -> Optional[str]:
+    if affix.strip:
+        if not root.startswith(affix.strip) or (len(affix.strip) >= len(root) and not full_strip):
+            return None
+    if affix.condition is not None and not affix.condition.search(root):
+        return None
+    return affix.add + root[len(affix.strip):]
+
+
+def expand_dictionary(dic_path: str, aff_path: str) -> Iterator[str]:
+    """Radici e forme con un affisso (o prefisso + suffisso cross-product), solo minuscole."""
+    aff = AffixFile(aff_path)
+    if aff.unsupported:
+        print(f"[Warning] {aff_path}: {aff.unsupported} not supported, word index disabled", file=sys.stderr)
+        return
+
+    with open(dic_path, "r", encoding=aff.encoding, errors="replace") as f:
+        lines = f.read().splitlines()[1:]
+
+    entries = []
+    forbidden = set()
+    for line in lines:
+        # I campi morfologici seguono uno spazio o un tab; "\/" è uno slash nella parola
+        entry = line.split("\t", 1)[0].split(" ", 1)[0].replace("\\/", "\0")
+        if not entry:
+            continue
+        word, _, flags = entry.partition("/")
+        word = word.replace("\0", "/")
+        flags = aff.parse_flags(flags) if flags else set()
+        if aff.special.get("FORBIDDENWORD") in flags:
+            forbidden.add(word)
+            continue
+        entries.append((word, flags))
+
+    for word, flags in entries:
+        forms = []
+        if not aff._blocked(flags):
+            forms.append(word)
+        suffixed = []
+        for flag in flags:
+            for affix in aff.suffixes.get(flag, ()):
+                form = _apply_suffix(word, affix, aff.full_strip)
+                if form:
+                    forms.append(form)
+                    if affix.cross:
+                        suffixed.append(form)
+        for flag in flags:
+            for affix in aff.prefixes.get(flag, ()):
+                form = _apply_prefix(word, affix, aff.full_strip)
+                if not form:
+                    continue
+                forms.append(form)
+                if affix.cross:
+                    # La condizione del prefisso deve valere sia sulla radice sia sulla forma con suffisso
+                    forms.extend(f for f in (_apply_prefix(s, affix, aff.full_strip) for s in suffixed) if f)
+        for form in forms:
+            if form not in forbidden and form == form.lower():
+                yield form
+
+
+# ── Indice su disco ────────────────────────────────────────────────────────
+
+def build_index(words: Iterator[str], path: str, max_words: int = MAX_WORDS) -> int:
+    """Scrive la tabella hash (fattore di carico <= 0.5) in modo atomico. Restituisce il numero di parole."""
+    hashes = set()
+    for word in words:
+        hashes.add(word_hash(word))
+        if len(hashes) >= max_words:
+            print(f"[Warning] Word index truncated at {max_words} words: {path}", file=sys.stderr)
+            break
+
+    capacity = 1
+    while capacity < max(len(hashes), 1) * 2:
+        capacity <<= 1
+    mask = capacity - 1
+    slots = array("Q", bytes(8 * capacity))
+    for h in hashes:
+        i = h & mask
+        while slots[i]:
+            i = (i + 1) & mask
+        slots[i] = h
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_MAGIC)
+        f.write(array("Q", [len(hashes), capacity]).tobytes())
+        slots.tofile(f)
+    os.replace(tmp, path)
+    return len(hashes)
+
+
+class WordIndex:
+    """Tabella hash mappata in memoria, in sola lettura."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != _MAGIC:
+            raise ValueError(f"Not a word index: {path}")
+        self.count, capacity = memoryview(self._mm)[8:_HEADER].cast("Q")
+        self._mask = capacity - 1
+        self._slots = memoryview(self._mm)[_HEADER:].cast("Q")
+
+    def __contains__(self, word: str) -> bool:
+        h = word_hash(word)
+        slots, mask = self._slots, self._mask
+        i = h & mask
+        while True:
+            value = slots[i]
+            if value == h:
+                return True
+            if value == 0:
+                return False
+            i = (i + 1) & mask
+
+    def __len__(self) -> int:
+        return self.count
+
+
+def _dictionary_pair(lang: str) -> Optional[Tuple[str, str]]:
+    from tools.spellAgentTools import find_dictionary_files
+    files = find_dictionary_files(lang)
+    dic = next((f for f in files if os.path.basename(f) == f"{lang}.dic"), None)
+    aff = next((f for f in files if os.path.basename(f) == f"{lang}.aff"), None)
+    return (dic, aff) if dic and aff else None
+
+
+_indexes: Dict[str, Optional[WordIndex]] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_word_index(lang: str) -> Optional[WordIndex]:
+    """
+    Indice della lingua per il processo corrente, costruito al primo uso se manca su disco
+    (serializzato tra processi con flock). None se disabilitato o senza file .dic/.aff.
+    """
+    if not INDEX_ENABLED:
+        return None
+    if lang in _indexes:
+        return _indexes[lang]
+    with _indexes_lock:
+        if lang not in _indexes:
+            _indexes[lang] = _load_or_build(lang)
+        return _indexes[lang]
+
+
+def _load_or_build(lang: str) -> Optional[WordIndex]:
+    from tools.verdictCache import dictionary_fingerprint
+    pair = _dictionary_pair(lang)
+    if pair is None:
+        return None
+    path = os.path.join(default_index_dir(), f"{lang}-{dictionary_fingerprint(list(pair))[:16]}.idx")
+    try:
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".lock", "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                if not os.path.exists(path):
+                    count = build_index(expand_dictionary(*pair), path)
+                    print(f"[WordIndex] {lang}: {count} words -> {path}", file=sys.stderr)
+        return WordIndex(path)
+    except (OSError, ValueError) as e:
+        print(f"[Warning] Word index for {lang} unavailable: {e}", file=sys.stderr)
+        return None
+
+
+if __name__ == "__main__":
+    # Costruzione anticipata (es. nell'immagine Docker): python tools/wordIndex.py en_US it_IT
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    for lang in sys.argv[1:]:
+        index = get_word_index(lang)
+        print(f"{lang}: {len(index) if index is not None else 'no dictionary files'}")
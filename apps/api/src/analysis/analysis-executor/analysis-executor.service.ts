@@ -1,6 +1,12 @@
 import { Injectable } from '@nestjs/common';
 import { spawn } from 'child_process';
 
+// Volume Docker per i risultati che il container non è riuscito a consegnare al webhook:
+// con --rm il /tmp del container sparisce, lo spool deve sopravvivere per il replay del container successivo
+const WEBHOOK_SPOOL_VOLUME = process.env.WEBHOOK_SPOOL_VOLUME || 'analyzer-webhook-spool';
+const WEBHOOK_SPOOL_DIR = '/var/spool/analyzer-webhook';
+const spoolFlags = ['-v', `${WEBHOOK_SPOOL_VOLUME}:${WEBHOOK_SPOOL_DIR}`, '-e', `WEBHOOK_SPOOL_DIR=${WEBHOOK_SPOOL_DIR}`];
+
 @Injectable()
 export class AnalysisExecutorService {
     public startAnalysis(method: string, repoOwner: string, repoName: string, analysisId: string) : void {
@@ -8,6 +14,8 @@ export class AnalysisExecutorService {
             this.startDockerAnalysis(repoOwner, repoName, analysisId);
         } else if(method === 'aws') {
             this.startAWSAnalysis(repoOwner, repoName, analysisId);
+        } else if(method === 'server') {
+            this.startServerAnalysis(repoOwner, repoName, analysisId);
         } else {
             console.error('[ERRORE]: Metodologia di analisi non valida');
         }
@@ -22,6 +30,7 @@ export class AnalysisExecutorService {
             '--network', 'host',
             '--name', `analysis-${analysisId}`,
             ...envFlags,
+            ...spoolFlags,
             '-e', `ANALYSIS_ID=${analysisId}`,
             'analyzer-agent:latest',
             `https://github.com/${repoOwner}/${repoName}`,
@@ -43,6 +52,28 @@ export class AnalysisExecutorService {
         })
     }
 
+    // Job server Python sempre attivo (apps/agents/jobServer.py): nessun container per analisi,
+    // il risultato arriva comunque su /analysis/webhook
+    private startServerAnalysis(repoOwner: string, repoName: string, analysisId: string) : void {
+        const serverUrl = process.env.AGENTS_SERVER_URL || 'http://localhost:8000';
+        fetch(`${serverUrl}/jobs`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                analysis_id: analysisId,
+                repo_url: `https://github.com/${repoOwner}/${repoName}`,
+            }),
+        })
+            .then(async (response) => {
+                if (!response.ok) {
+                    console.error(`[Execution of ${analysisId}] Job server ha risposto ${response.status}: ${await response.text()}`);
+                }
+            })
+            .catch((err) => {
+                console.error(`[Execution of ${analysisId}] Job server non raggiungibile: ${err.message}`);
+            });
+    }
+
 private startAWSAnalysis(repoOwner: string, repoName: string, analysisId: string): void {
     console.log(`[AWS MODE] Iniziando analisi su AWS per l'analisi: ${analysisId}`);
 
@@ -64,6 +95,7 @@ private startAWSAnalysis(repoOwner: string, repoName: string, analysisId: string
         '--network', 'host',
         '--name', `aws-analysis-${analysisId}`,
         ...envFlags,
+        ...spoolFlags,
         '-e', `ANALYSIS_ID=${analysisId}`,
         'analyzer-agent:latest',
         `https://github.com/${repoOwner}/${repoName}`,
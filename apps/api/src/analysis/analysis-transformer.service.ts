@@ -15,10 +15,13 @@ export class AnalysisTransformerService {
       .filter(item => item.misspelled_words && item.misspelled_words.length > 0)
       .map(item => ({
         title: `Spelling errors in ${this.getFileName(item.file_path)}`,
-        description: item.misspelled_words.map(w => `${w}`).join(', '),
+        description: item.misspelled_words
+          .map(w => (item.suggestions?.[w]?.length ? `${w} (${item.suggestions[w].join(', ')})` : `${w}`))
+          .join(', '),
         severity: 'warning',
         file: item.file_path,
-        line: 0, // Spelling analysis non fornisce line number
+        // Riga del primo errore nel file (0 se l'agente non ha fornito le posizioni)
+        line: item.occurrences?.length ? Math.min(...item.occurrences.map(o => o.line)) : 0,
       }));
   }
 
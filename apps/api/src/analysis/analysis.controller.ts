@@ -15,6 +15,7 @@ import { Model, Types } from 'mongoose';
 
 import { AnalysisService } from './analysis.service';
 import { CreateAnalysisDto } from './dto/create-analysis.dto';
+import { WebhookProgressDto } from './dto/webhook-result.dto';
 import { AnalysisResultHandlerService } from './analysis-result-handler/analysis-result-handler.service';
 import { AnalysisTransformerService } from './analysis-transformer.service';
 import { JwtAuthGuard } from '../auth/guards/jwt-auth.guard';
@@ -80,6 +81,24 @@ async handleWebhook(@Body() result: any) {
       }
     }
 
+    // Analisi fallita o interrotta: si conservano i file già arrivati da /webhook/progress
+    let partial = false;
+    if (spellingAnalysis.length === 0) {
+      const stored = await this.analysisModel
+        .findOne({ analysisId: analysisUuid }, { partialResults: 1, progress: 1 })
+        .lean();
+      if (stored?.partialResults?.length) {
+        // Un file ricontrollato compare più volte: vale l'ultima voce
+        const byFile = new Map<string, any>();
+        for (const item of stored.partialResults) {
+          byFile.set(item.file_path, item);
+        }
+        spellingAnalysis = [...byFile.values()];
+        partial = true;
+        this.logger.warn(`Uso ${spellingAnalysis.length} risultati parziali per ${analysisUuid}`);
+      }
+    }
+
     if (spellingAnalysis.length === 0) {
       this.logger.warn(`Nessun spelling_analysis trovato per ${analysisUuid}`);
     }
@@ -91,6 +110,7 @@ async handleWebhook(@Body() result: any) {
     const qualityScore = this.transformer.calculateQualityScore(qualityIssues);
 
     const report = {
+      partial,
       qualityScore,
       securityScore: 100,
       performanceScore: 100,
@@ -107,12 +127,18 @@ async handleWebhook(@Body() result: any) {
       { analysisId: analysisUuid },
       {
         $set: {
-          status: result.status === 'error' ? AnalysisStatus.FAILED : AnalysisStatus.COMPLETED,
+          status: result.status === 'error' || result.error ? AnalysisStatus.FAILED : AnalysisStatus.COMPLETED,
           completedAt: new Date(),
           report,
-          summary: result.summary,
-          executionMetrics: result.execution_metrics
-        }
+          summary: result.summary ?? (partial ? {
+            total_files: spellingAnalysis.length,
+            total_errors: spellingAnalysis.reduce((sum, item) => sum + (item.misspelled_words?.length || 0), 0),
+          } : undefined),
+          executionMetrics: result.execution_metrics,
+          ...(result.error ? { errorMessage: result.error } : {}),
+        },
+        // Il risultato finale (o il report costruito sui parziali) sostituisce i dati di avanzamento
+        $unset: { partialResults: 1 }
       },
       { new: true }
     );
@@ -131,6 +157,43 @@ async handleWebhook(@Body() result: any) {
   }
 }
 
+@Post('webhook/progress')
+@HttpCode(200)
+async handleProgress(@Body() progress: WebhookProgressDto) {
+  const analysisUuid = progress.analysis_id || (progress as any).analysisId;
+  if (!analysisUuid || typeof progress.sequence !== 'number') {
+    return { success: false, message: 'Missing analysis identification or sequence' };
+  }
+
+  // Solo analisi ancora in corso e sequence nuove: i retry e i messaggi arrivati dopo il risultato finale sono ignorati
+  const updated = await this.analysisModel.updateOne(
+    {
+      analysisId: analysisUuid,
+      status: { $in: [AnalysisStatus.PENDING, AnalysisStatus.RUNNING] },
+      $or: [{ 'progress.sequence': { $lt: progress.sequence } }, { progress: { $exists: false } }],
+    },
+    {
+      $push: { partialResults: { $each: progress.spelling_analysis || [] } },
+      $set: {
+        status: AnalysisStatus.RUNNING,
+        progress: {
+          sequence: progress.sequence,
+          total_files: progress.summary?.total_files ?? 0,
+          total_errors: progress.summary?.total_errors ?? 0,
+          files_with_errors: progress.summary?.files_with_errors ?? 0,
+          expected_files: progress.expected_files ?? null,
+          updatedAt: new Date(),
+        },
+      },
+    },
+  );
+
+  if (updated.matchedCount === 0) {
+    this.logger.debug(`Avanzamento ${progress.sequence} ignorato per ${analysisUuid}`);
+  }
+  return { success: true, applied: updated.matchedCount > 0 };
+}
+
   @Get('report/:id')
   // @UseGuards(JwtAuthGuard)
   public async getReport(@Param('id') id: string) {
@@ -1,6 +1,16 @@
+export interface SpellingOccurrence {
+  word: string;
+  count: number;
+  line: number;
+  column: number;
+}
+
 export interface SpellingAnalysisItem {
   file_path: string;
   misspelled_words: string[];
+  occurrences?: SpellingOccurrence[];
+  // Correzioni proposte per parola (solo con SPELL_SUGGESTIONS=true, parole completate entro il budget)
+  suggestions?: Record<string, string[]>;
 }
 
 export interface ExecutionMetrics {
@@ -12,6 +22,24 @@ export interface ExecutionMetrics {
   completed_at: string;
 }
 
+// Risultati parziali inviati durante l'analisi (POST /analysis/webhook/progress)
+export interface WebhookProgressDto {
+  analysis_id: string;
+  type: 'progress';
+  // Crescente per analisi: un messaggio con sequence già vista (retry) viene ignorato
+  sequence: number;
+  // Solo i file completati dall'ultimo messaggio
+  spelling_analysis: SpellingAnalysisItem[];
+  // Contatori cumulativi dall'inizio dell'analisi
+  summary: {
+    total_files: number;
+    total_errors: number;
+    files_with_errors: number;
+  };
+  // File da controllare, se già noti (null nella modalità agent)
+  expected_files?: number | null;
+}
+
 export interface WebhookResultDto {
   analysisId: string;
   status: 'completed' | 'error';
@@ -37,6 +37,8 @@ export class Analysis {
 
   @Prop({ type: Object })
   report?: {
+    // true se costruito sui risultati parziali di un'analisi fallita
+    partial?: boolean;
     qualityScore: number;
     securityScore: number;
     performanceScore: number;
@@ -68,6 +70,21 @@ export class Analysis {
   @Prop()
   errorMessage?: string;
 
+  // Voci spelling_analysis ricevute da /analysis/webhook/progress mentre l'analisi è in corso;
+  // rimosse quando arriva il risultato finale, usate al suo posto se l'analisi fallisce
+  @Prop({ type: [Object], default: undefined })
+  partialResults?: Record<string, any>[];
+
+  @Prop({ type: Object })
+  progress?: {
+    sequence: number;
+    total_files: number;
+    total_errors: number;
+    files_with_errors: number;
+    expected_files?: number | null;
+    updatedAt: Date;
+  };
+
   @Prop({ type: Object })
   metadata?: {
     user_email?: string;